@@ -1,5 +1,18 @@
+import importlib
+
 import streamlit as st
-from interfaces import upload_arquivos, detalhamento_ativos, comparacao_carteira, sugestoes_alocacao, confirmacao_pdf
+
+from utils.carteira_sessao import carteira, memoria_kb
+
+# Módulo de cada etapa. Cada um é importado só quando a etapa é aberta pela
+# primeira vez no processo: a Etapa 1 não carrega plotly, reportlab etc.
+ETAPAS = {
+    1: "interfaces.upload_arquivos",
+    2: "interfaces.detalhamento_ativos",
+    3: "interfaces.comparacao_carteira",
+    4: "interfaces.sugestoes_alocacao",
+    5: "interfaces.confirmacao_pdf",
+}
 
 # Define layout amplo para a página inteira
 st.set_page_config(layout="wide")
@@ -13,21 +26,16 @@ st.title("Simulador de Carteira - v0")
 # Navegação controlada
 with st.sidebar:
     st.write("## Etapas")
-    for i in range(1, 6):
+    for i in ETAPAS:
         label = f"Etapa {i}"
         disabled = i > st.session_state.etapa
         if st.button(label, disabled=disabled):
             st.session_state.etapa = i
             st.rerun()  # Corrige clique duplo
 
+    ativos = carteira(st.session_state)
+    if not ativos.empty:
+        st.caption(f"Carteira na sessão: {len(ativos)} ativos · {memoria_kb(ativos):.0f} KB")
+
 # Roteia para a interface correta
-if st.session_state.etapa == 1:
-    upload_arquivos.show()
-elif st.session_state.etapa == 2:
-    detalhamento_ativos.show()
-elif st.session_state.etapa == 3:
-    comparacao_carteira.show()
-elif st.session_state.etapa == 4:
-    sugestoes_alocacao.show()
-elif st.session_state.etapa == 5:
-    confirmacao_pdf.show()
+importlib.import_module(ETAPAS[st.session_state.etapa]).show()
@@ -0,0 +1,36 @@
+# benchmarks/artefatos_sessoes.py
+"""
+Simula sessões longas baixando Excel e PDF de carteiras sempre diferentes
+e acompanha o repositório de artefatos: itens, bytes em disco e memória
+Python em uso (tracemalloc), que devem estabilizar no limite configurado.
+
+    python -m benchmarks.artefatos_sessoes [downloads] [limite_mb]
+"""
+import functools
+import sys
+import tracemalloc
+
+from benchmarks.dados_sinteticos import entradas_pdf
+from utils.artefatos import ARTEFATOS, conteudo
+from utils.cache_relatorio import chave_conteudo
+from utils.exportacao_excel import escrever_excel_carteiras
+from utils.geracao_pdf import escrever_pdf
+
+def main(downloads: int = 120, limite_mb: int = 8):
+    ARTEFATOS.max_bytes = limite_mb * 1024 * 1024
+    tracemalloc.start()
+    print(f"{'downloads':>9s} {'itens':>6s} {'disco MB':>9s} {'python MB':>10s}")
+    for i in range(1, downloads + 1):
+        entradas = entradas_pdf(60, semente=i)
+        ativos = entradas["ativos_df"]
+        conteudo(f"xlsx:{chave_conteudo(ativos)}", functools.partial(escrever_excel_carteiras, ativos_df=ativos), ".xlsx")
+        if i % 4 == 0:  # um PDF a cada quatro Excel
+            conteudo(f"pdf:{chave_conteudo(ativos)}", functools.partial(escrever_pdf, **entradas), ".pdf")
+        if i % (downloads // 10 or 1) == 0:
+            est = ARTEFATOS.estatisticas()
+            print(f"{i:9d} {est['itens']:6d} {est['bytes'] / 2**20:9.1f} "
+                  f"{tracemalloc.get_traced_memory()[0] / 2**20:10.1f}")
+    ARTEFATOS.limpar()
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
@@ -0,0 +1,39 @@
+# benchmarks/bench_secoes.py
+"""
+Regeração do PDF com as seções em cache: primeira geração, só cabeçalho
+alterado e uma única realocação alterada.
+
+    python -m benchmarks.bench_secoes [ativos]
+"""
+import sys
+import time
+
+from benchmarks.dados_sinteticos import entradas_pdf
+from utils.cache_relatorio import CACHE_SECOES
+from utils.geracao_pdf import generate_pdf
+
+def _gerar(rotulo: str, entradas: dict):
+    antes = CACHE_SECOES.estatisticas()
+    t0 = time.perf_counter()
+    generate_pdf(**entradas)
+    dt = time.perf_counter() - t0
+    depois = CACHE_SECOES.estatisticas()
+    print(f"{rotulo:<26} {dt*1000:8.1f} ms | seções em cache {depois['hits'] - antes['hits']}, "
+          f"recalculadas {depois['misses'] - antes['misses']}")
+
+def main(n_ativos: int = 1000):
+    entradas = entradas_pdf(n_ativos)
+    _gerar("primeira geração", entradas)
+
+    _gerar("só cabeçalho alterado", dict(entradas, cliente_nome="Outro Cliente", nome_assessor="Outro Assessor"))
+
+    # R$ 100 de um ativo para outro da mesma classe: a proposta por classe não muda
+    ativos = entradas["ativos_df"].copy()
+    mesma_classe = ativos.index[ativos["Classificação"] == ativos.loc[0, "Classificação"]]
+    for i, delta in ((mesma_classe[0], 100.0), (mesma_classe[1], -100.0)):
+        ativos.loc[i, "Valor Realocado"] += delta
+        ativos.loc[i, "Novo Valor"] += delta
+    _gerar("uma realocação alterada", dict(entradas, ativos_df=ativos))
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -0,0 +1,51 @@
+# benchmarks/bench_tabelas.py
+"""
+Tabelas longas do PDF (Sugestão de Carteira, Ativos Alocados/Resgatados)
+com carteiras consolidadas grandes: preparo das linhas, layout da tabela
+(Table x LongTable com alturas conhecidas) e o relatório completo.
+
+    python -m benchmarks.bench_tabelas [ativos]
+"""
+import io
+import sys
+import time
+
+from PyPDF2 import PdfReader
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import LongTable, SimpleDocTemplate, Table
+
+from benchmarks.dados_sinteticos import ativos_sinteticos, entradas_pdf
+from utils.geracao_pdf import (
+    _alturas_linhas, _secao_movimentacoes, _secao_sugestao, generate_pdf,
+)
+
+LARGURAS = [A4[0] * 0.6 - 43, A4[0] * 0.2 - 14, A4[0] * 0.2 - 14]
+
+def _cronometrar(fn):
+    t0 = time.perf_counter()
+    res = fn()
+    return res, time.perf_counter() - t0
+
+def _layout(tabela) -> float:
+    doc = SimpleDocTemplate(io.BytesIO(), pagesize=A4)
+    return _cronometrar(lambda: doc.build([tabela]))[1]
+
+def main(n_ativos: int = 5000):
+    ativos = ativos_sinteticos(n_ativos)
+    (data, _, _), t_sug = _cronometrar(lambda: _secao_sugestao(
+        ativos[["Classificação", "estrategia", "Novo Valor"]], LARGURAS[0] - 12))
+    _, t_mov = _cronometrar(lambda: _secao_movimentacoes(
+        ativos[["Classificação", "estrategia", "valor_atual", "Novo Valor", "Valor Realocado"]], 200))
+    print(f"{n_ativos} ativos | preparo: sugestão {t_sug*1000:.0f} ms, alocados/resgatados {t_mov*1000:.0f} ms")
+
+    linhas = lambda: [list(r) for r in data]
+    t_table = _layout(Table(linhas(), colWidths=LARGURAS, repeatRows=1))
+    t_long = _layout(LongTable(linhas(), colWidths=LARGURAS, repeatRows=1,
+                               rowHeights=_alturas_linhas(data, [], LARGURAS)))
+    print(f"layout da Sugestão de Carteira: Table {t_table:.2f} s | LongTable + alturas {t_long:.2f} s")
+
+    pdf, t_pdf = _cronometrar(lambda: generate_pdf(**entradas_pdf(n_ativos)))
+    print(f"relatório completo: {t_pdf:.2f} s, {len(PdfReader(io.BytesIO(pdf)).pages)} páginas")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
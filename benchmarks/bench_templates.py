@@ -0,0 +1,54 @@
+# benchmarks/bench_templates.py
+"""
+Tempo de concatenação capa/contracapa/última página por relatório:
+leitura e parse dos templates a cada relatório x páginas pré-carregadas.
+
+    python -m benchmarks.bench_templates [repeticoes]
+"""
+import io
+import os
+import sys
+import time
+
+from PyPDF2 import PdfReader, PdfWriter
+
+from benchmarks.dados_sinteticos import entradas_pdf
+from utils import geracao_pdf
+from utils.geracao_pdf import generate_pdf, paginas_template
+
+BASE_DIR = os.path.dirname(geracao_pdf.__file__)
+
+def _mesclar(corpo: bytes, paginas) -> bytes:
+    writer = PdfWriter()
+    for p in paginas("capa.pdf"): writer.add_page(p)
+    for p in paginas("contra_capa.pdf"): writer.add_page(p)
+    for p in PdfReader(io.BytesIO(corpo)).pages: writer.add_page(p)
+    for p in paginas("ultima_pagina.pdf"): writer.add_page(p)
+    out = io.BytesIO(); writer.write(out)
+    return out.getvalue()
+
+def _paginas_do_disco(nome):
+    return PdfReader(os.path.join(BASE_DIR, nome)).pages
+
+def _medir(fn, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        t0 = time.perf_counter(); fn(); tempos.append(time.perf_counter() - t0)
+    tempos.sort()
+    return tempos[len(tempos) // 2]
+
+def main(repeticoes: int = 20):
+    corpo = generate_pdf(**entradas_pdf(30))
+    paginas_template("capa.pdf"); paginas_template("contra_capa.pdf"); paginas_template("ultima_pagina.pdf")
+
+    antes = _mesclar(corpo, _paginas_do_disco)
+    depois = _mesclar(corpo, paginas_template)
+    assert antes == depois, "saída diferente com os templates pré-carregados"
+
+    t_disco = _medir(lambda: _mesclar(corpo, _paginas_do_disco), repeticoes)
+    t_cache = _medir(lambda: _mesclar(corpo, paginas_template), repeticoes)
+    print(f"mesclagem (mediana de {repeticoes}): disco {t_disco*1000:.1f} ms | "
+          f"pré-carregado {t_cache*1000:.1f} ms | economia {(t_disco - t_cache)*1000:.1f} ms/relatório")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
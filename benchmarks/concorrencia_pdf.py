@@ -0,0 +1,59 @@
+# benchmarks/concorrencia_pdf.py
+"""
+Gera vários relatórios em paralelo num pool de threads e confere que o
+cabeçalho de cada página do corpo traz o cliente/assessor do próprio relatório.
+A conferência roda também como teste (tests/test_concorrencia_pdf.py).
+
+    python -m benchmarks.concorrencia_pdf [relatorios] [threads]
+"""
+import io
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from PyPDF2 import PdfReader
+
+from benchmarks.dados_sinteticos import entradas_pdf
+from utils.geracao_pdf import generate_pdf, paginas_template
+
+_RE_CLIENTE = re.compile(r"CLIENTE CONCORRENTE (\d{3})")
+_RE_ASSESSOR = re.compile(r"ASSESSOR CONCORRENTE (\d{3})")
+
+def gerar_relatorio(i: int) -> bytes:
+    """Relatório `i`, com cliente e assessor numerados por `i`."""
+    entradas = entradas_pdf(20 + i % 7, semente=i)
+    entradas["cliente_nome"] = f"Cliente Concorrente {i:03d}"
+    entradas["nome_assessor"] = f"Assessor Concorrente {i:03d}"
+    return generate_pdf(**entradas)
+
+def cabecalhos_trocados(i: int, pdf_bytes: bytes) -> list:
+    """Páginas do corpo do relatório `i` cujo cabeçalho não traz o cliente/assessor `i`."""
+    paginas = PdfReader(io.BytesIO(pdf_bytes)).pages
+    inicio = len(paginas_template("capa.pdf")) + len(paginas_template("contra_capa.pdf"))
+    fim = len(paginas) - len(paginas_template("ultima_pagina.pdf"))
+    erros = []
+    for n in range(inicio, fim):
+        texto = paginas[n].extract_text() or ""
+        for rotulo, regex in (("cliente", _RE_CLIENTE), ("assessor", _RE_ASSESSOR)):
+            vistos = set(regex.findall(texto))
+            if vistos != {f"{i:03d}"}:
+                erros.append(f"relatório {i:03d}, página {n + 1}: {rotulo} {sorted(vistos)}")
+    return erros
+
+def main(relatorios: int = 24, threads: int = 8) -> int:
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        resultados = list(pool.map(gerar_relatorio, range(relatorios)))
+    duracao = time.perf_counter() - t0
+
+    erros = [e for i, pdf in enumerate(resultados) for e in cabecalhos_trocados(i, pdf)]
+    for e in erros:
+        print("ERRO:", e)
+    print(f"{relatorios} relatórios em {threads} threads: {duracao:.2f}s "
+          f"({relatorios / duracao:.1f} relatórios/s), {len(erros)} cabeçalho(s) trocado(s)")
+    return 1 if erros else 0
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    sys.exit(main(*args))
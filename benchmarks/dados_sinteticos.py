@@ -0,0 +1,58 @@
+# benchmarks/dados_sinteticos.py
+"""Carteiras sintéticas (formato da Etapa 5) para os benchmarks."""
+import numpy as np
+import pandas as pd
+
+CLASSES = [
+    "Pós Fixado", "Inflação", "Pré Fixado", "Multimercado", "Renda Variável Brasil",
+    "Alternativo", "Renda Variável Global", "Renda Fixa Global", "Fundos Listados",
+]
+LIQUIDEZ = ["D+0", "D+1", "D+5", "D+30", "D+90", "D+360", "No Vencimento", "D+0 (à mercado)"]
+EMISSORES = ["BANCO MASTER S/A", "BTG PACTUAL", "BANCO INTER", "DAYCOVAL", "BANCO PINE"]
+
+def ativos_sinteticos(n_ativos: int, semente: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(semente)
+    idx = np.arange(n_ativos)
+    saldo = np.round(rng.lognormal(11.0, 1.2, n_ativos), 2)
+    realocado = np.round(saldo * rng.uniform(-0.5, 0.5, n_ativos), 2)
+    realocado[rng.random(n_ativos) < 0.5] = 0.0
+    nomes = np.where(
+        idx % 3 == 0,
+        [f"CDB {EMISSORES[i % len(EMISSORES)]} - JAN/{2026 + i % 6}" for i in idx],
+        [f"Fundo Sintético {i} FIC FIM" for i in idx],
+    )
+    df = pd.DataFrame({
+        "estrategia": nomes,
+        "saldo_bruto": saldo,
+        "Valor Realocado": realocado,
+        "Novo Valor": saldo + realocado,
+        "Classificação": [CLASSES[i % len(CLASSES)] for i in idx],
+        "Liquidez": [LIQUIDEZ[i % len(LIQUIDEZ)] for i in idx],
+        "Vencimento": [f"{2026 + i % 6}-07-15" if LIQUIDEZ[i % len(LIQUIDEZ)] == "No Vencimento" else ""
+                       for i in idx],
+        "Banco": "XP",
+        "rentabilidade_mes_atual": np.round(rng.normal(0.9, 0.5, n_ativos), 2),
+        "porcentagem_cdi_mes_atual": np.round(rng.normal(100, 20, n_ativos), 2),
+        "rentabilidade_ano": np.round(rng.normal(10, 4, n_ativos), 2),
+        "porcentagem_cdi_ano": np.round(rng.normal(100, 20, n_ativos), 2),
+    })
+    df["valor_atual"] = df["saldo_bruto"]
+    return df
+
+def entradas_pdf(n_ativos: int, semente: int = 0) -> dict:
+    """Argumentos de generate_pdf para uma carteira sintética."""
+    ativos = ativos_sinteticos(n_ativos, semente)
+    dist = (ativos.groupby("Classificação", as_index=False)["valor_atual"].sum()
+                  .rename(columns={"valor_atual": "valor"}))
+    dist["Percentual"] = dist["valor"] / dist["valor"].sum() * 100
+    modelo = pd.DataFrame({"Classificação": ["Pós Fixado", "Inflação", "Renda Variável Brasil"],
+                           "Percentual Ideal": [50.0, 30.0, 20.0]})
+    return dict(
+        dist_df=dist,
+        modelo_df=modelo,
+        resumo_df=pd.DataFrame(),
+        sugestao={"carteira_modelo": "Moderada", "aporte_text": "R$ 10.000,00"},
+        ativos_df=ativos,
+        cliente_nome=f"Cliente Sintético {semente}",
+        nome_assessor="Assessor Sintético",
+    )
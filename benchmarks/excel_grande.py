@@ -0,0 +1,34 @@
+# benchmarks/excel_grande.py
+"""
+Tempo e pico de memória (tracemalloc, numa segunda execução: ele deixa tudo
+mais lento) da exportação Excel para uma carteira consolidada grande,
+gravada num arquivo temporário.
+
+    python -m benchmarks.excel_grande [linhas]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.dados_sinteticos import ativos_sinteticos
+from utils.exportacao_excel import escrever_excel_carteiras
+
+def main(linhas: int = 100_000):
+    ativos = ativos_sinteticos(linhas)
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "carteiras.xlsx")
+        t0 = time.perf_counter()
+        escrever_excel_carteiras(caminho, ativos)
+        decorrido = time.perf_counter() - t0
+        tracemalloc.start()
+        escrever_excel_carteiras(caminho, ativos)
+        pico = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        tamanho = os.path.getsize(caminho)
+    print(f"{linhas} linhas x 2 abas: {decorrido:.2f} s, pico {pico / 2**20:.1f} MB, "
+          f"arquivo {tamanho / 2**20:.1f} MB")
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:2]))
@@ -0,0 +1,79 @@
+# benchmarks/golden_pdf.py
+"""
+Regressão byte a byte do relatório: gera carteiras sintéticas numa data fixa
+e compara o sha256 de cada PDF com o guardado em golden_pdf.json. Cada caso
+é gerado duas vezes (caches frios e quentes) e as duas saídas têm de bater.
+
+    python -m pytest tests/test_golden_pdf.py   # confere (um teste por caso)
+    python -m benchmarks.golden_pdf             # confere e lista os hashes
+    python -m benchmarks.golden_pdf --atualizar # regrava os hashes
+
+Os hashes valem para as versões de reportlab/PyPDF2/pandas gravadas junto;
+com outras versões a diferença é avisada, mas não é necessariamente erro.
+"""
+import hashlib
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import PyPDF2
+import reportlab
+
+from benchmarks.dados_sinteticos import entradas_pdf
+from utils.cache_relatorio import CACHE_GRAFICOS, CACHE_SECOES
+from utils.geracao_pdf import generate_pdf
+
+ARQUIVO = Path(__file__).with_name("golden_pdf.json")
+DATA = datetime(2025, 1, 15)
+
+# nome -> (ativos, semente, opções de generate_pdf)
+CASOS = {
+    "pequena": (8, 1, {}),
+    "media": (120, 2, {}),
+    "grande": (1500, 3, {}),
+    "media_150dpi": (120, 2, {"dpi_imagens": 150}),
+    "media_sem_otimizacao": (120, 2, {"otimizar": False}),
+}
+
+def versoes() -> dict:
+    """Versões das bibliotecas que afetam os bytes do PDF."""
+    return {"reportlab": reportlab.Version, "PyPDF2": PyPDF2.__version__, "pandas": pd.__version__}
+
+def hash_caso(nome: str) -> str:
+    """sha256 do PDF do caso `nome`; falha se caches frios e quentes derem saídas diferentes."""
+    n_ativos, semente, opcoes = CASOS[nome]
+    entradas = entradas_pdf(n_ativos, semente)
+    CACHE_GRAFICOS.limpar(); CACHE_SECOES.limpar()
+    frio = generate_pdf(**entradas, agora=DATA, **opcoes)
+    quente = generate_pdf(**entradas, agora=DATA, **opcoes)
+    if frio != quente:
+        raise AssertionError(f"{nome}: saída muda entre caches frios e quentes")
+    return hashlib.sha256(frio).hexdigest()
+
+def carregar_golden() -> dict:
+    return json.loads(ARQUIVO.read_text(encoding="utf-8"))
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    hashes = {nome: hash_caso(nome) for nome in CASOS}
+
+    if "--atualizar" in argv:
+        ARQUIVO.write_text(json.dumps({"versoes": versoes(), "hashes": hashes}, indent=1) + "\n",
+                           encoding="utf-8")
+        print(f"{len(hashes)} hashes gravados em {ARQUIVO.name}")
+        return 0
+
+    golden = carregar_golden()
+    if golden["versoes"] != versoes():
+        print(f"aviso: hashes gerados com {golden['versoes']}, rodando com {versoes()}")
+    falhas = 0
+    for nome, h in hashes.items():
+        ok = golden["hashes"].get(nome) == h
+        falhas += not ok
+        print(f"{'ok   ' if ok else 'MUDOU'} {nome:22s} {h[:16]}")
+    return 1 if falhas else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,38 @@
+# benchmarks/memoria_saida_pdf.py
+"""
+Pico de memória (tracemalloc) de um relatório devolvido em bytes
+(generate_pdf) e gravado direto num arquivo temporário (escrever_pdf).
+
+    python -m benchmarks.memoria_saida_pdf [ativos]
+"""
+import os
+import sys
+import tempfile
+import tracemalloc
+
+from benchmarks.dados_sinteticos import entradas_pdf
+from utils.geracao_pdf import escrever_pdf, generate_pdf
+
+def _pico(funcao) -> tuple:
+    tracemalloc.start()
+    try:
+        resultado = funcao()
+        return resultado, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def main(n_ativos: int = 400):
+    entradas = entradas_pdf(n_ativos)
+    generate_pdf(**entradas)  # templates, fontes e caches fora da medição
+
+    pdf, pico_bytes = _pico(lambda: generate_pdf(**entradas))
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "relatorio.pdf")
+        escritos, pico_arquivo = _pico(lambda: escrever_pdf(caminho, **entradas))
+
+    print(f"{n_ativos} ativos, relatório de {len(pdf) / 1024:.0f} KB ({escritos / 1024:.0f} KB no arquivo)")
+    print(f"  generate_pdf -> bytes:    pico {pico_bytes / 1024:8.0f} KB")
+    print(f"  escrever_pdf -> arquivo:  pico {pico_arquivo / 1024:8.0f} KB")
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:2]))
@@ -0,0 +1,41 @@
+# benchmarks/memoria_sessao.py
+"""
+Memória da carteira guardada na sessão e custo de lê-la a cada rerun:
+lista de dicts (to_dict("records"), reconvertida com pd.DataFrame em toda
+etapa) contra a tabela tipada de utils.carteira_sessao.
+
+    python -m benchmarks.memoria_sessao [ativos ...]
+"""
+import sys
+import time
+
+import pandas as pd
+
+from benchmarks.dados_sinteticos import ativos_sinteticos
+from utils.carteira_sessao import carteira, memoria_kb, tabela_carteira
+
+def _kb_registros(registros: list) -> float:
+    """Lista + dicts + valores (chaves são compartilhadas entre os dicts)."""
+    total = sys.getsizeof(registros)
+    for r in registros:
+        total += sys.getsizeof(r) + sum(sys.getsizeof(v) for v in r.values())
+    return total / 1024
+
+def _ms(funcao, repeticoes: int = 20) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.perf_counter() - t0) / repeticoes * 1000
+
+def main(tamanhos=(30, 500, 5000)):
+    print(f"{'ativos':>7s} {'registros KB':>13s} {'tabela KB':>10s} {'leitura registros ms':>21s} {'leitura tabela ms':>18s}")
+    for n in tamanhos:
+        registros = ativos_sinteticos(n).drop(columns="valor_atual").to_dict("records")
+        sessao_antiga = {"ativos_df": registros}
+        sessao_nova = {"ativos_df": tabela_carteira(registros)}
+        print(f"{n:7d} {_kb_registros(registros):13.0f} {memoria_kb(sessao_nova['ativos_df']):10.0f} "
+              f"{_ms(lambda: pd.DataFrame(sessao_antiga['ativos_df'])):21.2f} "
+              f"{_ms(lambda: carteira(sessao_nova)):18.4f}")
+
+if __name__ == "__main__":
+    main(tuple(int(a) for a in sys.argv[1:]) or (30, 500, 5000))
@@ -0,0 +1,39 @@
+# benchmarks/numeros_br.py
+"""
+Formatação e leitura de números BR numa coluna grande: por elemento
+(.map com formatar_br / ler_br) contra formatar_serie_br / ler_serie_br.
+Confere que os dois caminhos dão o mesmo resultado nessa coluna; os casos
+de borda ficam em tests/test_numeros_br.py.
+
+    python -m benchmarks.numeros_br [linhas]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.numeros_br import formatar_br, formatar_serie_br, ler_br, ler_serie_br
+
+def _tempo(funcao):
+    t0 = time.perf_counter()
+    resultado = funcao()
+    return resultado, time.perf_counter() - t0
+
+def main(linhas: int = 1_000_000):
+    rng = np.random.default_rng(0)
+    valores = pd.Series(np.round(rng.lognormal(9, 3, linhas) * rng.choice([-1, 1], linhas), 3))
+
+    por_elemento, t_map = _tempo(lambda: valores.map(formatar_br))
+    vetorizado, t_vet = _tempo(lambda: formatar_serie_br(valores))
+    assert por_elemento.tolist() == vetorizado.tolist()
+    print(f"formatar {linhas} valores: .map {t_map:.2f} s, coluna {t_vet:.2f} s ({t_map / t_vet:.1f}x)")
+
+    textos = ("R$ " + vetorizado).astype("str")
+    lidos_map, t_map = _tempo(lambda: textos.map(ler_br))
+    lidos_vet, t_vet = _tempo(lambda: ler_serie_br(textos))
+    np.testing.assert_array_equal(lidos_map.to_numpy(dtype=float), lidos_vet.to_numpy())
+    print(f"ler {linhas} textos:     .map {t_map:.2f} s, coluna {t_vet:.2f} s ({t_map / t_vet:.1f}x)")
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:2]))
@@ -0,0 +1,91 @@
+# benchmarks/tempo_importacao.py
+"""
+Custo de importação de cada etapa da interface e tempo até a primeira tela
+de um processo novo.
+
+Cada medição roda num interpretador novo com `-X importtime`, depois de
+importar o streamlit (que todo worker já carrega): o tempo de uma etapa é o
+que os módulos dela acrescentam. "todas" é o que o app.py importava antes
+de abrir a primeira tela; "primeira tela" roda o app.py (Etapa 1) pelo
+AppTest, com importação por etapa e com todas as etapas importadas antes.
+
+    python -m benchmarks.tempo_importacao [repeticoes] [--pacotes N]
+"""
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+ETAPAS = {
+    "1 upload": "interfaces.upload_arquivos",
+    "2 detalhamento": "interfaces.detalhamento_ativos",
+    "3 comparação": "interfaces.comparacao_carteira",
+    "4 sugestões": "interfaces.sugestoes_alocacao",
+    "5 confirmação/PDF": "interfaces.confirmacao_pdf",
+}
+
+_LINHA = re.compile(r"^import time:\s+(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S+)$")
+
+_PRIMEIRA_TELA = """
+import time
+from streamlit.testing.v1 import AppTest
+t0 = time.perf_counter()
+{importar}
+AppTest.from_file({app!r}, default_timeout=120).run()
+print(time.perf_counter() - t0)
+"""
+
+def _rodar(args: list) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *args], cwd=RAIZ, capture_output=True, text=True, check=True)
+
+def _importtime(modulos: list) -> list:
+    """[(módulo, próprio_us, acumulado_us, nível)] do que `import modulos` acrescenta ao streamlit."""
+    codigo = "import streamlit\nimport sys\nprint('--', file=sys.stderr)\n" + \
+             "".join(f"import {m}\n" for m in modulos)
+    saida = _rodar(["-X", "importtime", "-c", codigo]).stderr
+    linhas = []
+    for linha in saida.split("--\n", 1)[1].splitlines():
+        m = _LINHA.match(linha)
+        if m:
+            linhas.append((m.group(4), int(m.group(1)), int(m.group(2)), len(m.group(3)) // 2))
+    return linhas
+
+def _total_ms(linhas: list) -> float:
+    # os módulos de nível 0 são os importados diretamente; o acumulado deles cobre o resto
+    return sum(acumulado for _, _, acumulado, nivel in linhas if nivel == 0) / 1000
+
+def _mediana(medir, repeticoes: int) -> float:
+    return statistics.median(medir() for _ in range(repeticoes))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("repeticoes", type=int, nargs="?", default=5)
+    parser.add_argument("--pacotes", type=int, default=8, help="pacotes mais pesados listados por etapa")
+    args = parser.parse_args(argv)
+
+    print(f"importação (ms, mediana de {args.repeticoes} processos, além do streamlit)")
+    for nome, modulo in [*ETAPAS.items(), ("todas", None)]:
+        modulos = [modulo] if modulo else list(ETAPAS.values())
+        ms = _mediana(lambda: _total_ms(_importtime(modulos)), args.repeticoes)
+        linhas = _importtime(modulos)
+        pacotes = {}
+        for mod, proprio, _, _ in linhas:
+            raiz = mod.split(".")[0]
+            pacotes[raiz] = pacotes.get(raiz, 0) + proprio
+        maiores = sorted(pacotes.items(), key=lambda p: -p[1])[:args.pacotes]
+        print(f"  {nome:20s} {ms:8.0f}   " + ", ".join(f"{p} {us / 1000:.0f}" for p, us in maiores))
+
+    app = str(RAIZ / "app.py")
+    ansioso = "".join(f"import {m}; " for m in ETAPAS.values())
+    print(f"\nprimeira tela, processo novo (s, mediana de {args.repeticoes})")
+    for nome, importar in (("por etapa", ""), ("todas antes", ansioso)):
+        codigo = _PRIMEIRA_TELA.format(importar=importar, app=app)
+        s = _mediana(lambda: float(_rodar(["-c", codigo]).stdout.split()[-1]), args.repeticoes)
+        print(f"  {nome:20s} {s:8.2f}")
+
+if __name__ == "__main__":
+    main()
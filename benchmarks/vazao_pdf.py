@@ -0,0 +1,46 @@
+# benchmarks/vazao_pdf.py
+"""
+Vazão da geração do relatório (relatórios/s) e tempo p50/p95 por tamanho de
+carteira. "frio" limpa os caches de gráficos/seções antes de cada relatório
+(cliente novo); "quente" repete as mesmas entradas (relatório já visto).
+
+    python -m benchmarks.vazao_pdf [repeticoes]
+"""
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+from benchmarks.dados_sinteticos import entradas_pdf
+from utils.cache_relatorio import CACHE_GRAFICOS, CACHE_SECOES
+from utils.geracao_pdf import generate_pdf
+
+DATA = datetime(2025, 1, 15)
+
+# nome -> (ativos, fração das repetições)
+TAMANHOS = {"pequena": (10, 1.0), "media": (300, 0.5), "muito grande": (5000, 0.1)}
+
+def _medir(entradas: dict, repeticoes: int, frio: bool) -> np.ndarray:
+    tempos = []
+    for _ in range(repeticoes):
+        if frio:
+            CACHE_GRAFICOS.limpar(); CACHE_SECOES.limpar()
+        t0 = time.perf_counter()
+        generate_pdf(**entradas, agora=DATA)
+        tempos.append(time.perf_counter() - t0)
+    return np.array(tempos)
+
+def main(repeticoes: int = 20):
+    generate_pdf(**entradas_pdf(10), agora=DATA)  # carrega templates e fontes
+    print(f"{'carteira':14s} {'ativos':>6s} {'modo':6s} {'n':>3s} {'rel/s':>7s} {'p50 ms':>8s} {'p95 ms':>8s}")
+    for nome, (n_ativos, fracao) in TAMANHOS.items():
+        entradas = entradas_pdf(n_ativos)
+        n = max(3, round(repeticoes * fracao))
+        for modo in ("frio", "quente"):
+            t = _medir(entradas, n, modo == "frio")
+            print(f"{nome:14s} {n_ativos:6d} {modo:6s} {n:3d} {n / t.sum():7.2f} "
+                  f"{np.percentile(t, 50) * 1000:8.0f} {np.percentile(t, 95) * 1000:8.0f}")
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:2]))
@@ -0,0 +1,153 @@
+"""
+Geração em lote dos relatórios, sem a interface.
+
+    python gerar_lote.py manifesto.json --saida relatorios/ [--processos 4] [--dpi-imagens 150] [--perfil] [--data 2025-01-31]
+
+O manifesto é uma lista JSON com um item por cliente (caminhos relativos
+ao próprio manifesto):
+
+    [
+      {
+        "cliente": "Maria Silva",
+        "assessor": "João Souza",
+        "pdfs": ["extratos/maria_xp.pdf"],
+        "modelo": "Moderada",                     # ou {"Pós Fixado": 60, "Inflação": 40}
+        "aporte": "50.000,00",                    # opcional
+        "realocacoes": {"CDB BANCO X - JAN/2027": -10000.0},  # opcional
+        "classificacoes": {"FUNDO Y FIC FIM": "Multimercado"}  # opcional
+      }
+    ]
+
+Para cada cliente: leitura dos extratos -> classificação -> rebalanceamento
+-> PDF e Excel em --saida, num pool de processos. Ao final imprime o tempo
+de cada etapa por cliente e a vazão (clientes/hora). Com --perfil, grava
+também <nome>.perfil.json com as etapas internas da geração do PDF. Com
+--data, os relatórios saem com essa data (no cabeçalho e nos prazos de
+liquidez): o mesmo manifesto gera os mesmos PDFs byte a byte, em qualquer dia.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import unicodedata
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from utils.carteiras_modelo import get_modelo_carteira
+from utils.exportacao_excel import escrever_excel_carteiras
+from utils.geracao_pdf import escrever_pdf
+from utils.numeros_br import formatar_br, ler_br
+from utils.perfil_geracao import PerfilGeracao
+from utils.pipeline_carteira import ler_extratos, classificar_ativos, rebalancear, entradas_relatorio
+
+ETAPAS = ["leitura", "classificacao", "rebalanceamento", "pdf", "excel"]
+
+def _nome_arquivo(indice: int, cliente: str) -> str:
+    base = unicodedata.normalize("NFKD", cliente).encode("ascii", "ignore").decode()
+    base = re.sub(r"[^A-Za-z0-9]+", "_", base).strip("_").lower() or "cliente"
+    return f"{indice:03d}_{base}"
+
+def processar_cliente(indice: int, item: dict, pasta_manifesto: str, saida: str,
+                      dpi_imagens: int = None, medir: bool = False, agora: datetime = None) -> dict:
+    """Roda o fluxo de um cliente e grava <nome>.pdf e <nome>.xlsx em `saida`."""
+
+    tempos = {}
+    def etapa(nome, inicio):
+        tempos[nome] = time.perf_counter() - inicio
+        return time.perf_counter()
+
+    cliente = item["cliente"]
+    t = time.perf_counter()
+    ativos = ler_extratos([Path(pasta_manifesto) / p for p in item["pdfs"]])
+    if ativos.empty:
+        raise ValueError("nenhum ativo encontrado nos extratos")
+    t = etapa("leitura", t)
+
+    # a data do relatório vale também para a liquidez estimada pelo vencimento no nome
+    ativos = classificar_ativos(ativos, classificacoes=item.get("classificacoes"),
+                                hoje=agora.date() if agora else None)
+    t = etapa("classificacao", t)
+
+    nome_modelo = item["modelo"]
+    if isinstance(nome_modelo, dict):
+        modelo, nome_modelo = nome_modelo, "Personalizada"
+    else:
+        modelo = get_modelo_carteira(nome_modelo)
+    if not modelo or abs(sum(modelo.values()) - 100.0) > 0.01:
+        raise ValueError(f"modelo inválido: {item['modelo']!r} (deve somar 100%)")
+    aporte = ler_br(item.get("aporte") or 0.0, padrao=None, ponto_milhar=True)
+    if aporte is None:
+        raise ValueError(f"aporte inválido: {item['aporte']!r}")
+    proposta = rebalancear(ativos, modelo, aporte, item.get("realocacoes"))
+    t = etapa("rebalanceamento", t)
+
+    sugestao = {"carteira_modelo": nome_modelo, "aporte_valor": aporte,
+                "aporte_text": f"R$ {formatar_br(aporte)}" if aporte else ""}
+    if nome_modelo == "Personalizada":
+        sugestao["modelo_personalizado"] = modelo
+    entradas = entradas_relatorio(proposta, modelo, sugestao,
+                                  cliente_nome=cliente, nome_assessor=item.get("assessor", ""))
+    nome = _nome_arquivo(indice, cliente)
+    perfil = PerfilGeracao() if medir else None
+    escrever_pdf(Path(saida) / f"{nome}.pdf", **entradas, dpi_imagens=dpi_imagens,
+                 perfil=perfil, agora=agora)
+    t = etapa("pdf", t)
+    if perfil is not None:
+        (Path(saida) / f"{nome}.perfil.json").write_text(
+            json.dumps(perfil.registro(), ensure_ascii=False, indent=1), encoding="utf-8")
+
+    escrever_excel_carteiras(Path(saida) / f"{nome}.xlsx", entradas["ativos_df"])
+    etapa("excel", t)
+    return {"cliente": cliente, "arquivo": nome, "ativos": len(proposta), "tempos": tempos}
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Gera os relatórios de uma lista de clientes.")
+    parser.add_argument("manifesto", type=Path, help="lista JSON de clientes")
+    parser.add_argument("--saida", type=Path, default=Path("relatorios"), help="pasta dos PDFs e Excels")
+    parser.add_argument("--processos", type=int, default=os.cpu_count(), help="processos em paralelo")
+    parser.add_argument("--dpi-imagens", type=int, default=None,
+                        help="reamostra as imagens das páginas fixas (PDFs menores)")
+    parser.add_argument("--perfil", action="store_true",
+                        help="grava o tempo de cada etapa interna do PDF em <nome>.perfil.json")
+    parser.add_argument("--data", type=datetime.fromisoformat, default=None,
+                        help="data dos relatórios (AAAA-MM-DD); padrão: hoje")
+    args = parser.parse_args(argv)
+
+    itens = json.loads(args.manifesto.read_text(encoding="utf-8"))
+    args.saida.mkdir(parents=True, exist_ok=True)
+    pasta = str(args.manifesto.resolve().parent)
+
+    inicio = time.perf_counter()
+    resultados, falhas = [], []
+    with ProcessPoolExecutor(max_workers=args.processos) as pool:
+        futuros = {pool.submit(processar_cliente, i, item, pasta, str(args.saida),
+                               args.dpi_imagens, args.perfil, args.data): item
+                   for i, item in enumerate(itens, start=1)}
+        for futuro in as_completed(futuros):
+            cliente = futuros[futuro].get("cliente", "?")
+            try:
+                r = futuro.result()
+            except Exception as e:
+                falhas.append(cliente)
+                print(f"ERRO  {cliente}: {e}", file=sys.stderr)
+                continue
+            resultados.append(r)
+            etapas = "  ".join(f"{n} {r['tempos'][n]:.2f}s" for n in ETAPAS)
+            print(f"ok    {r['cliente']} ({r['ativos']} ativos) -> {r['arquivo']}.pdf  {etapas}")
+    decorrido = time.perf_counter() - inicio
+
+    print(f"\n{len(resultados)} relatórios em {decorrido:.1f}s "
+          f"({len(resultados) / decorrido * 3600:.0f} clientes/hora, {args.processos} processos)")
+    if resultados:
+        medias = "  ".join(f"{n} {sum(r['tempos'][n] for r in resultados) / len(resultados):.2f}s"
+                           for n in ETAPAS)
+        print(f"média por cliente: {medias}")
+    if falhas:
+        print(f"{len(falhas)} falharam: {', '.join(falhas)}", file=sys.stderr)
+    return 1 if falhas else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
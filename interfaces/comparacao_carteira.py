@@ -1,15 +1,26 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from utils.carteiras_modelo import get_modelo_carteira
+from utils.carteiras_modelo import get_modelo_carteira, MODELOS_CARTEIRA
+from utils.aderencia_modelos import avaliar_modelos
+from utils.rentabilidade import rentabilidade_ponderada
 from utils.cores import PALETTE
+from utils.numeros_br import formatar_br, formatar_serie_br, ler_br
+from utils.carteira_sessao import carteira, distribuicao_carteira
+
+
+def _tabela_rentabilidade(rentab):
+    if rentab.empty or rentab.isna().all().all():
+        return
+    st.subheader("Rentabilidade Ponderada (histórico)")
+    disp = rentab.apply(lambda col: formatar_serie_br(col, nulo="-"))
+    st.table(disp.reset_index())
 
 
 def show():
     st.header("3. Comparação com Carteira Modelo")
 
-    ativos_raw = st.session_state.get("ativos_df", [])
-    ativos_df = pd.DataFrame(ativos_raw)
+    ativos_df = carteira(st.session_state)
 
     if ativos_df.empty or "Classificação" not in ativos_df.columns:
         st.error("Não há dados suficientes. Volte e preencha a etapa anterior.")
@@ -20,14 +31,9 @@ def show():
         ["Conservadora", "Moderada", "Sofisticada", "Personalizada"]
     )
 
-    # Distribuição atual da carteira
-    dist_atual = (
-        ativos_df.groupby("Classificação")["saldo_bruto"]
-        .sum()
-        .reset_index()
-    )
-    total = dist_atual["saldo_bruto"].sum()
-    dist_atual["Percentual"] = dist_atual["saldo_bruto"] / total * 100
+    # Distribuição atual da carteira (+ rentabilidade ponderada)
+    dist_atual = distribuicao_carteira(st.session_state)
+    rentab = rentabilidade_ponderada(ativos_df, "saldo_bruto")
 
     # Ordena do maior para o menor e gera colormap
     dist_sorted = dist_atual.sort_values("Percentual", ascending=False).reset_index(drop=True)
@@ -42,72 +48,162 @@ def show():
             "Percentual": list(modelo.values())
         })
         soma_percentual = modelo_df["Percentual"].sum()
+        _graficos(dist_sorted, modelo_df, color_map, carteira_tipo, soma_percentual)
     else:
-        st.markdown("### Defina a Carteira Personalizada")
-        # Inicializa estado raw_modelo_personalizado
-        if "raw_modelo_personalizado" not in st.session_state:
-            base = dist_atual[["Classificação", "Percentual"]].copy()
-            base.rename(columns={"Percentual": "Percentual Desejado"}, inplace=True)
-            st.session_state.raw_modelo_personalizado = base
-        raw = st.session_state.raw_modelo_personalizado.copy()
-
-        # Editor de modelo personalizado com alinhamento
-        st.markdown(
-            """
-            <style>
-            div[data-testid="stDataEditor"] .ag-cell,
-            div[data-testid="stDataEditor"] .ag-header-cell {
-                text-align: left !important;
-            }
-            </style>
-            """, unsafe_allow_html=True
-        )
-        df_display = raw.copy()
-        df_display["Percentual Desejado"] = df_display["Percentual Desejado"].map(
-            lambda v: f"{v:.2f}".replace('.', ',')
-        )
-        edited = st.data_editor(
-            df_display,
-            num_rows="dynamic",
-            key="custom_modelo_editor",
-            column_config={
-                "Classificação": st.column_config.TextColumn(label="Classificação"),
-                "Percentual Desejado": st.column_config.TextColumn(label="%")
-            },
-            use_container_width=True
-        )
-        updated_raw = raw.copy()
-        changed = False
-        for idx in edited.index:
-            if idx < len(raw):
-                new_class = edited.at[idx, 'Classificação']
-                if new_class != raw.at[idx, 'Classificação']:
-                    updated_raw.at[idx, 'Classificação'] = new_class
-                    changed = True
-                val = edited.at[idx, 'Percentual Desejado']
-                original = f"{raw.at[idx, 'Percentual Desejado']:.2f}".replace('.', ',')
-                if val != original:
-                    try:
-                        updated_raw.at[idx, 'Percentual Desejado'] = float(val.replace(',', '.'))
-                        changed = True
-                    except:
-                        pass
+        _carteira_personalizada(dist_atual, dist_sorted, color_map)
+        modelo_df = st.session_state.modelo_personalizado_df
+        soma_percentual = modelo_df["Percentual"].sum()
+
+    _tabela_rentabilidade(rentab)
+
+    # Comparação simultânea com todos os modelos (registrados + salvos)
+    if st.toggle("Comparar com todos os modelos"):
+        _comparar_modelos(dist_atual)
+
+    if st.button("Avançar para Sugestão de Ajustes"):
+        if carteira_tipo == "Personalizada" and round(soma_percentual, 2) != 100.00:
+            st.warning("Ajuste a carteira sugerida para que totalize 100%.")
+        else:
+            # guarda o tipo de carteira escolhido
+            st.session_state.carteira_modelo = carteira_tipo
+            if carteira_tipo == "Personalizada":
+                st.session_state.modelo_personalizado_dict = dict(
+                    zip(modelo_df["Classificação"], modelo_df["Percentual"])
+                )
+    
+            # merge seguro da sugestão (preserva o que já existia)
+            sug = dict(st.session_state.get("sugestao", {}))
+            sug["carteira_modelo"] = carteira_tipo
+            if carteira_tipo == "Personalizada":
+                sug["modelo_personalizado"] = st.session_state.get("modelo_personalizado_dict")
             else:
-                classe = edited.at[idx, 'Classificação']
-                pct_str = edited.at[idx, 'Percentual Desejado']
-                if classe and isinstance(pct_str, str):
-                    try:
-                        pct = float(pct_str.replace(',', '.'))
-                        updated_raw.loc[len(updated_raw)] = {'Classificação': classe, 'Percentual Desejado': pct}
-                        changed = True
-                    except:
-                        pass
-        st.session_state.raw_modelo_personalizado = updated_raw.reset_index(drop=True)
-        if changed:
+                # evita sobrar personalizado antigo ao trocar de modelo
+                sug.pop("modelo_personalizado", None)
+    
+            # ---- Propagação robusta do aporte ----
+            aporte_txt = st.session_state.get("aporte_text")
+            aporte_val = st.session_state.get("aporte_valor")
+    
+            # se vier apenas texto, calcula numérico
+            if aporte_val is None and aporte_txt:
+                aporte_val = ler_br(aporte_txt, padrao=None)
+    
+            # só grava se for válido (>= 0)
+            if aporte_val is not None and aporte_val >= 0:
+                sug["aporte_valor"] = float(aporte_val)
+                # se não há texto, gera a partir do numérico
+                if not aporte_txt:
+                    aporte_txt = formatar_br(aporte_val)
+    
+            if aporte_txt:
+                sug["aporte_text"] = aporte_txt
+            # ---------------------------------------
+    
+            st.session_state.sugestao = sug
+            st.session_state.etapa = 4
             st.rerun()
-        soma_percentual = updated_raw["Percentual Desejado"].sum()
-        modelo_df = updated_raw.rename(columns={"Percentual Desejado": "Percentual"})[["Classificação", "Percentual"]]
 
+
+@st.fragment
+def _carteira_personalizada(dist_atual, dist_sorted, color_map):
+    """
+    Editor da carteira Personalizada + gráficos. Edições reexecutam só este
+    fragment; o modelo resultante fica em `modelo_personalizado_df`.
+    """
+    st.markdown("### Defina a Carteira Personalizada")
+    # Inicializa estado raw_modelo_personalizado
+    if "raw_modelo_personalizado" not in st.session_state:
+        base = dist_atual[["Classificação", "Percentual"]].copy()
+        base.rename(columns={"Percentual": "Percentual Desejado"}, inplace=True)
+        st.session_state.raw_modelo_personalizado = base
+    raw = st.session_state.raw_modelo_personalizado.copy()
+
+    # Editor de modelo personalizado com alinhamento
+    st.markdown(
+        """
+        <style>
+        div[data-testid="stDataEditor"] .ag-cell,
+        div[data-testid="stDataEditor"] .ag-header-cell {
+            text-align: left !important;
+        }
+        </style>
+        """, unsafe_allow_html=True
+    )
+    df_display = raw.copy()
+    df_display["Percentual Desejado"] = formatar_serie_br(df_display["Percentual Desejado"])
+    edited = st.data_editor(
+        df_display,
+        num_rows="dynamic",
+        key="custom_modelo_editor",
+        column_config={
+            "Classificação": st.column_config.TextColumn(label="Classificação"),
+            "Percentual Desejado": st.column_config.TextColumn(label="%")
+        },
+        use_container_width=True
+    )
+    updated_raw = raw.copy()
+    changed = False
+    for idx in edited.index:
+        if idx < len(raw):
+            new_class = edited.at[idx, 'Classificação']
+            if new_class != raw.at[idx, 'Classificação']:
+                updated_raw.at[idx, 'Classificação'] = new_class
+                changed = True
+            val = edited.at[idx, 'Percentual Desejado']
+            original = formatar_br(raw.at[idx, 'Percentual Desejado'])
+            if val != original:
+                pct = ler_br(val, None)
+                if pct is not None:
+                    updated_raw.at[idx, 'Percentual Desejado'] = pct
+                    changed = True
+        else:
+            classe = edited.at[idx, 'Classificação']
+            pct_str = edited.at[idx, 'Percentual Desejado']
+            if classe and isinstance(pct_str, str):
+                pct = ler_br(pct_str, None)
+                if pct is not None:
+                    updated_raw.loc[len(updated_raw)] = {'Classificação': classe, 'Percentual Desejado': pct}
+                    changed = True
+    st.session_state.raw_modelo_personalizado = updated_raw.reset_index(drop=True)
+    if changed:
+        st.rerun(scope="fragment")
+    soma_percentual = updated_raw["Percentual Desejado"].sum()
+    modelo_df = updated_raw.rename(columns={"Percentual Desejado": "Percentual"})[["Classificação", "Percentual"]]
+    st.session_state.modelo_personalizado_df = modelo_df
+
+    _graficos(dist_sorted, modelo_df, color_map, "Personalizada", soma_percentual)
+
+    # Salva o modelo para a comparação com todos os modelos
+    c1, c2 = st.columns([3, 1], vertical_alignment="bottom")
+    nome_modelo = c1.text_input("Nome do modelo personalizado", key="nome_modelo_salvo")
+    pode_salvar = bool(nome_modelo.strip()) and round(soma_percentual, 2) == 100.00
+    if c2.button("Salvar modelo", disabled=not pode_salvar):
+        salvos = st.session_state.setdefault("modelos_salvos", {})
+        salvos[nome_modelo.strip()] = dict(zip(modelo_df["Classificação"], modelo_df["Percentual"]))
+        st.rerun()
+
+
+def _comparar_modelos(dist_atual):
+    modelos = dict(MODELOS_CARTEIRA)
+    for nome, modelo in st.session_state.get("modelos_salvos", {}).items():
+        modelos[f"Personalizada: {nome}"] = modelo
+
+    ranking = avaliar_modelos(
+        dist_atual.set_index("Classificação")["saldo_bruto"],
+        modelos,
+        aporte=st.session_state.get("aporte_valor") or 0.0,
+    )
+    st.success(f"Perfil mais aderente à carteira atual: **{ranking.loc[0, 'Modelo']}**")
+
+    disp = ranking.copy()
+    for col in ["Desvio L1 (p.p.)", "Desvio Quadrático (p.p.)", "Giro (% PL)", "Absorção do Aporte (%)"]:
+        disp[col] = formatar_serie_br(disp[col])
+    disp["Giro Necessário (R$)"] = formatar_serie_br(disp["Giro Necessário (R$)"])
+    disp.index = disp.index + 1
+    st.table(disp)
+
+
+def _graficos(dist_sorted, modelo_df, color_map, carteira_tipo, soma_percentual):
     # Exibir gráficos
     col1, col2 = st.columns(2)
     with col1:
@@ -150,67 +246,3 @@ def show():
                 direction='clockwise'
             )
             st.plotly_chart(fig_modelo, use_container_width=True)
-    
-    if st.button("Avançar para Sugestão de Ajustes"):
-        if carteira_tipo == "Personalizada" and round(soma_percentual, 2) != 100.00:
-            st.warning("Ajuste a carteira sugerida para que totalize 100%.")
-        else:
-            # guarda o tipo de carteira escolhido
-            st.session_state.carteira_modelo = carteira_tipo
-            if carteira_tipo == "Personalizada":
-                st.session_state.modelo_personalizado_dict = dict(
-                    zip(modelo_df["Classificação"], modelo_df["Percentual"])
-                )
-    
-            # merge seguro da sugestão (preserva o que já existia)
-            sug = dict(st.session_state.get("sugestao", {}))
-            sug["carteira_modelo"] = carteira_tipo
-            if carteira_tipo == "Personalizada":
-                sug["modelo_personalizado"] = st.session_state.get("modelo_personalizado_dict")
-            else:
-                # evita sobrar personalizado antigo ao trocar de modelo
-                sug.pop("modelo_personalizado", None)
-    
-            # ---- Propagação robusta do aporte ----
-            aporte_txt = st.session_state.get("aporte_text")
-            aporte_val = st.session_state.get("aporte_valor")
-    
-            def _parse_br_money(x):
-                if x is None:
-                    return None
-                if isinstance(x, (int, float)):
-                    return float(x)
-                s = str(x).strip().replace("R$", "").replace(" ", "")
-                if "," in s and "." in s:
-                    s = s.replace(".", "").replace(",", ".")
-                elif "," in s:
-                    s = s.replace(",", ".")
-                try:
-                    return float(s)
-                except:
-                    return None
-    
-            def _fmt_br(v):
-                s = f"{v:,.2f}"
-                return s.replace(",", "X").replace(".", ",").replace("X", ".")
-    
-            # se vier apenas texto, calcula numérico
-            if aporte_val is None and aporte_txt:
-                aporte_val = _parse_br_money(aporte_txt)
-    
-            # só grava se for válido (>= 0)
-            if aporte_val is not None and aporte_val >= 0:
-                sug["aporte_valor"] = float(aporte_val)
-                # se não há texto, gera a partir do numérico
-                if not aporte_txt:
-                    aporte_txt = _fmt_br(aporte_val)
-    
-            if aporte_txt:
-                sug["aporte_text"] = aporte_txt
-            # ---------------------------------------
-    
-            st.session_state.sugestao = sug
-            st.session_state.etapa = 4
-            st.rerun()
-
-
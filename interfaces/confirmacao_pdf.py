@@ -1,20 +1,124 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import re
-import io  # alteração realizada aqui: manipular buffer de Excel
-from datetime import date
+import plotly.graph_objects as go
+import json
+import time
+import hashlib
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
 from utils.carteiras_modelo import get_modelo_carteira
 from utils.cores import PALETTE
-from utils.geracao_pdf import generate_pdf  # mantém mesmo nome
+from utils.exportacao_excel import escrever_excel_carteiras
+from utils.geracao_pdf import escrever_pdf
+from utils.pipeline_carteira import entradas_relatorio
+from utils.perfil_geracao import PerfilGeracao
+from utils.cache_relatorio import CACHE_GRAFICOS, CACHE_SECOES
+from utils.artefatos import ARTEFATOS, preparar, artefato_pronto, conteudo
+from utils.numeros_br import formatar_br, formatar_serie_br
+from utils.liquidez import FAIXAS_LIQUIDEZ, valor_por_faixa, prazos_liquidez, escada_liquidez
+from utils.simulacao import simular_carteiras, resumo_simulacao
+from utils.carteira_sessao import carteira, versao_carteira, distribuicao_carteira
 
-def format_number_br(valor):
-    try:
-        v = float(valor)
-    except Exception:
-        return str(valor)
-    s = f"{v:,.2f}"
-    return s.replace(",", "X").replace(".", ",").replace("X", ".")
+# entradas pequenas (total por classe); poucas entradas, com validade
+@st.cache_data(show_spinner=False, max_entries=64, ttl=3600)
+def _simular(valores_atual: dict, valores_proposta: dict):
+    return simular_carteiras({"Atual": valores_atual, "Proposta": valores_proposta})
+
+@st.cache_resource
+def _pool_relatorios():
+    # cada geração tem seu próprio ContextoRelatorio: relatórios podem rodar em paralelo
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="relatorio_pdf")
+
+def _chave_pdf(**campos) -> str:
+    """
+    Chave do PDF: versão da carteira da sessão (todas as tabelas do relatório
+    saem dela) mais os demais campos, que são pequenos. A tabela não é lida.
+    """
+    texto = json.dumps({"carteira": versao_carteira(st.session_state), **campos}, sort_keys=True, default=str)
+    return "pdf:" + hashlib.sha256(texto.encode()).hexdigest()
+
+def _gerar_pdf(chave: str, escrever):
+    # grava direto no disco, no repositório de artefatos compartilhado
+    inicio = time.monotonic()
+    if not preparar(chave, escrever, ".pdf"):
+        raise RuntimeError("o PDF passou do limite do repositório de arquivos gerados")
+    return time.monotonic() - inicio
+
+def _painel_perfil(registro: dict):
+    """Etapas da última geração medida (tempo e memória) e uso dos caches do relatório."""
+    with st.expander("Perfil da última geração do PDF"):
+        medido = sum(e["segundos"] for e in registro["etapas"])
+        st.caption(
+            f"Total {registro['total_s']:.2f}s (não atribuído {registro['total_s'] - medido:.2f}s)"
+            + (f" · pico de memória {registro['pico_kb'] / 1024:.1f} MB" if registro["pico_kb"] is not None else "")
+        )
+        etapas = pd.DataFrame(registro["etapas"]).sort_values("segundos", ascending=False)
+        st.dataframe(etapas, hide_index=True, use_container_width=True)
+        caches = pd.DataFrame({"Gráficos": CACHE_GRAFICOS.estatisticas(), "Seções": CACHE_SECOES.estatisticas(),
+                               "Arquivos gerados": ARTEFATOS.estatisticas()}).T
+        st.dataframe(caches, use_container_width=True)
+
+@st.fragment(run_every="1s")
+def _andamento_pdf():
+    """
+    Progresso da geração pendente. Só é desenhado enquanto há um PDF sendo
+    gerado, então só nesse intervalo a página consulta o pool a cada segundo.
+    """
+    pendente = st.session_state.get("pdf_pendente")
+    if pendente is None or pendente["futuro"].done():
+        st.rerun()
+    decorrido = time.monotonic() - pendente["inicio"]
+    estimado = st.session_state.get("pdf_duracao", 3.0)
+    st.progress(min(decorrido / estimado, 0.95), text=f"Gerando PDF… {decorrido:.0f}s")
+
+@st.fragment
+def _painel_pdf(chave: str, entradas: dict):
+    """
+    Geração do PDF sob demanda num pool compartilhado; digitar nos campos só
+    muda a chave, nunca dispara a geração. O PDF fica no repositório de
+    artefatos (utils.artefatos), compartilhado entre sessões: a sessão guarda
+    só a chave.
+    """
+    pendente = st.session_state.get("pdf_pendente")
+
+    if pendente is not None and pendente["futuro"].done():
+        del st.session_state["pdf_pendente"]
+        try:
+            st.session_state.pdf_duracao = pendente["futuro"].result()
+            if pendente["perfil"] is not None:
+                st.session_state.pdf_perfil = pendente["perfil"].registro()
+        except Exception as e:
+            st.error(f"Falha ao gerar o PDF: {e}")
+        pendente = None
+
+    if "pdf_perfil" in st.session_state:
+        _painel_perfil(st.session_state.pdf_perfil)
+
+    pronto = artefato_pronto(chave)
+    if pronto is not None:
+        # função em vez dos bytes: o arquivo só é lido no clique, não a cada rerun
+        st.download_button(
+            f"Baixar PDF ({pronto.tamanho / 1024:.0f} KB)",
+            functools.partial(conteudo, chave, functools.partial(escrever_pdf, **entradas), ".pdf"),
+            "relatorio_carteira.pdf",
+            "application/pdf"
+        )
+        return
+
+    medir = st.checkbox("Medir etapas da geração (tempo e memória; mais lento)", key="pdf_medir")
+    if pendente is None and st.button("Gerar PDF"):
+        perfil = PerfilGeracao(memoria=True) if medir else None
+        pendente = st.session_state.pdf_pendente = {
+            "chave": chave,
+            "inicio": time.monotonic(),
+            "perfil": perfil,
+            "futuro": _pool_relatorios().submit(
+                _gerar_pdf, chave, functools.partial(escrever_pdf, **entradas, perfil=perfil)),
+        }
+    if pendente is not None:
+        _andamento_pdf()
 
 def show():
     st.header("5. Confirmação e Geração de PDF")
@@ -36,7 +140,7 @@ def show():
     nome_assessor = st.text_input("Nome do Assessor")
 
     # dados das etapas anteriores
-    ativos_df       = pd.DataFrame(st.session_state.get("ativos_df", []))
+    ativos_df       = carteira(st.session_state).copy()
     carteira_modelo = st.session_state.get("carteira_modelo", "")
     sugestao        = st.session_state.get("sugestao", {})
 
@@ -51,24 +155,11 @@ def show():
 
     # === DISTRIBUIÇÃO ATUAL ===
     ativos_df["valor_atual"] = pd.to_numeric(ativos_df["saldo_bruto"], errors="coerce").fillna(0.0)  # alteração realizada aqui
-    dist_atual = (
-        ativos_df.groupby("Classificação")["valor_atual"]
-                 .sum()
-                 .reset_index()
-    )
-    total_atual = float(dist_atual["valor_atual"].sum())
-    dist_atual["Percentual"] = dist_atual["valor_atual"] / total_atual * 100 if total_atual else 0.0  # alteração realizada aqui
+    dist_atual = distribuicao_carteira(st.session_state).rename(columns={"saldo_bruto": "valor_atual"})
 
     # === DISTRIBUIÇÃO SUGERIDA ===
     ativos_df["Novo Valor"] = pd.to_numeric(ativos_df["Novo Valor"], errors="coerce").fillna(0.0)  # alteração realizada aqui
-    dist_sug = (
-        ativos_df.groupby("Classificação")["Novo Valor"]
-                 .sum()
-                 .reset_index()
-                 .rename(columns={"Novo Valor": "valor_sugerido"})
-    )
-    total_sug = float(dist_sug["valor_sugerido"].sum())
-    dist_sug["Percentual"] = dist_sug["valor_sugerido"] / total_sug * 100 if total_sug else 0.0  # alteração realizada aqui
+    dist_sug = distribuicao_carteira(st.session_state, "Novo Valor").rename(columns={"Novo Valor": "valor_sugerido"})
 
     # === MAPA DE CORES PELA ORDEM ATUAL ===
     sorted_classes = dist_atual.sort_values("Percentual", ascending=False)["Classificação"].tolist()
@@ -111,20 +202,20 @@ def show():
     with t1:
         st.subheader("Atual")
         d1 = dist_atual.sort_values("valor_atual", ascending=False).reset_index(drop=True)
-        d1["Valor (R$)"]     = d1["valor_atual"].apply(format_number_br)
-        d1["Percentual (%)"] = d1["Percentual"].apply(lambda x: format_number_br(x) + "%")
+        d1["Valor (R$)"]     = formatar_serie_br(d1["valor_atual"])
+        d1["Percentual (%)"] = formatar_serie_br(d1["Percentual"], sufixo="%")
         st.table(d1[["Classificação", "Valor (R$)", "Percentual (%)"]])
     with t2:
         st.subheader("Carteira Sugerida")
         d2 = dist_sug.sort_values("valor_sugerido", ascending=False).reset_index(drop=True)
-        d2["Valor Ideal (R$)"]     = d2["valor_sugerido"].apply(format_number_br)
-        d2["Percentual Ideal (%)"] = d2["Percentual"].apply(lambda x: format_number_br(x) + "%")
+        d2["Valor Ideal (R$)"]     = formatar_serie_br(d2["valor_sugerido"])
+        d2["Percentual Ideal (%)"] = formatar_serie_br(d2["Percentual"], sufixo="%")
         st.table(d2[["Classificação", "Valor Ideal (R$)", "Percentual Ideal (%)"]])
 
     # === DIFERENÇAS ENTRE ATUAL E SUGERIDA ===
     st.subheader("Diferenças entre Atual e Sugerida")
     resumo = []
-    all_classes = set(dist_atual["Classificação"]).union(dist_sug["Classificação"])
+    all_classes = dict.fromkeys([*dist_atual["Classificação"], *dist_sug["Classificação"]])
     for cls in all_classes:
         pa = float(dist_atual.loc[dist_atual["Classificação"] == cls, "Percentual"].sum())
         ps = float(dist_sug.loc[dist_sug["Classificação"] == cls, "Percentual"].sum())
@@ -139,7 +230,7 @@ def show():
     res_df = pd.DataFrame(resumo).sort_values("Ajuste (%)", key=lambda c: c.astype(float), ascending=False).reset_index(drop=True)
     res_disp = res_df.copy()
     for col in ["Atual (%)", "Sugerida (%)", "Ajuste (%)"]:
-        res_disp[col] = res_disp[col].apply(lambda x: format_number_br(x) + "%")
+        res_disp[col] = formatar_serie_br(res_disp[col], sufixo="%")
     st.table(res_disp)
 
     # === ATIVOS ALOCADOS E RESGATADOS ===
@@ -149,9 +240,9 @@ def show():
         if not alocados.empty:
             for c in ["valor_atual", "Novo Valor", "Valor Realocado"]:
                 alocados[c] = pd.to_numeric(alocados[c], errors="coerce").fillna(0.0)
-            alocados["Valor Atual (R$)"]     = alocados["valor_atual"].apply(format_number_br)
-            alocados["Novo Valor (R$)"]      = alocados["Novo Valor"].apply(format_number_br)
-            alocados["Valor Realocado (R$)"] = alocados["Valor Realocado"].apply(format_number_br)
+            alocados["Valor Atual (R$)"]     = formatar_serie_br(alocados["valor_atual"])
+            alocados["Novo Valor (R$)"]      = formatar_serie_br(alocados["Novo Valor"])
+            alocados["Valor Realocado (R$)"] = formatar_serie_br(alocados["Valor Realocado"])
             # alteração realizada aqui: renomeia 'estrategia' para 'Ativo'
             alocados = alocados.rename(columns={"estrategia": "Ativo"})
             st.dataframe(alocados[["Classificação", "Ativo", "Valor Atual (R$)", "Valor Realocado (R$)", "Novo Valor (R$)"]],
@@ -164,9 +255,9 @@ def show():
         if not resgatados.empty:
             for c in ["valor_atual", "Novo Valor", "Valor Realocado"]:
                 resgatados[c] = pd.to_numeric(resgatados[c], errors="coerce").fillna(0.0)
-            resgatados["Valor Atual (R$)"]     = resgatados["valor_atual"].apply(format_number_br)
-            resgatados["Novo Valor (R$)"]      = resgatados["Novo Valor"].apply(format_number_br)
-            resgatados["Valor Realocado (R$)"] = resgatados["Valor Realocado"].apply(format_number_br)
+            resgatados["Valor Atual (R$)"]     = formatar_serie_br(resgatados["valor_atual"])
+            resgatados["Novo Valor (R$)"]      = formatar_serie_br(resgatados["Novo Valor"])
+            resgatados["Valor Realocado (R$)"] = formatar_serie_br(resgatados["Valor Realocado"])
             # alteração realizada aqui: renomeia 'estrategia' para 'Ativo'
             resgatados = resgatados.rename(columns={"estrategia": "Ativo"})
             st.dataframe(resgatados[["Classificação", "Ativo", "Valor Atual (R$)", "Valor Realocado (R$)", "Novo Valor (R$)"]],
@@ -176,37 +267,10 @@ def show():
 
     # === LIQUIDEZ POR FAIXAS ===
     st.subheader("Liquidez da carteira (R$) por Faixas")
-    def extract_days(liq):
-        m = re.search(r"D\+(\d+)", str(liq))
-        return int(m.group(1)) if m else None
-    ativos_df["days"] = ativos_df["Liquidez"].apply(extract_days)
-    def classify_faixa(row):
-        d = row["days"]
-        liq = str(row["Liquidez"]).lower()
-        if d is None:
-            return "D+0"  # fallback  # alteração realizada aqui
-        if d > 180: return "Acima de D+180"
-        if d > 60:  return "Até D+180"
-        if d > 15:  return "Até D+60"
-        if d > 5:   return "Até D+15"
-        if d > 0:   return "Até D+5"
-        if d == 0 and "à mercado" in liq: return "D+0 (à mercado)"
-        return "D+0"
-    ativos_df["Faixa"] = ativos_df.apply(classify_faixa, axis=1)
-    liq_faixas = ativos_df.groupby("Faixa")["valor_atual"].sum().reset_index()
-
-    # ordem invertida
-    ordem = [
-        "D+0 (à mercado)",
-        "D+0",
-        "Até D+5",
-        "Até D+15",
-        "Até D+60",
-        "Até D+180",
-        "Acima de D+180"
-    ]
-    liq_faixas["Faixa"] = pd.Categorical(liq_faixas["Faixa"], categories=ordem, ordered=True)
-    liq_faixas = liq_faixas.sort_values("Faixa")
+    # ordem invertida (a do PDF é da faixa mais longa para a mais curta)
+    ordem = FAIXAS_LIQUIDEZ[::-1]
+    liq_faixas = (valor_por_faixa(ativos_df["Liquidez"], ativos_df["valor_atual"])[ordem]
+                  .rename_axis("Faixa").reset_index(name="valor_atual"))
 
     fig_liq = px.bar(
         liq_faixas,
@@ -222,73 +286,71 @@ def show():
     )
     st.plotly_chart(fig_liq, use_container_width=True)
 
-    # === PREPARO DE DATAFRAMES PARA O PDF ===
-    modelo_raw = get_modelo_carteira(carteira_modelo)
-    
-    if isinstance(modelo_raw, dict):
-        # monta do jeito que o PDF espera
-        modelo_df = pd.DataFrame({
-            "Classificação": list(modelo_raw.keys()),
-            "Percentual Ideal": list(modelo_raw.values()),
-        })
-    else:
-        modelo_df = modelo_raw.copy()
-        # normaliza nome de coluna de percentual, se vier diferente
-        percent_cols = [c for c in modelo_df.columns if "percentual" in c.lower()]
-        if percent_cols and "Percentual Ideal" not in modelo_df.columns:
-            modelo_df = modelo_df.rename(columns={percent_cols[0]: "Percentual Ideal"})
-    
-    # dist atual no formato esperado
-    dist_df = dist_atual.rename(columns={"valor_atual": "valor"})
-    
-    # o PDF aceita 'resumo_df' por compatibilidade; use o que você já montou (res_df)
-    resumo_df = res_df.copy() if 'res_df' in locals() else pd.DataFrame()
-    
+    # === ESCADA DE LIQUIDEZ ===
+    st.subheader("Escada de liquidez (R$ disponível acumulado)")
+    prazos = prazos_liquidez(ativos_df["Liquidez"], ativos_df.get("Vencimento"), date.today())
+    carteiras = ativos_df[["valor_atual", "Novo Valor"]].set_axis(["Atual", "Proposta"], axis=1)
+    escada = escada_liquidez(prazos, carteiras)
+    fig_escada = go.Figure()
+    for nome, cor in (("Atual", PALETTE[4]), ("Proposta", PALETTE[0])):
+        fig_escada.add_trace(go.Scatter(x=escada.index, y=escada[nome], name=nome,
+                                        line=dict(color=cor, shape="hv")))
+    fig_escada.update_layout(separators=",.", xaxis_title="Meses", yaxis_title="Disponível (R$)")
+    st.plotly_chart(fig_escada, use_container_width=True)
+    sem_prazo = carteiras[prazos.isna().to_numpy()].sum()
+    if sem_prazo.any():
+        st.caption(f"Fora da escada (sem prazo nem vencimento): R$ {formatar_br(sem_prazo['Atual'])} na atual, "
+                   f"R$ {formatar_br(sem_prazo['Proposta'])} na proposta.")
+
+    # === PROJEÇÃO (SIMULAÇÃO MONTE CARLO) ===
+    st.subheader("Projeção da carteira (simulação)")
+    simulacao = _simular(
+        dict(zip(dist_atual["Classificação"], dist_atual["valor_atual"])),
+        dict(zip(dist_sug["Classificação"], dist_sug["valor_sugerido"])),
+    )
+    fig_proj = go.Figure()
+    for nome, cor in (("Atual", PALETTE[4]), ("Proposta", PALETTE[0])):
+        faixas = simulacao[nome]["faixas"]
+        fig_proj.add_trace(go.Scatter(x=faixas.index, y=faixas["P95"], line=dict(width=0),
+                                      showlegend=False, hoverinfo="skip"))
+        fig_proj.add_trace(go.Scatter(x=faixas.index, y=faixas["P5"], line=dict(width=0), fill="tonexty",
+                                      fillcolor=cor, opacity=0.2, name=f"{nome} (P5–P95)"))
+        fig_proj.add_trace(go.Scatter(x=faixas.index, y=faixas["P50"], line=dict(color=cor), name=f"{nome} (mediana)"))
+    fig_proj.update_layout(separators=",.", xaxis_title="Meses", yaxis_title="Patrimônio (R$)")
+    st.plotly_chart(fig_proj, use_container_width=True)
+
+    proj_disp = resumo_simulacao(simulacao)
+    for col in proj_disp.columns[1:]:
+        sufixo = "%" if "Drawdown" in col else ""
+        proj_disp[col] = formatar_serie_br(proj_disp[col], sufixo=sufixo)
+    st.table(proj_disp)
+
     # === GERAÇÃO E DOWNLOAD DO PDF ===
     sugestao = st.session_state.get(
         "sugestao",
         {"carteira_modelo": st.session_state.get("carteira_modelo")}
     )
-    
-    pdf_bytes = generate_pdf(
-        dist_df=dist_df,
-        modelo_df=modelo_df,
-        resumo_df=resumo_df,          # agora existe
-        sugestao=sugestao,
-        ativos_df=ativos_df,
-        cliente_nome=cliente_nome,    # usa os nomes corretos
-        nome_assessor=nome_assessor,
-    )
-    
-    st.download_button(
-        "Gerar e Baixar PDF",
-        pdf_bytes,
-        "relatorio_carteira.pdf",
-        "application/pdf"
+
+    # só gera quando pedido; o resultado fica guardado pela versão da carteira
+    # e pelos demais campos (inclusive a data, que sai no cabeçalho)
+    entradas_pdf = entradas_relatorio(
+        ativos_df, get_modelo_carteira(carteira_modelo), sugestao,
+        cliente_nome=cliente_nome, nome_assessor=nome_assessor,
+        resumo_df=res_df.copy(),
     )
+    hoje = date.today()
+    entradas_pdf["agora"] = datetime(hoje.year, hoje.month, hoje.day)
+    chave_pdf = _chave_pdf(cliente_nome=cliente_nome, nome_assessor=nome_assessor,
+                           carteira_modelo=carteira_modelo, sugestao=sugestao, agora=entradas_pdf["agora"])
+    _painel_pdf(chave_pdf, entradas_pdf)
 
 
     # === DOWNLOAD DO EXCEL ===
-    excel1 = ativos_df.copy()
-    excel1["Valor Atual (R$)"] = excel1["valor_atual"].apply(format_number_br)
-    total_atual = float(excel1["valor_atual"].sum())
-    excel1["Percentual (%)"] = excel1["valor_atual"].apply(lambda x: format_number_br((x/total_atual*100) if total_atual else 0) + "%")
-    excel1_export = excel1[["Classificação", "estrategia", "Liquidez", "Valor Atual (R$)", "Percentual (%)"]].sort_values("Classificação")
-
-    excel2 = ativos_df.copy()
-    total_sug = float(excel2["Novo Valor"].sum())
-    excel2["Valor Sugerido (R$)"] = excel2["Novo Valor"].apply(format_number_br)
-    excel2["Percentual Ideal (%)"] = excel2["Novo Valor"].apply(lambda x: format_number_br((x/total_sug*100) if total_sug else 0) + "%")
-    excel2_export = excel2[["Classificação", "estrategia", "Liquidez", "Valor Sugerido (R$)", "Percentual Ideal (%)"]].sort_values("Classificação")
-
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        excel1_export.to_excel(writer, sheet_name='Carteira Inicial', index=False)
-        excel2_export.to_excel(writer, sheet_name='Carteira Sugerida', index=False)
-    output.seek(0)
+    # gerado só no clique e guardado pela versão da carteira
     st.download_button(
         label="Baixar Carteiras (Excel)",
-        data=output,
+        data=functools.partial(conteudo, f"xlsx:{versao_carteira(st.session_state)}",
+                               functools.partial(escrever_excel_carteiras, ativos_df=ativos_df), ".xlsx"),
         file_name="carteiras.xlsx",
         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
     )
@@ -1,103 +1,33 @@
 import streamlit as st
 import pandas as pd
 import re
-from datetime import date
-from pathlib import Path  # alteração realizada aqui: para construir caminho relativo
-
-def sql_get_df():
-    """
-    Lê o arquivo liquidez_ativos.xlsx que fica na mesma pasta deste script.
-    """
-    script_dir = Path(__file__).parent
-    file_path = script_dir / "liquidez_ativos.xlsx"
-    try:
-        df = pd.read_excel(
-            file_path,
-            dtype={"ativo": str, "liquidez": str, "vencimento": str}
-        )
-    except Exception as e:
-        print(f"sql_get_df – não encontrou o arquivo em {file_path}: {e}")
-        df = pd.DataFrame(columns=["ativo", "liquidez", "vencimento"])
-    return df
-
-def format_valor_br(valor):
-    s = f"{valor:,.2f}"
-    return s.replace(",", "X").replace(".", ",").replace("X", ".")
+from utils.pipeline_carteira import carregar_base_liquidez, classificar_ativos
+from utils.numeros_br import formatar_br, formatar_serie_br, ler_br
+from utils.carteira_sessao import carteira, guardar_carteira
 
 def parse_valor_br(txt: str):
     """
     Converte '1.234.567,89' ou '1234567,89' (com/sem R$ e espaços) em float.
     Retorna None se vazio/inválido.
     """
-    if txt is None:
-        return None
-    s = str(txt).strip()
-    if s == "":
-        return None
-    s = s.upper().replace("R$", "").replace(" ", "")
-    # remove separador de milhar e troca vírgula decimal por ponto
-    s = s.replace(".", "").replace(",", ".")
-    try:
-        v = float(s)
-        return v if v >= 0 else None
-    except Exception:
-        return None
+    v = ler_br(txt, padrao=None, ponto_milhar=True)
+    return v if v is not None and v >= 0 else None
 
 def show():
     st.header("2. Detalhamento e Classificação dos Ativos")
-    ativos_raw = st.session_state.get("ativos_df")
-    if not ativos_raw:
+    df = carteira(st.session_state)
+    if "ativos_df" not in st.session_state:
         st.warning("Nenhum ativo carregado. Volte para a Etapa 1.")
         return
-
-    df = pd.DataFrame(ativos_raw).copy()
     if df.empty:
         st.warning("A lista de ativos está vazia.")
         return
 
-    # Garante coluna de Classificação
-    if "Classificação" not in df.columns:
-        df["Classificação"] = df.get("classificacao", "")
-
-    # 1) Puxa liquidez do SQL
-    df_sql = sql_get_df()
-    liq_map = dict(zip(df_sql["ativo"], df_sql["liquidez"]))
-    df["Liquidez"] = df["estrategia"].map(liq_map).fillna("")
-
-    # 2) Fallback MMM/YYYY para D+X (dia 15 do mês)
-    month_map = {
-        "JAN":1, "FEV":2, "MAR":3, "ABR":4, "MAI":5, "JUN":6,
-        "JUL":7, "AGO":8, "SET":9, "OUT":10, "NOV":11, "DEZ":12
-    }
-    today = date.today()
-    def calc_fallback(estrat: str) -> str:
-        m = re.search(r"([A-Za-z]{3})/(\d{4})", estrat)
-        if not m:
-            return ""
-        abbr, ano = m.group(1).upper(), int(m.group(2))
-        mes = month_map.get(abbr)
-        if not mes:
-            return ""
-        alvo = date(ano, mes, 15)
-        dias = (alvo - today).days
-        return f"D+{dias}"
-
-    # 3) Regras adicionais de fallback
-    def compute_liq(r):
-        if r["Liquidez"]:
-            return r["Liquidez"]
-        fb = calc_fallback(r["estrategia"])
-        if fb:
-            return fb
-        if re.search(r"(?:3|4|11|34|39)$", str(r["estrategia"])):
-            return "D+2"
-        if "tesouro" in str(r["estrategia"]).lower():
-            return "D+0 (à mercado)"
-        return ""
-
-    df["Liquidez"] = df.apply(compute_liq, axis=1)
+    # Classificação do extrato e Liquidez (base + regras de fallback)
+    df = classificar_ativos(df, carregar_base_liquidez())
 
     detalhes_visiveis = st.session_state.setdefault("detalhes_visiveis", {})
+    saldos_fmt = formatar_serie_br(df["saldo_bruto"] if "saldo_bruto" in df.columns else pd.Series(0.0, index=df.index))
 
     # Cabeçalho com nova coluna Liquidez
     header_cols = st.columns([0.5, 5, 2, 3, 2], gap="small")
@@ -127,8 +57,7 @@ def show():
 
         # Ativo e valor
         cols[1].write(row["estrategia"])
-        valor = row.get("saldo_bruto", 0.0)
-        cols[2].write(f"R$ {format_valor_br(valor)}")
+        cols[2].write(f"R$ {saldos_fmt[i]}")
 
         # Classificação editável
         key_cls = f"classificacao_{i}"
@@ -175,7 +104,7 @@ def show():
                 st.markdown("<div style='margin-left:40px;'>", unsafe_allow_html=True)
                 for label, val in info.items():
                     if isinstance(val, (int, float)):
-                        txt = format_valor_br(val) + ("%" if "%" in label else "")
+                        txt = formatar_br(val) + ("%" if "%" in label else "")
                     else:
                         txt = val
                     st.markdown(
@@ -186,13 +115,13 @@ def show():
             st.markdown("---")
 
     # Persistimos a tabela editada
-    st.session_state.ativos_df = pd.DataFrame(novos).to_dict("records")
+    guardar_carteira(st.session_state, novos)
 
     # ======================= CAMPO DE APORTE (opcional) =======================
     # valor default (se já informado em sessão) formatado em BR
     aporte_default_txt = ""
     if st.session_state.get("aporte_valor") is not None:
-        aporte_default_txt = f"{format_valor_br(st.session_state['aporte_valor'])}"
+        aporte_default_txt = f"{formatar_br(st.session_state['aporte_valor'])}"
 
     aporte_txt = st.text_input(
         "O cliente deseja realizar um aporte? Se não, deixe em branco",
@@ -206,7 +135,7 @@ def show():
     # Guarda no estado (None se vazio/inválido)
     st.session_state.aporte_valor = aporte_valor
     st.session_state.aporte_text = (
-        f"R$ {format_valor_br(aporte_valor)}" if aporte_valor is not None else ""
+        f"R$ {formatar_br(aporte_valor)}" if aporte_valor is not None else ""
     )
     # ===================== FIM – CAMPO DE APORTE (opcional) ===================
 
@@ -1,31 +1,16 @@
 import streamlit as st
 import pandas as pd
 from utils.carteiras_modelo import get_modelo_carteira
+from utils.concentracao import metricas_concentracao, verificar_limites, LIMITES_CONCENTRACAO
+from utils.pipeline_carteira import ajustes_por_classe
+from utils.numeros_br import formatar_br, formatar_serie_br, ler_br
+from utils.carteira_sessao import carteira, guardar_carteira, distribuicao_carteira
 import re
 
-# Formata valores financeiros no padrão brasileiro
-def format_valor_br(valor):
-    s = f"{valor:,.2f}"
-    return s.replace(",", "X").replace(".", ",").replace("X", ".")
-
-def _parse_br_money(x):
-    """Converte '1.234,56' / 'R$ 1.234,56' / 1234.56 para float."""
-    if x is None:
-        return 0.0
-    if isinstance(x, (int, float)):
-        return float(x)
-    s = str(x).strip()
-    if not s:
-        return 0.0
-    s = s.replace("R$", "").replace(" ", "")
-    if "," in s and "." in s:
-        s = s.replace(".", "").replace(",", ".")
-    elif "," in s:
-        s = s.replace(",", ".")
-    try:
-        return float(s)
-    except:
-        return 0.0
+# Colunas (re)calculadas na Etapa 4; as demais vêm do ativo original
+_CAMPOS_ETAPA4 = ["estrategia", "saldo_bruto", "Novo Valor", "Valor Realocado", "Classificação", "Liquidez"]
+# chave do fragment de resumo (saldo, percentuais, concentração), para st.rerun
+_RESUMO_ETAPA4 = "etapa4_resumo"
 
 # ---- Helpers para Liquidez ----
 def _to_editor_liq(val: str) -> str:
@@ -69,9 +54,9 @@ def _to_output_liq(val: str) -> str:
 def show():
     st.header("4. Sugestões de Ajustes na Alocação")
 
-    ativos_raw           = st.session_state.get("ativos_df", [])
+    ativos_df            = carteira(st.session_state)
     carteira_modelo_tipo = st.session_state.get("carteira_modelo")
-    if not ativos_raw or not carteira_modelo_tipo:
+    if ativos_df.empty or not carteira_modelo_tipo:
         st.error("Informações incompletas. Volte para as etapas anteriores.")
         return
 
@@ -79,13 +64,12 @@ def show():
     sug = dict(st.session_state.get("sugestao", {}))
     aporte = 0.0
     if "aporte_valor" in sug:
-        aporte = _parse_br_money(sug.get("aporte_valor"))
+        aporte = ler_br(sug.get("aporte_valor"))
     elif "aporte_text" in sug:
-        aporte = _parse_br_money(sug.get("aporte_text"))
+        aporte = ler_br(sug.get("aporte_text"))
     if aporte < 0:
         aporte = 0.0
 
-    ativos_df = pd.DataFrame(ativos_raw)
     # mapa original (apenas para inicialização)
     liq_map = dict(zip(ativos_df["estrategia"], ativos_df["Liquidez"]))
 
@@ -95,46 +79,23 @@ def show():
         else st.session_state.get("modelo_personalizado_dict", {})
     )
 
-    # Distribuição atual (inicial)
-    dist = (
-        ativos_df.groupby("Classificação")["saldo_bruto"]
-        .sum()
-        .reset_index()
-        .rename(columns={"saldo_bruto": "Valor"})
-    )
+    # Distribuição atual (inicial) + concentração antes do rebalanceamento
+    dist = distribuicao_carteira(st.session_state).rename(columns={"saldo_bruto": "Valor"})
+    concentracao_antes = metricas_concentracao(ativos_df, "saldo_bruto")
     total_atual = float(dist["Valor"].sum())
-    dist["Percentual"] = dist["Valor"] / total_atual * 100 if total_atual else 0.0
 
     # === Ajustes por classe (BASE = total_atual + APORTE) ===
-    base_total = total_atual + aporte
-    ajustes = {}
-    for cls in set(dist["Classificação"]) | set(modelo.keys()):
-        valor_atual_classe = float(dist.loc[dist["Classificação"] == cls, "Valor"].sum())
-        pct_modelo = float(modelo.get(cls, 0.0))
-        alvo_classe = (pct_modelo / 100.0) * base_total
-        ajustes[cls] = alvo_classe - valor_atual_classe  # + ou -
-
-    # Totais
-    total_alocar  = sum(v for v in ajustes.values() if v > 0)         # inclui aporte
-    total_reduzir = sum(abs(v) for v in ajustes.values() if v < 0)
-    delta_diff = (total_alocar - total_reduzir) - aporte
-    if abs(delta_diff) > 1e-6:
-        pos_items = [(c, v) for c, v in ajustes.items() if v > 0]
-        if pos_items:
-            cmax, vmax = max(pos_items, key=lambda x: x[1])
-            novo = vmax - delta_diff
-            ajustes[cmax] = max(novo, 0.0)
-            total_alocar  = sum(v for v in ajustes.values() if v > 0)
-            total_reduzir = sum(abs(v) for v in ajustes.values() if v < 0)
+    ajustes = ajustes_por_classe(dist, modelo, aporte)
+    total_alocar = sum(v for v in ajustes.values() if v > 0)         # inclui aporte
 
     # Ordem de exibição
     aumentos        = [c for c, v in sorted(ajustes.items(), key=lambda x: x[1], reverse=True) if v > 0]
     reducoes        = [c for c, v in sorted(ajustes.items(), key=lambda x: x[1]) if v < 0]
     inalterados     = [c for c, v in ajustes.items() if abs(v) < 1e-9]
-    classes_ordered = aumentos + reducoes + inalterados
+    classes_ordered = list(dict.fromkeys(aumentos + reducoes + inalterados))
 
-    st.subheader(f"Total a alocar (inclui aporte): R$ {format_valor_br(total_alocar)}")
-    st.caption(f"Aporte: R$ {format_valor_br(aporte)}")
+    st.subheader(f"Total a alocar (inclui aporte): R$ {formatar_br(total_alocar)}")
+    st.caption(f"Aporte: R$ {formatar_br(aporte)}")
 
     if "open_classes" not in st.session_state:
         st.session_state.open_classes = {}
@@ -148,130 +109,212 @@ def show():
             df0["Valor Realocado"] = 0.0
             df0["Novo Valor"]      = df0["Valor Atual"]
             df0["Liquidez"]        = df0["Ativo"].map(liq_map).apply(_to_editor_liq)
+            # banco de cada posição (o mesmo ativo pode estar em mais de um banco)
+            df0["Banco"]           = (ativos_df.loc[df0.index, "Banco"].astype(object).fillna("")
+                                      if "Banco" in ativos_df.columns else "")
             st.session_state[key]  = df0.reset_index(drop=True)
 
-    # ===== total novo global (para % ajustado por classe)
-    total_novo_global = 0.0
+    # Exibe/edita cada classe — cada uma num fragment próprio, com chave, para
+    # que a edição de valores refaça só o próprio card e o resumo (_ao_editar)
     for cls in classes_ordered:
-        df_cls = st.session_state.get(f"editor_df_{cls}")
-        if df_cls is not None:
-            nv = pd.to_numeric(df_cls["Valor Atual"], errors="coerce").fillna(0.0) + \
-                 pd.to_numeric(df_cls["Valor Realocado"], errors="coerce").fillna(0.0)
-            total_novo_global += float(nv.sum())
-
-    # Exibe/edita cada classe
-    for cls in classes_ordered:
-        key = f"editor_df_{cls}"
-        df_current = st.session_state[key].reset_index(drop=True)
-        st.session_state[key] = df_current
-
-        # Tipos
-        df_current["Valor Atual"]     = pd.to_numeric(df_current["Valor Atual"], errors="coerce").fillna(0.0)
-        df_current["Valor Realocado"] = pd.to_numeric(df_current["Valor Realocado"], errors="coerce").fillna(0.0)
-        df_current["Novo Valor"]      = df_current["Valor Atual"] + df_current["Valor Realocado"]
-        # NÃO sobrescreve Liquidez aqui — mantém o valor editado pelo usuário
-        df_current = df_current[["Ativo", "Liquidez", "Valor Atual", "Valor Realocado", "Novo Valor"]]
-
-        soma_realocado_classe = float(df_current["Valor Realocado"].sum())
-        restante_classe       = float(ajustes.get(cls, 0.0) - soma_realocado_classe)
-
-        pct_atual  = float(dist.loc[dist["Classificação"] == cls, "Percentual"].sum())
-        pct_modelo = float(modelo.get(cls, 0.0))
-        class_total_inicial = float(dist.loc[dist["Classificação"] == cls, "Valor"].sum())
-
-        total_ajustado_classe = float(df_current["Novo Valor"].sum())
-        pct_ajustado_classe = (total_ajustado_classe / total_novo_global * 100.0) if total_novo_global else 0.0
-        pct_ajustado_fmt = f"{pct_ajustado_classe:.2f}".replace(".", ",") + "%"
-
-        # Mensagem por classe
-        if abs(restante_classe) < 1e-2:
-            if abs(soma_realocado_classe) < 1e-2:
-                texto, color, simbolo = "Inalterado", "#000", ""
-            elif soma_realocado_classe < 0:
-                texto, color, simbolo = "Reduzir R$ 0,00", "red", "⬇️"
-            else:
-                texto, color, simbolo = "Aumentar R$ 0,00", "green", "⬆️"
-        else:
-            if restante_classe > 0:
-                texto, color, simbolo = f"Aumentar R$ {format_valor_br(restante_classe)}", "green", "⬆️"
-            else:
-                texto, color, simbolo = f"Reduzir R$ {format_valor_br(abs(restante_classe))}", "red", "⬇️"
-
-        cols = st.columns([8, 1])
-        with cols[0]:
-            st.markdown(f"""
-                <div style='border:1px solid #000; padding:15px; border-radius:10px; margin-bottom:10px; background:#fff;'>
-                    <span style='font-size:16px;'>{simbolo} {cls}</span><br>
-                    <span style='color:gray'>{pct_atual:.2f}% → {pct_modelo:.2f}%</span><br>
-                    <span style='color:gray'>Total da classe (inicial): R$ {format_valor_br(class_total_inicial)}</span><br>
-                    <span style='color:gray; font-weight:bold'>Total ajustado (classe): R$ {format_valor_br(total_ajustado_classe)}</span><br>
-                    <span style='color:gray'>Percentual ajustado (classe): {pct_ajustado_fmt}</span><br>
-                    <span style='color:{color}; font-weight:bold'>{texto}</span>
-                </div>
-            """, unsafe_allow_html=True)
-        with cols[1]:
-            if st.button("🔍", key=f"toggle_{cls}"):
-                st.session_state.open_classes[cls] = not st.session_state.open_classes.get(cls, False)
-                st.rerun()
-
-        if st.session_state.open_classes.get(cls, False):
-            prev   = df_current.copy()
-            edited = st.data_editor(
-                df_current,
-                hide_index=True,
-                num_rows="dynamic",
-                column_config={
-                    "Ativo":            st.column_config.TextColumn(label="Ativo"),
-                    "Liquidez":         st.column_config.TextColumn(
-                        label="Liquidez",
-                        help="Digite apenas o número de dias (ex.: 5, 15) ou 'No Vencimento'. Também aceita 'D+5'."
-                    ),
-                    "Valor Atual":      st.column_config.NumberColumn(label="Valor Atual", disabled=True),
-                    "Valor Realocado":  st.column_config.NumberColumn(label="Valor Realocado"),
-                    "Novo Valor":       st.column_config.NumberColumn(label="Novo Valor", disabled=True)
-                },
-                use_container_width=True,
-                key=f"editor_{cls}"
-            )
-            # normaliza números e recalc
-            edited["Valor Atual"]     = pd.to_numeric(edited["Valor Atual"], errors="coerce").fillna(0.0)
-            edited["Valor Realocado"] = pd.to_numeric(edited["Valor Realocado"], errors="coerce").fillna(0.0)
-            edited["Novo Valor"]      = edited["Valor Atual"] + edited["Valor Realocado"]
-
-            # detecta mudança em Realocado OU Liquidez
-            changed = False
-            for idx in edited.index:
-                if idx in prev.index:
-                    if prev.at[idx, "Valor Realocado"] != edited.at[idx, "Valor Realocado"]:
-                        changed = True
-                        break
-                    if str(prev.at[idx, "Liquidez"]).strip() != str(edited.at[idx, "Liquidez"]).strip():
-                        changed = True
-                        break
-
-            st.session_state[key] = edited
-            if changed:
-                st.rerun()
+        st.fragment(_editor_classe, key=_fragment_classe(cls))(cls, ajustes, dist, modelo)
 
     # ================= Saldo restante do APORTE =================
-    soma_novo_total = sum(
-        float(st.session_state[f"editor_df_{cls}"]["Novo Valor"].sum()) for cls in classes_ordered
+    _resumo_saldo(aporte, total_atual, classes_ordered, concentracao_antes, modelo)
+
+
+def _painel_concentracao(antes, depois):
+    def _fmt_pct(v):
+        return formatar_br(v, sufixo="%")
+
+    def _maior(serie):
+        return _fmt_pct(float(serie.iloc[0])) + f" ({serie.index[0]})" if len(serie) else "-"
+
+    lim = LIMITES_CONCENTRACAO
+    linhas = [
+        ("HHI (ativos)", formatar_br(antes['hhi'], 0), formatar_br(depois['hhi'], 0), formatar_br(lim['hhi_max'], 0)),
+        (f"Top {lim['top_n']} ativos", _fmt_pct(antes["top_n_pct"]), _fmt_pct(depois["top_n_pct"]),
+         _fmt_pct(lim["top_n_max_pct"])),
+        ("Maior ativo", _fmt_pct(antes["maior_ativo"][1]), _fmt_pct(depois["maior_ativo"][1]),
+         _fmt_pct(lim["ativo_max_pct"])),
+        ("Maior emissor", _maior(antes["emissores"]), _maior(depois["emissores"]),
+         _fmt_pct(lim["emissor_max_pct"])),
+        ("Maior banco", _maior(antes["bancos"]), _maior(depois["bancos"]), _fmt_pct(lim["banco_max_pct"])),
+    ]
+    with st.expander("Concentração da carteira (antes × depois)", expanded=False):
+        st.table(pd.DataFrame(linhas, columns=["Métrica", "Antes", "Depois", "Limite"]))
+    for alerta in verificar_limites(depois):
+        st.warning(f"⚠️ {alerta}")
+
+
+def _novo_total_classe(df_cls) -> float:
+    nv = pd.to_numeric(df_cls["Valor Atual"], errors="coerce").fillna(0.0) + \
+         pd.to_numeric(df_cls["Valor Realocado"], errors="coerce").fillna(0.0)
+    return float(nv.sum())
+
+
+def _fragment_classe(cls) -> str:
+    return f"etapa4_classe_{cls}"
+
+
+def _ao_editar(cls):
+    """
+    Edição no editor de uma classe. Mudou valor (ou linhas): o total da classe
+    muda, então refaz o card e o resumo, nessa ordem. Só Liquidez: apenas o card.
+    """
+    edicao = st.session_state[f"editor_{cls}"]
+    mudou_valor = (
+        any("Valor Realocado" in linha for linha in edicao.get("edited_rows", {}).values())
+        or edicao.get("added_rows") or edicao.get("deleted_rows")
     )
+    if mudou_valor:
+        st.rerun([_fragment_classe(cls), _RESUMO_ETAPA4])
+
+
+def _editor_classe(cls, ajustes, dist, modelo):
+    """
+    Card + editor de uma classe (fragment com chave, ver show()). O card só
+    usa dados da própria classe; o que depende das outras fica no resumo.
+    """
+    key = f"editor_df_{cls}"
+    df_current = st.session_state[key].reset_index(drop=True)
+    st.session_state[key] = df_current
+
+    # Tipos
+    df_current["Valor Atual"]     = pd.to_numeric(df_current["Valor Atual"], errors="coerce").fillna(0.0)
+    df_current["Valor Realocado"] = pd.to_numeric(df_current["Valor Realocado"], errors="coerce").fillna(0.0)
+    df_current["Novo Valor"]      = df_current["Valor Atual"] + df_current["Valor Realocado"]
+    # NÃO sobrescreve Liquidez aqui — mantém o valor editado pelo usuário
+    df_current = df_current.reindex(columns=["Ativo", "Liquidez", "Banco", "Valor Atual", "Valor Realocado", "Novo Valor"])
+
+    # o card é preenchido depois do editor, já com a edição desta execução
+    cols = st.columns([8, 1])
+    with cols[1]:
+        if st.button("🔍", key=f"toggle_{cls}"):
+            st.session_state.open_classes[cls] = not st.session_state.open_classes.get(cls, False)
+            st.rerun(scope="fragment")
+
+    if st.session_state.open_classes.get(cls, False):
+        edited = st.data_editor(
+            df_current,
+            hide_index=True,
+            num_rows="dynamic",
+            column_config={
+                "Ativo":            st.column_config.TextColumn(label="Ativo"),
+                "Liquidez":         st.column_config.TextColumn(
+                    label="Liquidez",
+                    help="Digite apenas o número de dias (ex.: 5, 15) ou 'No Vencimento'. Também aceita 'D+5'."
+                ),
+                "Valor Atual":      st.column_config.NumberColumn(label="Valor Atual", disabled=True),
+                "Valor Realocado":  st.column_config.NumberColumn(label="Valor Realocado"),
+                "Banco":            st.column_config.TextColumn(label="Banco", disabled=True),
+                "Novo Valor":       st.column_config.NumberColumn(label="Novo Valor", disabled=True)
+            },
+            use_container_width=True,
+            key=f"editor_{cls}",
+            on_change=_ao_editar,
+            args=(cls,),
+        )
+        # normaliza números e recalc
+        edited["Valor Atual"]     = pd.to_numeric(edited["Valor Atual"], errors="coerce").fillna(0.0)
+        edited["Valor Realocado"] = pd.to_numeric(edited["Valor Realocado"], errors="coerce").fillna(0.0)
+        edited["Novo Valor"]      = edited["Valor Atual"] + edited["Valor Realocado"]
+        st.session_state[key] = df_current = edited
+
+    soma_realocado_classe = float(df_current["Valor Realocado"].sum())
+    restante_classe       = float(ajustes.get(cls, 0.0) - soma_realocado_classe)
+
+    pct_atual  = float(dist.loc[dist["Classificação"] == cls, "Percentual"].sum())
+    pct_modelo = float(modelo.get(cls, 0.0))
+    class_total_inicial = float(dist.loc[dist["Classificação"] == cls, "Valor"].sum())
+    total_ajustado_classe = float(df_current["Novo Valor"].sum())
+
+    # Mensagem por classe
+    if abs(restante_classe) < 1e-2:
+        if abs(soma_realocado_classe) < 1e-2:
+            texto, color, simbolo = "Inalterado", "#000", ""
+        elif soma_realocado_classe < 0:
+            texto, color, simbolo = "Reduzir R$ 0,00", "red", "⬇️"
+        else:
+            texto, color, simbolo = "Aumentar R$ 0,00", "green", "⬆️"
+    else:
+        if restante_classe > 0:
+            texto, color, simbolo = f"Aumentar R$ {formatar_br(restante_classe)}", "green", "⬆️"
+        else:
+            texto, color, simbolo = f"Reduzir R$ {formatar_br(abs(restante_classe))}", "red", "⬇️"
+
+    with cols[0]:
+        st.markdown(f"""
+            <div style='border:1px solid #000; padding:15px; border-radius:10px; margin-bottom:10px; background:#fff;'>
+                <span style='font-size:16px;'>{simbolo} {cls}</span><br>
+                <span style='color:gray'>{pct_atual:.2f}% → {pct_modelo:.2f}%</span><br>
+                <span style='color:gray'>Total da classe (inicial): R$ {formatar_br(class_total_inicial)}</span><br>
+                <span style='color:gray; font-weight:bold'>Total ajustado (classe): R$ {formatar_br(total_ajustado_classe)}</span><br>
+                <span style='color:{color}; font-weight:bold'>{texto}</span>
+            </div>
+        """, unsafe_allow_html=True)
+
+
+@st.fragment(key=_RESUMO_ETAPA4)
+def _resumo_saldo(aporte, total_atual, classes_ordered, concentracao_antes, modelo):
+    """
+    Tudo o que depende de mais de uma classe: saldo do aporte, percentual
+    ajustado de cada classe, concentração e botão de avanço. Refeito junto
+    com o card da classe quando um valor muda (_ao_editar).
+    """
+    totais = {cls: _novo_total_classe(st.session_state[f"editor_df_{cls}"]) for cls in classes_ordered}
+    soma_novo_total = sum(totais.values())
     saldo_restante = aporte - (soma_novo_total - total_atual)
 
-    st.subheader(f"Saldo restante: R$ {format_valor_br(saldo_restante)}")
+    st.subheader(f"Saldo restante: R$ {formatar_br(saldo_restante)}")
     if abs(saldo_restante) > 0.01:
         st.warning("Distribua o aporte entre os ativos até que o saldo restante zere (0,00).")
 
+    # Percentual ajustado de cada classe sobre o novo total
+    por_classe = pd.DataFrame({"Total ajustado (R$)": pd.Series(totais, dtype=float)})
+    por_classe["Percentual ajustado"] = (por_classe["Total ajustado (R$)"] / soma_novo_total * 100.0
+                                         if soma_novo_total else 0.0)
+    por_classe["Modelo"] = [float(modelo.get(cls, 0.0)) for cls in por_classe.index]
+    with st.expander("Percentual ajustado por classe", expanded=False):
+        st.table(pd.DataFrame({
+            "Total ajustado (R$)": formatar_serie_br(por_classe["Total ajustado (R$)"]),
+            "Percentual ajustado": formatar_serie_br(por_classe["Percentual ajustado"], sufixo="%"),
+            "Modelo":              formatar_serie_br(por_classe["Modelo"], sufixo="%"),
+        }).rename_axis("Classe").reset_index())
+
+    # Limites de concentração sobre a carteira proposta (ao vivo)
+    # cada linha com o banco da própria posição, como na concentração de antes
+    proposta = pd.concat(
+        [st.session_state[f"editor_df_{cls}"].reindex(columns=["Ativo", "Novo Valor", "Banco"])
+         for cls in classes_ordered],
+        ignore_index=True,
+    ).rename(columns={"Ativo": "estrategia"})
+    _painel_concentracao(concentracao_antes, metricas_concentracao(proposta, "Novo Valor"))
+
     botao_disabled = bool(abs(saldo_restante) > 0.01)
 
     if st.button("Avançar para Confirmação e Geração do PDF", disabled=botao_disabled):
+        # campos originais do ativo (id, rentabilidade, Banco, ...) seguem para a Etapa 5;
+        # o editor de cada classe tem os ativos na ordem original, então a n-ésima
+        # linha de um nome na classe é a n-ésima posição original com esse nome
+        originais = carteira(st.session_state)
+        extras = {}
+        if "estrategia" in originais.columns:
+            cols_extras = [c for c in originais.columns if c not in _CAMPOS_ETAPA4]
+            ocorrencia = originais.groupby(["Classificação", "estrategia"], observed=True).cumcount()
+            extras = (originais.assign(_ocorrencia=ocorrencia)
+                               .set_index(["Classificação", "estrategia", "_ocorrencia"])[cols_extras]
+                               .to_dict("index"))
+
         novos_ativos = []
         for cls in classes_ordered:
             df_cls = st.session_state[f"editor_df_{cls}"]
+            vistos = {}
             for _, r in df_cls.iterrows():
                 liqui_out = _to_output_liq(r["Liquidez"])
-                novos_ativos.append({
+                n = vistos[r["Ativo"]] = vistos.get(r["Ativo"], -1) + 1
+                rec = dict(extras.get((cls, r["Ativo"], n), {}))
+                rec.update({
                     "estrategia":       r["Ativo"],
                     "saldo_bruto":      float(r["Valor Atual"]),
                     "Novo Valor":       float(r["Novo Valor"]),
@@ -279,13 +322,14 @@ def show():
                     "Classificação":    cls,
                     "Liquidez":         liqui_out
                 })
-        st.session_state.ativos_df = novos_ativos
+                novos_ativos.append(rec)
+        guardar_carteira(st.session_state, novos_ativos)
 
         # garante que o aporte siga adiante nas próximas telas
         sug_out = dict(st.session_state.get("sugestao", {}))
         sug_out["aporte_valor"] = aporte
         if "aporte_text" not in sug_out:
-            sug_out["aporte_text"] = format_valor_br(aporte)
+            sug_out["aporte_text"] = formatar_br(aporte)
         st.session_state.sugestao = sug_out
 
         st.session_state.etapa = 5
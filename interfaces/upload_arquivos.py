@@ -1,5 +1,7 @@
 import streamlit as st
+import pandas as pd
 from utils.extrair_pdf_xp import extrair_texto_ativos, parse_ativos
+from utils.carteira_sessao import guardar_carteira
 
 def show():
     st.header("1. Upload dos Arquivos da Carteira")
@@ -15,23 +17,23 @@ def show():
 
         if 'arquivos' not in st.session_state or st.session_state.get("arquivos_originais") != nomes_arquivos:
             arquivos_processados = []
-            ativos_completos = []
+            frames = []
 
             for file in uploaded_files:
                 texto_ativos = extrair_texto_ativos(file)
                 df_ativos = parse_ativos(texto_ativos)
                 df_ativos["Banco"] = "XP"  # Marca como XP
 
-                ativos_completos.extend(df_ativos.to_dict(orient="records"))
+                frames.append(df_ativos)
 
                 arquivos_processados.append({
                     "nome_arquivo": file.name,
                     "banco": "XP",
-                    "ativos_extraidos": df_ativos.to_dict(orient="records")
+                    "ativos_extraidos": len(df_ativos)
                 })
 
             st.session_state.arquivos = arquivos_processados
-            st.session_state.ativos_df = ativos_completos
+            guardar_carteira(st.session_state, pd.concat(frames, ignore_index=True))
             st.session_state.arquivos_originais = nomes_arquivos
 
         for arq in st.session_state.arquivos:
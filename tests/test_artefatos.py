@@ -0,0 +1,41 @@
+# tests/test_artefatos.py
+"""Repositório de arquivos gerados (utils.artefatos): nenhum arquivo fica órfão no disco."""
+import os
+
+import pytest
+
+from utils import artefatos
+from utils.artefatos import ARTEFATOS, artefato_pronto, conteudo, preparar
+
+@pytest.fixture
+def limite_pequeno(monkeypatch):
+    ARTEFATOS.limpar()
+    monkeypatch.setattr(ARTEFATOS, "max_bytes", 1024)
+    yield
+    ARTEFATOS.limpar()
+
+def _arquivos() -> set:
+    return set(os.listdir(artefatos._pasta()))
+
+def _escrever(n: int):
+    return lambda arquivo: arquivo.write(b"x" * n)
+
+def test_artefato_que_cabe_fica_guardado(limite_pequeno):
+    antes = _arquivos()
+    assert conteudo("pequeno", _escrever(100), ".bin") == b"x" * 100
+    guardado = artefato_pronto("pequeno")
+    assert guardado is not None and os.path.exists(guardado.caminho)
+    assert _arquivos() - antes == {os.path.basename(guardado.caminho)}
+
+def test_artefato_maior_que_o_limite_e_apagado_depois_do_uso(limite_pequeno):
+    antes = _arquivos()
+    assert conteudo("grande", _escrever(4096), ".bin") == b"x" * 4096
+    assert not preparar("grande", _escrever(4096), ".bin")
+    assert artefato_pronto("grande") is None
+    assert _arquivos() == antes
+
+def test_artefato_removido_do_cache_sai_do_disco(limite_pequeno):
+    antes = _arquivos()
+    for i in range(5):
+        assert preparar(f"a{i}", _escrever(400), ".bin")
+    assert len(_arquivos() - antes) == 2   # 2 x 400 bytes cabem em 1024
@@ -0,0 +1,40 @@
+# tests/test_cache_relatorio.py
+"""CacheLRU (utils.cache_relatorio): acertos, valores None e limite de bytes."""
+from utils.cache_relatorio import CacheLRU
+
+def _contador():
+    chamadas = []
+    def construir(valor):
+        chamadas.append(valor)
+        return valor
+    return chamadas, construir
+
+def test_valor_guardado_e_reaproveitado():
+    cache = CacheLRU(1024)
+    chamadas, construir = _contador()
+    for _ in range(3):
+        assert cache.obter("k", lambda: construir([1, 2])) == [1, 2]
+    assert len(chamadas) == 1
+    assert (cache.hits, cache.misses) == (2, 1)
+
+def test_none_guardado_conta_como_acerto():
+    # seções sem dados (rentabilidade, projeção) devolvem None
+    cache = CacheLRU(1024)
+    chamadas, construir = _contador()
+    for _ in range(3):
+        assert cache.obter("sem_dados", lambda: construir(None)) is None
+    assert len(chamadas) == 1
+    assert (cache.hits, cache.misses) == (2, 1)
+
+def test_consultar_chave_ausente_devolve_none():
+    cache = CacheLRU(1024)
+    assert cache.consultar("nada") is None
+    cache.obter("k", lambda: 5)
+    assert cache.consultar("k") == 5
+
+def test_limite_de_bytes_remove_os_mais_antigos():
+    cache = CacheLRU(100)
+    for i in range(4):
+        cache.obter(f"k{i}", lambda: b"x" * 40, medir=len)
+    assert cache.consultar("k0") is None and cache.consultar("k1") is None
+    assert cache.consultar("k3") == b"x" * 40
@@ -0,0 +1,18 @@
+# tests/test_concorrencia_pdf.py
+"""
+Relatórios gerados em paralelo não podem trocar cabeçalhos: cada página do
+corpo traz o cliente/assessor do próprio relatório.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.concorrencia_pdf import cabecalhos_trocados, gerar_relatorio
+
+RELATORIOS = 16
+THREADS = 8
+
+def test_cabecalhos_nao_se_misturam_entre_threads():
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        pdfs = list(pool.map(gerar_relatorio, range(RELATORIOS)))
+
+    erros = [e for i, pdf in enumerate(pdfs) for e in cabecalhos_trocados(i, pdf)]
+    assert not erros, "\n".join(erros)
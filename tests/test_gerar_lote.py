@@ -0,0 +1,65 @@
+# tests/test_gerar_lote.py
+"""
+gerar_lote com --data: o mesmo manifesto gera o mesmo PDF byte a byte,
+qualquer que seja o dia em que roda.
+"""
+import json
+from datetime import date, datetime
+
+import pandas as pd
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+import gerar_lote
+from utils import pipeline_carteira
+
+# sem liquidez na base: estimada pelo vencimento no nome (MMM/AAAA)
+ATIVOS = {
+    "Pós Fixado": [("CDB BANCO X - JAN/2027", "120.000,00"), ("TESOURO SELIC 2029", "80.000,00")],
+    "Inflação": [("CRA EMPRESA Y - OUT/2030", "60.000,00")],
+}
+
+def _extrato(caminho):
+    """Extrato mínimo no layout XPerformance."""
+    c = canvas.Canvas(str(caminho), pagesize=A4)
+    linhas = ["POSIÇÃO DETALHADA DOS ATIVOS", "Estratégia Saldo Bruto Qtd. Mês %CDI Ano %CDI 24M %CDI"]
+    for classe, ativos in ATIVOS.items():
+        linhas.append(f"{classe} R$ 0,00")
+        linhas += [f"{nome} R$ {valor} 10,00 0,90 98,00 9,50 101,00 20,10 99,00" for nome, valor in ativos]
+    for i, linha in enumerate(linhas):
+        c.drawString(30, 800 - 14 * i, linha)
+    c.showPage()
+    c.save()
+
+def _dia_fixo(dia: date):
+    class _Data(date):
+        @classmethod
+        def today(cls):
+            return dia
+    return _Data
+
+def test_mesma_data_gera_o_mesmo_pdf_em_dias_diferentes(tmp_path, monkeypatch):
+    (tmp_path / "extratos").mkdir()
+    _extrato(tmp_path / "extratos" / "cliente.pdf")
+    manifesto = [{"cliente": "Cliente Teste", "assessor": "Assessor", "pdfs": ["extratos/cliente.pdf"],
+                  "modelo": "Moderada", "aporte": "10.000,00"}]
+    (tmp_path / "manifesto.json").write_text(json.dumps(manifesto), encoding="utf-8")
+    itens = json.loads((tmp_path / "manifesto.json").read_text(encoding="utf-8"))
+
+    pdfs = []
+    for dia in (date(2025, 3, 1), date(2026, 9, 30)):
+        monkeypatch.setattr(pipeline_carteira, "date", _dia_fixo(dia))
+        saida = tmp_path / f"saida_{dia.isoformat()}"
+        saida.mkdir()
+        for i, item in enumerate(itens, start=1):
+            r = gerar_lote.processar_cliente(i, item, str(tmp_path), str(saida), agora=datetime(2025, 1, 15))
+            pdfs.append((saida / f"{r['arquivo']}.pdf").read_bytes())
+
+    assert pdfs[0] == pdfs[1]
+
+def test_liquidez_pelo_nome_depende_da_data():
+    # garante que o teste acima exercita um cálculo que muda com o dia
+    ativos = pd.DataFrame({"estrategia": ["CDB BANCO X - JAN/2027"], "classificacao": ["Pós Fixado"]})
+    liquidez = [pipeline_carteira.classificar_ativos(ativos, hoje=dia)["Liquidez"].iloc[0]
+                for dia in (date(2025, 1, 15), date(2026, 10, 19))]
+    assert liquidez[0] != liquidez[1]
@@ -0,0 +1,18 @@
+# tests/test_golden_pdf.py
+"""
+Regressão byte a byte do relatório: o sha256 de cada caso de
+benchmarks/golden_pdf.py tem de bater com o de golden_pdf.json. Mudança
+intencional na saída: regravar com `python -m benchmarks.golden_pdf --atualizar`.
+"""
+import pytest
+
+from benchmarks.golden_pdf import CASOS, carregar_golden, hash_caso, versoes
+
+GOLDEN = carregar_golden()
+
+@pytest.mark.parametrize("nome", list(CASOS))
+def test_hash_do_pdf_igual_ao_golden(nome):
+    if GOLDEN["versoes"] != versoes():
+        pytest.skip(f"hashes gravados com {GOLDEN['versoes']}, rodando com {versoes()}")
+    assert hash_caso(nome) == GOLDEN["hashes"][nome], \
+        f"{nome}: PDF diferente do golden (mudança intencional? rode benchmarks.golden_pdf --atualizar)"
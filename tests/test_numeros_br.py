@@ -0,0 +1,57 @@
+# tests/test_numeros_br.py
+"""Versões de coluna (formatar_serie_br, ler_serie_br) iguais às de um valor nos casos de borda."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.numeros_br import formatar_br, formatar_serie_br, ler_br, ler_serie_br
+
+BORDAS_FORMATAR = [
+    # nulos, negativos, zero com sinal, enormes e não finitos
+    pd.Series([0.0, -0.0, 1234567.891, -1234567.891, 999.995, 1e16, -1e-9, np.nan, np.inf, -np.inf]),
+    # empates em ,xx5: o float guardado decide (0.125 é exato e vai ao par; 1.005 fica abaixo)
+    pd.Series([0.005, -0.005, 0.125, 0.375, 1.005, 2.675, 1234.565, 0.5, 1.5, 2.5]),
+    pd.Series([1, -2, 0, 10**12]),
+    pd.Series([], dtype=float),
+    pd.Series([1.5, None, "x", "2,5", True, np.nan], dtype=object),
+]
+BORDAS_LER = pd.Series(
+    ["nan", "NaN", "-nan", "inf", "-Infinity", "1e400", "1_000", "", "  ", "x", "R$", "R$ 1.234,56",
+     "1.234", "1.5", "12,5%", "-3,2", ".5", "1.2.3", None, np.nan, 7, 2.5, True, "True"],
+    dtype=object,
+)
+
+@pytest.mark.parametrize("serie", BORDAS_FORMATAR)
+@pytest.mark.parametrize("casas, sufixo", [(2, ""), (0, "%"), (1, ""), (3, " pp"), (4, "")])
+def test_formatar_serie_igual_a_formatar_br(serie, casas, sufixo):
+    esperado = [formatar_br(x, casas, sufixo) for x in serie]
+    assert formatar_serie_br(serie, casas, sufixo).tolist() == esperado
+
+def test_formatar_serie_aleatoria_igual_a_formatar_br():
+    rng = np.random.default_rng(1)
+    valores = pd.Series(np.round(rng.lognormal(5, 4, 20_000) * rng.choice([-1, 1], 20_000), 3))
+    for casas in (0, 2, 3):
+        assert formatar_serie_br(valores, casas).tolist() == [formatar_br(x, casas) for x in valores]
+
+def test_formatar_serie_nulo():
+    serie = pd.Series([1234.5, np.nan, None, -0.004], dtype=float)
+    assert formatar_serie_br(serie, nulo="-").tolist() == ["1.234,50", "-", "-", "-0,00"]
+    assert formatar_serie_br(serie, sufixo="%", nulo="").tolist() == ["1.234,50%", "", "", "-0,00%"]
+    mista = pd.Series([2.5, None, "x"], dtype=object)
+    assert formatar_serie_br(mista, nulo="-").tolist() == ["2,50", "-", "x"]
+
+def test_formatar_serie_mantem_indice():
+    serie = pd.Series([1.0, 0.125, np.nan], index=["a", "b", "c"])
+    texto = formatar_serie_br(serie)
+    assert texto.index.tolist() == ["a", "b", "c"]
+    assert texto.tolist() == ["1,00", "0,12", "nan"]
+
+@pytest.mark.parametrize("padrao", [0.0, None])
+@pytest.mark.parametrize("ponto_milhar", [False, True])
+def test_ler_serie_igual_a_ler_br(padrao, ponto_milhar):
+    esperado = np.array([ler_br(x, padrao, ponto_milhar) for x in BORDAS_LER], dtype=float)
+    np.testing.assert_array_equal(ler_serie_br(BORDAS_LER, padrao, ponto_milhar).to_numpy(), esperado)
+    # coluna só de texto (dtype str), como vem do st.data_editor
+    texto = BORDAS_LER[BORDAS_LER.map(lambda x: isinstance(x, str))].astype("str")
+    np.testing.assert_array_equal(ler_serie_br(texto, padrao, ponto_milhar).to_numpy(),
+                                  np.array([ler_br(x, padrao, ponto_milhar) for x in texto], dtype=float))
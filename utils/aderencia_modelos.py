@@ -0,0 +1,66 @@
+# utils/aderencia_modelos.py
+import numpy as np
+import pandas as pd
+
+COLUNAS_ADERENCIA = [
+    "Modelo",
+    "Desvio L1 (p.p.)",
+    "Desvio Quadrático (p.p.)",
+    "Giro Necessário (R$)",
+    "Giro (% PL)",
+    "Absorção do Aporte (%)",
+]
+
+def avaliar_modelos(valores_por_classe: pd.Series, modelos: dict, aporte: float = 0.0) -> pd.DataFrame:
+    """
+    Compara a carteira atual com vários modelos de uma só vez.
+
+    `valores_por_classe` é a Série Classificação -> R$ da carteira atual e
+    `modelos` um dict nome -> {Classificação: %}. Monta a matriz modelos x
+    classes e calcula, por modelo:
+      - Desvio L1: soma dos |peso modelo - peso atual|, em p.p.;
+      - Desvio Quadrático: norma euclidiana dos mesmos desvios, em p.p.;
+      - Giro Necessário: R$ a resgatar para atingir o modelo (base = PL + aporte);
+      - Absorção do Aporte: % das compras necessárias cobertas pelo aporte.
+    Retorna as linhas ordenadas do modelo mais aderente para o menos aderente.
+    """
+    if not modelos:
+        return pd.DataFrame(columns=COLUNAS_ADERENCIA)
+
+    valores_por_classe = pd.to_numeric(valores_por_classe, errors="coerce").fillna(0.0)
+    valores_por_classe = valores_por_classe.groupby(level=0, observed=True).sum()
+    nomes = list(modelos.keys())
+    classes = list(dict.fromkeys(
+        list(valores_por_classe.index) + [c for m in modelos.values() for c in m.keys()]
+    ))
+
+    atual = valores_por_classe.reindex(classes, fill_value=0.0).to_numpy(dtype=float)
+    pesos_modelo = pd.DataFrame.from_records(
+        [{c: float(p) for c, p in modelos[n].items()} for n in nomes], columns=classes
+    ).fillna(0.0).to_numpy(dtype=float) / 100.0
+
+    aporte = max(float(aporte or 0.0), 0.0)
+    total = float(atual.sum())
+    pesos_atual = atual / total if total else np.zeros_like(atual)
+
+    desvio = pesos_modelo - pesos_atual                    # (modelos x classes)
+    l1 = np.abs(desvio).sum(axis=1) * 100.0
+    quadratico = np.sqrt((desvio ** 2).sum(axis=1)) * 100.0
+
+    delta = pesos_modelo * (total + aporte) - atual        # + compra / - resgate
+    compras = np.clip(delta, 0.0, None).sum(axis=1)
+    resgates = np.clip(-delta, 0.0, None).sum(axis=1)
+    giro_pct = resgates / total * 100.0 if total else np.zeros_like(resgates)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        absorcao = np.where(compras > 0.005, np.minimum(aporte, compras) / compras * 100.0, 100.0)
+
+    res = pd.DataFrame({
+        "Modelo": nomes,
+        "Desvio L1 (p.p.)": l1,
+        "Desvio Quadrático (p.p.)": quadratico,
+        "Giro Necessário (R$)": resgates,
+        "Giro (% PL)": giro_pct,
+        "Absorção do Aporte (%)": absorcao,
+    })
+    return (res.sort_values(["Desvio L1 (p.p.)", "Giro Necessário (R$)"], kind="stable")
+               .reset_index(drop=True))
@@ -0,0 +1,88 @@
+# utils/artefatos.py
+"""
+Arquivos gerados para download (PDF, Excel), compartilhados por todas as
+sessões do processo: ficam em disco, indexados pelo hash das entradas, com
+limite total de bytes e validade contada desde o último uso. A memória do
+servidor não cresce com a duração das sessões nem com o número de usuários.
+"""
+import atexit
+import os
+import shutil
+import tempfile
+import threading
+from dataclasses import dataclass
+
+from utils.cache_relatorio import CacheLRU
+
+MAX_BYTES_ARTEFATOS = 256 * 1024 * 1024
+TTL_ARTEFATOS = 60 * 60  # segundos sem uso até o arquivo ser apagado
+
+@dataclass(frozen=True)
+class Artefato:
+    caminho: str
+    tamanho: int  # bytes
+
+    def ler(self) -> bytes:
+        with open(self.caminho, "rb") as f:
+            return f.read()
+
+_PASTA = None
+_PASTA_LOCK = threading.Lock()
+
+def _pasta() -> str:
+    global _PASTA
+    with _PASTA_LOCK:
+        if _PASTA is None:
+            _PASTA = tempfile.mkdtemp(prefix="consolidador_artefatos_")
+            atexit.register(shutil.rmtree, _PASTA, True)
+        return _PASTA
+
+def _apagar(artefato: Artefato):
+    try:
+        os.remove(artefato.caminho)
+    except FileNotFoundError:
+        pass
+
+ARTEFATOS = CacheLRU(MAX_BYTES_ARTEFATOS, ttl=TTL_ARTEFATOS, ao_remover=_apagar)
+
+def gravar(escrever, sufixo: str) -> Artefato:
+    """Cria um arquivo com escrever(arquivo_binário) e devolve o Artefato."""
+    fd, caminho = tempfile.mkstemp(suffix=sufixo, dir=_pasta())
+    try:
+        with os.fdopen(fd, "wb") as arquivo:
+            escrever(arquivo)
+    except BaseException:
+        os.remove(caminho)
+        raise
+    return Artefato(caminho, os.path.getsize(caminho))
+
+def _usar(chave: str, escrever, sufixo: str, usar):
+    """
+    usar(artefato de `chave`), gerando-o com escrever(arquivo) se preciso.
+    Um arquivo maior que o limite do repositório não fica guardado (nem é
+    apagado pela LRU): é apagado aqui, logo depois do uso.
+    """
+    a = ARTEFATOS.obter(chave, lambda: gravar(escrever, sufixo), medir=lambda a: a.tamanho)
+    try:
+        return usar(a)
+    finally:
+        if ARTEFATOS.consultar(chave) is not a:
+            _apagar(a)
+
+def preparar(chave: str, escrever, sufixo: str) -> bool:
+    """Gera e guarda o artefato de `chave`; False se ele não coube no repositório."""
+    return _usar(chave, escrever, sufixo, lambda a: ARTEFATOS.consultar(chave) is a)
+
+def artefato_pronto(chave: str):
+    """Artefato de `chave` se já estiver guardado, senão None."""
+    return ARTEFATOS.consultar(chave)
+
+def conteudo(chave: str, escrever, sufixo: str) -> bytes:
+    """
+    Bytes do artefato de `chave`, gerando-o se preciso. É o que os botões de
+    download chamam no clique: eles guardam só a chave, nunca os bytes.
+    """
+    try:
+        return _usar(chave, escrever, sufixo, Artefato.ler)
+    except FileNotFoundError:  # expirou entre a consulta e a leitura
+        return _usar(chave, escrever, sufixo, Artefato.ler)
@@ -0,0 +1,141 @@
+# utils/cache_relatorio.py
+import hashlib
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+# Limites padrão dos caches compartilhados do relatório
+MAX_BYTES_GRAFICOS = 32 * 1024 * 1024
+MAX_BYTES_SECOES = 64 * 1024 * 1024
+
+# chave ausente (None é um valor válido para guardar: seção sem dados)
+_AUSENTE = object()
+
+def chave_conteudo(*partes) -> str:
+    """
+    Hash do conteúdo (séries, cores, tabelas, tamanho) — mesma entrada, mesma
+    chave. DataFrames/Series entram pelo conteúdo completo, não pelo repr.
+    """
+    h = hashlib.sha256()
+    for parte in partes:
+        if isinstance(parte, (pd.DataFrame, pd.Series)):
+            cols = list(parte.columns) if isinstance(parte, pd.DataFrame) else [parte.name]
+            h.update(repr(cols).encode("utf-8"))
+            h.update(pd.util.hash_pandas_object(parte.astype(str), index=True).to_numpy().tobytes())
+        else:
+            h.update(repr(parte).encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+def tamanho_serializado(valor) -> int:
+    """Bytes ocupados pelo valor serializado (Drawing só com formas simples, linhas de tabela)."""
+    return len(pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL))
+
+class CacheLRU:
+    """
+    LRU limitada pelo total de bytes e segura para uso entre threads/sessões.
+    Os valores devem ser tratados como somente leitura por quem os recebe.
+
+    Com `ttl` (segundos), itens sem uso há mais tempo que isso expiram.
+    `ao_remover(valor)` é chamado (fora do lock) para cada valor que sai do
+    cache ou que é descartado porque outra thread guardou a mesma chave antes.
+    """
+    def __init__(self, max_bytes: int, ttl: float = None, ao_remover=None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.ao_remover = ao_remover
+        self._itens = OrderedDict()   # chave -> (valor, bytes, último uso)
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _retirar(self, chave: str, removidos: list):
+        valor, tamanho, _ = self._itens.pop(chave)
+        self._bytes -= tamanho
+        removidos.append(valor)
+
+    def _podar(self, agora: float, removidos: list):
+        # a ordem da LRU é a do último uso: os expirados estão todos no início
+        while self._itens:
+            chave, (_, _, uso) = next(iter(self._itens.items()))
+            if self._bytes <= self.max_bytes and (self.ttl is None or agora - uso <= self.ttl):
+                break
+            self._retirar(chave, removidos)
+
+    def _descartar(self, removidos: list):
+        if self.ao_remover is not None:
+            for valor in removidos:
+                self.ao_remover(valor)
+
+    def _consultar(self, chave: str, removidos: list):
+        agora = time.monotonic()
+        self._podar(agora, removidos)
+        item = self._itens.get(chave)
+        if item is None:
+            return _AUSENTE
+        self._itens[chave] = (item[0], item[1], agora)
+        self._itens.move_to_end(chave)
+        return item[0]
+
+    def consultar(self, chave: str):
+        """Valor guardado em `chave` (None se não houver), sem construir."""
+        removidos = []
+        with self._lock:
+            valor = self._consultar(chave, removidos)
+        self._descartar(removidos)
+        return None if valor is _AUSENTE else valor
+
+    def obter(self, chave: str, construir, medir=tamanho_serializado):
+        removidos = []
+        with self._lock:
+            valor = self._consultar(chave, removidos)
+            if valor is not _AUSENTE:
+                self.hits += 1
+            else:
+                self.misses += 1
+        self._descartar(removidos)
+        if valor is not _AUSENTE:
+            return valor
+
+        valor = construir()          # fora do lock: outras threads seguem usando o cache
+        tamanho = medir(valor)
+        removidos = []
+        with self._lock:
+            existente = self._itens.get(chave)
+            if existente is not None:
+                removidos.append(valor)
+                valor = existente[0]
+            elif tamanho <= self.max_bytes:
+                self._itens[chave] = (valor, tamanho, time.monotonic())
+                self._bytes += tamanho
+                self._podar(time.monotonic(), removidos)
+        self._descartar(removidos)
+        return valor
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                "itens": len(self._itens),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "taxa_acerto": (self.hits / consultas) if consultas else 0.0,
+            }
+
+    def limpar(self):
+        with self._lock:
+            removidos = [valor for valor, _, _ in self._itens.values()]
+            self._itens.clear()
+            self._bytes = 0
+            self.hits = self.misses = 0
+        self._descartar(removidos)
+
+# Caches do processo, compartilhados por todas as sessões
+CACHE_GRAFICOS = CacheLRU(MAX_BYTES_GRAFICOS)   # Drawings vetoriais
+CACHE_SECOES = CacheLRU(MAX_BYTES_SECOES)       # dados preparados de cada seção do PDF
@@ -0,0 +1,98 @@
+# utils/carteira_sessao.py
+"""
+Carteira guardada na sessão do Streamlit (st.session_state.ativos_df): uma
+tabela colunar tipada — categorias para os textos repetidos, float64 para
+os números, id inteiro estável por ativo — em vez de uma lista de dicts.
+As etapas leem o DataFrame direto, sem reconverter a cada rerun.
+"""
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from utils.cache_relatorio import CACHE_SECOES, chave_conteudo
+from utils.pipeline_carteira import distribuicao
+
+COLUNA_ID = "id_ativo"
+# textos com poucos valores distintos
+COLUNAS_CATEGORIA = ["Classificação", "classificacao", "Banco", "Liquidez"]
+COLUNAS_NUMERO = [
+    "saldo_bruto", "quantidade", "valor_atual", "Novo Valor", "Valor Realocado",
+    "rentabilidade_mes_atual", "porcentagem_cdi_mes_atual", "rentabilidade_ano",
+    "porcentagem_cdi_ano", "rentabilidade_24m", "porcentagem_cdi_24m",
+]
+
+def _tipar(coluna: pd.Series, nome: str) -> pd.Series:
+    if nome in COLUNAS_NUMERO:
+        return pd.to_numeric(coluna, errors="coerce").astype("float64")
+    if nome in COLUNAS_CATEGORIA:
+        return coluna if isinstance(coluna.dtype, pd.CategoricalDtype) else coluna.astype("category")
+    if coluna.dtype == object:
+        tipo = pd.api.types.infer_dtype(coluna, skipna=True)
+        if tipo in ("string", "empty"):
+            return coluna.astype("str")
+        if tipo in ("floating", "integer", "mixed-integer-float"):
+            return coluna.astype("float64")
+    return coluna
+
+def tabela_carteira(ativos) -> pd.DataFrame:
+    """
+    Tabela tipada a partir de um DataFrame ou de uma lista de dicts. Ativos
+    que já têm id o mantêm; os novos (ou com id repetido) recebem o próximo.
+    """
+    df = pd.DataFrame(ativos).reset_index(drop=True)
+    df = pd.DataFrame({c: _tipar(df[c], c) for c in df.columns}, index=df.index)
+
+    ids = pd.to_numeric(df[COLUNA_ID], errors="coerce") if COLUNA_ID in df.columns \
+        else pd.Series(np.nan, index=df.index)
+    sem_id = ids.isna() | ids.duplicated()
+    if sem_id.any():
+        proximo = int(ids.max()) + 1 if ids.notna().any() else 0
+        ids[sem_id] = np.arange(proximo, proximo + int(sem_id.sum()))
+    df[COLUNA_ID] = ids.astype("int64")
+    return df
+
+def carteira(sessao) -> pd.DataFrame:
+    """
+    Carteira de `sessao` (st.session_state); DataFrame vazio se não houver.
+    É a própria tabela da sessão: copie antes de alterar.
+    """
+    ativos = sessao.get("ativos_df")
+    if ativos is None:
+        return pd.DataFrame()
+    if isinstance(ativos, pd.DataFrame):
+        return ativos
+    return tabela_carteira(ativos)  # lista de dicts de sessões antigas
+
+def guardar_carteira(sessao, ativos) -> pd.DataFrame:
+    """
+    Grava em `sessao` a tabela tipada de `ativos`. A versão da carteira só
+    avança quando o conteúdo muda.
+    """
+    tabela = tabela_carteira(ativos)
+    anterior = sessao.get("ativos_df")
+    if not isinstance(anterior, pd.DataFrame) or not tabela.equals(anterior):
+        sessao["versao_carteira"] = sessao.get("versao_carteira", 0) + 1
+    sessao["ativos_df"] = tabela
+    return tabela
+
+def versao_carteira(sessao) -> str:
+    """
+    Identifica a carteira de `sessao` sem ler a tabela (id da sessão + versão),
+    para chaves de cache: muda sempre que guardar_carteira grava algo novo.
+    """
+    if "id_sessao_carteira" not in sessao:
+        sessao["id_sessao_carteira"] = uuid.uuid4().hex
+    return f"{sessao['id_sessao_carteira']}:{sessao.get('versao_carteira', 0)}"
+
+def distribuicao_carteira(sessao, valor_col: str = "saldo_bruto") -> pd.DataFrame:
+    """
+    distribuicao() da carteira de `sessao` por `valor_col`, guardada no cache
+    de seções pela versão da carteira: a tabela não é hasheada a cada rerun.
+    """
+    chave = chave_conteudo("distribuicao", versao_carteira(sessao), valor_col)
+    return CACHE_SECOES.obter(chave, lambda: distribuicao(carteira(sessao), valor_col)).copy()
+
+def memoria_kb(df: pd.DataFrame) -> float:
+    """Memória ocupada pela tabela (KB, incluindo o conteúdo dos textos)."""
+    return df.memory_usage(deep=True).sum() / 1024
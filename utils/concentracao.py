@@ -0,0 +1,91 @@
+# utils/concentracao.py
+import re
+import numpy as np
+import pandas as pd
+
+from utils.numeros_br import formatar_br
+
+# Limites de concentração (em % do patrimônio, exceto HHI na escala 0–10.000)
+LIMITES_CONCENTRACAO = {
+    "hhi_max":         2500,
+    "top_n":           5,
+    "top_n_max_pct":   60.0,
+    "ativo_max_pct":   20.0,
+    "emissor_max_pct": 15.0,
+    "banco_max_pct":   100.0,  # 100 = sem limite por banco
+}
+
+# Produtos de crédito bancário/privado cujo emissor aparece no nome do ativo
+_RE_EMISSOR = re.compile(
+    r"^(?:CDB|LCA|LCI|LCD|LC|LFSN|LFS|LF|CRI|CRA|DEB[EÊ]NTURES?|DEB)\s*-?\s+"
+    r"(?P<emissor>.+?)"
+    r"(?:\s+-\s+.*|\s+[A-Za-z]{3}/\d{4}.*|\s+\d{2}/\d{2}/\d{4}.*)?$",
+    flags=re.IGNORECASE,
+)
+
+def extrair_emissor(estrategias: pd.Series) -> pd.Series:
+    """Emissor de CDB/LCA/LCI/LF/CRI/CRA/debêntures a partir do nome; NaN nos demais."""
+    emissor = estrategias.astype(str).str.strip().str.extract(_RE_EMISSOR)["emissor"]
+    return emissor.str.upper().str.strip()
+
+def metricas_concentracao(ativos_df: pd.DataFrame, valor_col: str = "saldo_bruto",
+                          top_n: int = LIMITES_CONCENTRACAO["top_n"]) -> dict:
+    """
+    Métricas de concentração da carteira ponderadas por `valor_col`.
+
+    Agrupa por ativo uma única vez (somando posições repetidas em bancos
+    diferentes) e deriva dessa tabela o HHI, a participação dos `top_n`
+    maiores ativos, a exposição por emissor e por banco. Percentuais em %.
+    """
+    vazio = {"hhi": 0.0, "top_n_pct": 0.0, "maior_ativo": ("", 0.0),
+             "emissores": pd.Series(dtype=float), "bancos": pd.Series(dtype=float)}
+    if ativos_df.empty or valor_col not in ativos_df.columns:
+        return vazio
+
+    base = pd.DataFrame({
+        "estrategia": ativos_df["estrategia"].astype(str),
+        "valor": pd.to_numeric(ativos_df[valor_col], errors="coerce").fillna(0.0).clip(lower=0.0),
+        "Banco": ativos_df["Banco"].astype(object).fillna("").astype(str) if "Banco" in ativos_df.columns else "",
+    })
+    total = float(base["valor"].sum())
+    if not total:
+        return vazio
+
+    por_ativo = base.groupby("estrategia", sort=False)["valor"].sum()
+    pesos = por_ativo.to_numpy() / total
+    ordem = np.argsort(pesos)[::-1]
+
+    emissores = (por_ativo.groupby(extrair_emissor(por_ativo.index.to_series()).to_numpy())
+                          .sum().div(total / 100.0).sort_values(ascending=False))
+    bancos = (base.loc[base["Banco"] != ""].groupby("Banco")["valor"]
+                  .sum().div(total / 100.0).sort_values(ascending=False))
+
+    return {
+        "hhi": float((pesos ** 2).sum() * 10_000),
+        "top_n_pct": float(pesos[ordem[:top_n]].sum() * 100.0),
+        "maior_ativo": (por_ativo.index[ordem[0]], float(pesos[ordem[0]] * 100.0)),
+        "emissores": emissores,
+        "bancos": bancos,
+    }
+
+def _pct(v: float) -> str:
+    return formatar_br(v, sufixo="%")
+
+def verificar_limites(metricas: dict, limites: dict = LIMITES_CONCENTRACAO) -> list:
+    """Mensagens (pt-BR) para cada limite de concentração ultrapassado."""
+    alertas = []
+    if metricas["hhi"] > limites["hhi_max"]:
+        alertas.append(f"HHI de {formatar_br(metricas['hhi'], 0)} acima do limite de {formatar_br(limites['hhi_max'], 0)}.")
+    if metricas["top_n_pct"] > limites["top_n_max_pct"]:
+        alertas.append(f"Os {limites['top_n']} maiores ativos somam {_pct(metricas['top_n_pct'])} "
+                       f"(limite {_pct(limites['top_n_max_pct'])}).")
+    nome, pct = metricas["maior_ativo"]
+    if pct > limites["ativo_max_pct"]:
+        alertas.append(f"{nome} representa {_pct(pct)} da carteira (limite {_pct(limites['ativo_max_pct'])}).")
+    for emissor, pct in metricas["emissores"].items():
+        if pct > limites["emissor_max_pct"]:
+            alertas.append(f"Exposição ao emissor {emissor} de {_pct(pct)} (limite {_pct(limites['emissor_max_pct'])}).")
+    for banco, pct in metricas["bancos"].items():
+        if pct > limites["banco_max_pct"]:
+            alertas.append(f"{_pct(pct)} da carteira no banco {banco} (limite {_pct(limites['banco_max_pct'])}).")
+    return alertas
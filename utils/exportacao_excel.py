@@ -0,0 +1,77 @@
+# utils/exportacao_excel.py
+"""
+Planilha das carteiras inicial e sugerida com células numéricas (somáveis
+no Excel). Escrita linha a linha pelo xlsxwriter em constant_memory: o uso
+de memória não cresce com o número de ativos.
+"""
+import io
+import os
+
+import pandas as pd
+import xlsxwriter
+
+FORMATO_VALOR = "#,##0.00"    # exibido como 1.234,56 no Excel em pt-BR
+FORMATO_PERCENTUAL = "0.00%"
+
+# aba -> (coluna de valor, título do valor, título do percentual)
+ABAS = {
+    "Carteira Inicial": ("valor_atual", "Valor Atual (R$)", "Percentual (%)"),
+    "Carteira Sugerida": ("Novo Valor", "Valor Sugerido (R$)", "Percentual Ideal (%)"),
+}
+COLUNAS_TEXTO = ["Classificação", "estrategia", "Liquidez"]
+LARGURAS = [24, 60, 18, 18, 16]
+
+def _valores(ativos_df: pd.DataFrame, coluna: str) -> pd.Series:
+    if coluna == "valor_atual" and coluna not in ativos_df.columns:
+        coluna = "saldo_bruto"
+    return pd.to_numeric(ativos_df[coluna], errors="coerce").fillna(0.0)
+
+def _textos(coluna: pd.Series) -> list:
+    return coluna.astype(str).where(coluna.notna(), "").tolist()
+
+def _escrever_aba(wb, nome: str, ativos_df: pd.DataFrame, coluna_valor: str,
+                  titulos: list, formatos: dict) -> None:
+    ws = wb.add_worksheet(nome)
+    for i, largura in enumerate(LARGURAS):
+        ws.set_column(i, i, largura)
+    ws.freeze_panes(1, 0)
+    ws.write_row(0, 0, titulos, formatos["titulo"])
+
+    valores = _valores(ativos_df, coluna_valor)
+    total = float(valores.sum())
+    ordem = ativos_df["Classificação"].astype(str).to_numpy().argsort(kind="stable")
+    textos = [_textos(ativos_df[c].iloc[ordem]) if c in ativos_df.columns
+              else [""] * len(ordem) for c in COLUNAS_TEXTO]
+    numeros = valores.iloc[ordem]
+    percentuais = (numeros / total) if total else numeros * 0.0
+
+    # constant_memory: cada linha é gravada em disco ao passar para a próxima
+    fmt_valor, fmt_pct = formatos["valor"], formatos["percentual"]
+    for linha, (cls, ativo, liq, valor, pct) in enumerate(
+            zip(*textos, numeros.tolist(), percentuais.tolist()), start=1):
+        ws.write_string(linha, 0, cls)
+        ws.write_string(linha, 1, ativo)
+        ws.write_string(linha, 2, liq)
+        ws.write_number(linha, 3, valor, fmt_valor)
+        ws.write_number(linha, 4, pct, fmt_pct)
+
+def escrever_excel_carteiras(destino, ativos_df: pd.DataFrame) -> None:
+    """Grava as abas 'Carteira Inicial' e 'Carteira Sugerida' em `destino` (caminho ou arquivo binário)."""
+    if isinstance(destino, os.PathLike):
+        destino = os.fspath(destino)
+    wb = xlsxwriter.Workbook(destino, {"constant_memory": True})
+    formatos = {
+        "titulo": wb.add_format({"bold": True}),
+        "valor": wb.add_format({"num_format": FORMATO_VALOR}),
+        "percentual": wb.add_format({"num_format": FORMATO_PERCENTUAL}),
+    }
+    for nome, (coluna, titulo_valor, titulo_pct) in ABAS.items():
+        _escrever_aba(wb, nome, ativos_df, coluna,
+                      COLUNAS_TEXTO + [titulo_valor, titulo_pct], formatos)
+    wb.close()
+
+def gerar_excel_carteiras(ativos_df: pd.DataFrame) -> bytes:
+    """escrever_excel_carteiras em memória."""
+    output = io.BytesIO()
+    escrever_excel_carteiras(output, ativos_df)
+    return output.getvalue()
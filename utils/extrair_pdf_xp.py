@@ -1,6 +1,7 @@
 from PyPDF2 import PdfReader
 import re
 import pandas as pd
+from utils.numeros_br import ler_br
 
 def extrair_texto_ativos(file):
     reader = PdfReader(file)
@@ -23,7 +24,10 @@ def extrair_texto_ativos(file):
     return texto_total
 
 def limpar_num(n):
-    return float(n.replace(".", "").replace(",", "."))
+    v = ler_br(n, padrao=None, ponto_milhar=True)
+    if v is None:
+        raise ValueError(f"número inválido: {n!r}")
+    return v
 
 def parse_ativos(texto):
     classificacoes_validas = [
@@ -1,40 +1,49 @@
 # utils/geracao_pdf.py
 from reportlab.platypus import (
     BaseDocTemplate, PageTemplate, Frame,
-    Table, TableStyle, Paragraph, Spacer, Image, PageBreak
+    Table, LongTable, TableStyle, Paragraph, Spacer, PageBreak
 )
 from reportlab.platypus import Table as InnerTable
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_LEFT
-from reportlab.lib.utils import ImageReader
 import pandas as pd
+import numpy as np
 import io
 import os
 import unicodedata
-import re
+import threading
+import functools
 from PyPDF2 import PdfReader, PdfWriter
-from datetime import datetime
-from reportlab.platypus.flowables import KeepInFrame
+from datetime import date, datetime
+from dataclasses import dataclass
 from reportlab.pdfbase import pdfmetrics 
+from reportlab import rl_config
 
-# === Matplotlib (headless)
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
+# === Gráficos vetoriais (reportlab.graphics)
+from reportlab.graphics.shapes import Drawing, String, Group, UserNode
+from reportlab.graphics.charts.piecharts import Pie
+from reportlab.graphics.charts.barcharts import HorizontalBarChart
+from reportlab.graphics import renderPDF
 
 from utils.cores import PALETTE
-
-from reportlab.platypus.flowables import KeepInFrame, Flowable
-from reportlab.lib.utils import ImageReader
-
-class StretchToBottomImage(Flowable):
-    """Desenha a imagem ocupando exatamente o espaço disponível do frame."""
-    def __init__(self, img_bytes, min_height=90, vpad=0):
+from utils.rentabilidade import comparar_rentabilidade, CAMPOS_RENTABILIDADE
+from utils.simulacao import simular_carteiras, resumo_simulacao
+from utils.cache_relatorio import CACHE_GRAFICOS, CACHE_SECOES, chave_conteudo
+from utils.numeros_br import formatar_br, formatar_serie_br, ler_br, ler_serie_br
+from utils.liquidez import FAIXAS_LIQUIDEZ, MARCOS_ESCADA, valor_por_faixa, prazos_liquidez, escada_liquidez
+from utils.recursos import imagem
+from utils.otimizacao_pdf import otimizar_paginas
+from utils.perfil_geracao import SEM_PERFIL
+
+from reportlab.platypus.flowables import Flowable
+
+class StretchToBottomDrawing(Flowable):
+    """Desenha o gráfico vetorial ocupando exatamente o espaço disponível do frame."""
+    def __init__(self, make_drawing, min_height=90, vpad=0):
         super().__init__()
-        self._img_bytes = img_bytes
-        self._img = ImageReader(img_bytes)
+        self._make_drawing = make_drawing  # (largura, altura) -> Drawing
         self.min_height = min_height
         self.vpad = vpad
         self._w = 0
@@ -49,16 +58,63 @@ class StretchToBottomImage(Flowable):
         return self._w, self._h
 
     def draw(self):
-        self.canv.drawImage(self._img, 0, 0, width=self._w, height=self._h,
-                            preserveAspectRatio=False, mask='auto')
+        renderPDF.draw(self._make_drawing(self._w, self._h), self.canv, 0, 0)
+
+
+class DesenhoCompartilhado(Flowable):
+    """
+    Envolve um Drawing do cache de gráficos. O mesmo Drawing pode estar em
+    vários relatórios ao mesmo tempo, então ele nunca entra direto na story
+    (o Flowable guarda o canvas em self.canv durante o desenho).
+    """
+    def __init__(self, drawing):
+        super().__init__()
+        self._drawing = drawing
+        self.width, self.height = drawing.width, drawing.height
+
+    def wrap(self, availWidth, availHeight):
+        return self.width, self.height
+
+    def draw(self):
+        renderPDF.draw(self._drawing, self.canv, 0, 0)
+
 
+class DocMedido(BaseDocTemplate):
+    """
+    BaseDocTemplate que soma, no perfil da geração, o tempo de layout e
+    desenho de cada flowable na etapa marcada nele (atributo `_etapa`).
+    As partes de um flowable quebrado entre páginas herdam a etapa.
+    """
+    def __init__(self, *args, perfil=SEM_PERFIL, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._perfil = perfil
+
+    def handle_flowable(self, flowables):
+        etapa = getattr(flowables[0], "_etapa", "layout: demais elementos")
+        n = len(flowables)
+        with self._perfil.etapa(etapa):
+            super().handle_flowable(flowables)
+        for f in flowables[:len(flowables) - n + 1]:
+            if not hasattr(f, "_etapa"):
+                f._etapa = etapa
+
+def _etapa(flowable, nome: str):
+    """Marca o flowable com a etapa do perfil em que seu layout é contado."""
+    flowable._etapa = nome
+    return flowable
 
 # =========================
-# Estado global (para header)
+# Contexto de renderização (header)
 # =========================
-patrimonio_total = 0.0
-CLIENTE_NOME = ""
-NOME_ASSESSOR = ""
+@dataclass(frozen=True)
+class ContextoRelatorio:
+    """Dados do cabeçalho de um relatório; um objeto por geração, lido pelos callbacks de página."""
+    cliente_nome: str = ""
+    nome_assessor: str = ""
+    data_str: str = ""
+    perfil_risco: str = "PERSONALIZADA"
+    aporte_text: str = "Sem aporte"
+    patrimonio_total: float = 0.0
 
 # Cores
 PRIMARY_COLOR = colors.HexColor("#122940")
@@ -68,11 +124,6 @@ HLINE_COLOR   = colors.HexColor("#D6DBE2")
 HEADER_BG   = colors.HexColor("#D6DBE2")
 HEADER_TEXT = colors.black
 
-# Variáveis do cabeçalho
-DATA_HOJE_STR = ""
-PERFIL_RISCO = "PERSONALIZADA"
-APORTE_TEXT = "Sem aporte"
-
 # Contato (topo direito)
 CONTACT_LINES = [
     "Av. Magalhães de Castro, 4800 – 1º andar",
@@ -87,43 +138,27 @@ CONTACT_LINES = [
 BASE_FONT = "Helvetica"
 BOLD_FONT = "Helvetica-Bold"
 
+# Fluxos do corpo só em Flate: a camada ASCII85 deixa cada fluxo ~25% maior
+rl_config.useA85 = 0
+
 # -------------------------
-# Utilidades numéricas
+# Utilidades
 # -------------------------
-def _to_float_br(series) -> pd.Series:
-    def conv(x):
-        if pd.isna(x):
-            return 0.0
-        if isinstance(x, (int, float)):
-            return float(x)
-        s = str(x).strip()
-        if s == "":
-            return 0.0
-        s = s.replace("R$", "").replace(" ", "").replace("%", "")
-        if "," in s and "." in s:
-            s = s.replace(".", "").replace(",", ".")
-        elif "," in s:
-            s = s.replace(",", ".")
-        try:
-            return float(s)
-        except Exception:
-            return 0.0
-    return series.apply(conv)
-
-def _format_number_br(valor: float) -> str:
-    try:
-        v = float(valor)
-    except Exception:
-        return str(valor)
-    s = f"{v:,.2f}"
-    return s.replace(",", "v").replace(".", ",").replace("v", ".")
-
-def _data_hoje_br() -> str:
+def _data_hoje_br(agora: datetime = None) -> str:
     meses = ["janeiro","fevereiro","março","abril","maio","junho",
              "julho","agosto","setembro","outubro","novembro","dezembro"]
-    hoje = datetime.today()
+    hoje = agora or datetime.today()
     return f"{hoje.day} de {meses[hoje.month-1]} de {hoje.year}"
 
+def _metadados(cliente_nome: str, nome_assessor: str, agora: datetime) -> dict:
+    """Info do PDF final: só entradas e a data (sem hora, produtor ou IDs variáveis)."""
+    return {
+        "/Title": f"Proposta de carteira – {cliente_nome}" if cliente_nome else "Proposta de carteira",
+        "/Author": nome_assessor or "",
+        "/CreationDate": agora.strftime("D:%Y%m%d"),
+        "/Producer": "consolidador_carteira",
+    }
+
 def _normalize_text(s: str) -> str:
     s = str(s or "").strip().lower()
     s = unicodedata.normalize("NFKD", s)
@@ -189,10 +224,101 @@ def _baseline_center(rect_y: float, rect_h: float, font_name: str, font_size: fl
 OPTICAL_FIELD = -0.6  # baixa ~0.6pt nas caixas cinza    # alteração realizada aqui
 OPTICAL_PILL  = -0.4  # baixa ~0.4pt nas pílulas          # alteração realizada aqui
 
+# -------------------------
+# Gráficos
+# -------------------------
+LIQ_BAR_COLOR = colors.HexColor("#1F77B4")
+LIQ_TEXT_COLOR = colors.HexColor("#6B7280")
+
+def _so_formas(drawing: Drawing) -> Drawing:
+    """
+    Expande widgets (Pie, barras, rótulos) até sobrarem só formas simples:
+    o resultado não depende mais do gráfico original e pode ser desenhado
+    por várias threads ao mesmo tempo.
+    """
+    expandido = drawing.expandUserNodes()
+    while _tem_widgets(expandido):
+        expandido = expandido.expandUserNodes()
+    return expandido
+
+def _tem_widgets(no) -> bool:
+    if isinstance(no, UserNode):
+        return True
+    return any(_tem_widgets(c) for c in getattr(no, "contents", ()))
+
+def _grafico_cacheado(tipo: str, construir, *partes) -> Drawing:
+    """Drawing do cache compartilhado de gráficos, pela chave do conteúdo plotado."""
+    return CACHE_GRAFICOS.obter(chave_conteudo(tipo, *partes),
+                                lambda: _so_formas(construir(*partes)))
+
+def _doughnut(sizes, colors_list, tamanho: float = 130) -> Drawing:
+    """Rosca (sentido horário a partir do topo) com as fatias em `colors_list`."""
+    d = Drawing(tamanho, tamanho)
+    dados = [max(float(v), 0.0) for v in sizes]
+    if not sum(dados):
+        return d
+    pie = Pie()
+    pie.x, pie.y = 0, 0
+    pie.width = pie.height = tamanho
+    pie.data = dados
+    pie.labels = None
+    pie.startAngle = 90
+    pie.direction = "clockwise"
+    pie.innerRadiusFraction = 0.70
+    pie.slices.strokeColor = colors.white
+    pie.slices.strokeWidth = 1
+    for i, c in enumerate(colors_list):
+        pie.slices[i].fillColor = colors.HexColor(c)
+    d.add(pie)
+    return d
+
+def _grafico_liquidez(labels, valores, largura: float, altura: float) -> Drawing:
+    """Barras horizontais por faixa de liquidez (primeira faixa no topo), valores em R$."""
+    d = Drawing(largura, altura)
+    max_v = max(valores) if valores else 0.0
+    label_w = max(pdfmetrics.stringWidth(l, BASE_FONT, 8) for l in labels)
+
+    titulo = Group(String(0, 0, "Faixa", fontName=BASE_FONT, fontSize=9,
+                          fillColor=LIQ_TEXT_COLOR, textAnchor="middle"))
+    titulo.rotate(90)
+    titulo.translate(altura / 2.0, -9)
+    d.add(titulo)
+
+    bc = HorizontalBarChart()
+    bc.x = 14 + label_w + 6
+    bc.y = 0
+    bc.width = largura - bc.x
+    bc.height = altura
+    bc.data = [list(valores)]
+    bc.barWidth, bc.groupSpacing = 7, 3           # barra = 70% da faixa
+    bc.bars[0].fillColor = LIQ_BAR_COLOR
+    bc.bars[0].strokeColor = None
+    bc.categoryAxis.categoryNames = list(labels)
+    bc.categoryAxis.reverseDirection = 1
+    bc.categoryAxis.visibleAxis = 0
+    bc.categoryAxis.visibleTicks = 0
+    bc.categoryAxis.labels.boxAnchor = "e"
+    bc.categoryAxis.labels.dx = -6
+    bc.categoryAxis.labels.fontName = BASE_FONT
+    bc.categoryAxis.labels.fontSize = 8
+    bc.categoryAxis.labels.fillColor = LIQ_TEXT_COLOR
+    bc.valueAxis.valueMin = 0
+    bc.valueAxis.valueMax = max_v * 1.15 if max_v > 0 else 1
+    bc.valueAxis.visible = 0
+    bc.barLabelFormat = lambda v: formatar_br(v) if v > 0 else ""
+    bc.barLabels.boxAnchor = "w"
+    bc.barLabels.dx = 3
+    bc.barLabels.fontName = BASE_FONT
+    bc.barLabels.fontSize = 9
+    bc.barLabels.fillColor = LIQ_TEXT_COLOR
+    d.add(bc)
+    return d
+
 # -------------------------
 # Cabeçalho / Rodapé
 # -------------------------
-def draw_header(canvas, doc):
+def draw_header(canvas, doc, ctx: ContextoRelatorio = None):
+    ctx = ctx or ContextoRelatorio()
     canvas.saveState()
     page_width, page_height = A4
 
@@ -205,7 +331,7 @@ def draw_header(canvas, doc):
     canvas.setFont(BOLD_FONT, 18)
     canvas.drawString(left, top_y, "Realocação de Portfólio")
     canvas.setFont(BASE_FONT, 10)
-    canvas.drawString(left, top_y - 20, DATA_HOJE_STR or _data_hoje_br())
+    canvas.drawString(left, top_y - 20, ctx.data_str or _data_hoje_br())
 
     # Contatos
     canvas.setFont(BASE_FONT, 7)
@@ -240,7 +366,7 @@ def draw_header(canvas, doc):
     canvas.roundRect(left, rect_y_1, col_w, field_h, field_r, stroke=0, fill=1)
     canvas.setFillColor(PRIMARY_COLOR); canvas.setFont(BASE_FONT, 10)
     baseline_1 = _baseline_center(rect_y_1, field_h, BASE_FONT, 10, OPTICAL_FIELD)  
-    canvas.drawString(left + 6, baseline_1, (CLIENTE_NOME or "").upper())  
+    canvas.drawString(left + 6, baseline_1, (ctx.cliente_nome or "").upper())  
 
     # Perfil de risco
     perf_left = left + col_w + col_gap
@@ -248,7 +374,7 @@ def draw_header(canvas, doc):
     canvas.drawString(perf_left, row1_label_y, "Perfil de risco sugerido")
 
     pills     = ["CONSERVADORA","MODERADA","SOFISTICADA","PERSONALIZADA"]
-    sel       = (PERFIL_RISCO or "PERSONALIZADA").upper()
+    sel       = (ctx.perfil_risco or "PERSONALIZADA").upper()
     pill_h    = field_h
     pill_gap  = 8
     pill_font = 8
@@ -298,7 +424,7 @@ def draw_header(canvas, doc):
     canvas.roundRect(left, rect_y_2, col_w, field_h, field_r, stroke=0, fill=1)
     canvas.setFillColor(PRIMARY_COLOR); canvas.setFont(BASE_FONT, 10)
     baseline_2 = _baseline_center(rect_y_2, field_h, BASE_FONT, 10, OPTICAL_FIELD)  # alteração realizada aqui
-    canvas.drawString(left + 6, baseline_2, (NOME_ASSESSOR or "").upper())          # alteração realizada aqui
+    canvas.drawString(left + 6, baseline_2, (ctx.nome_assessor or "").upper())          # alteração realizada aqui
 
     # Aporte
     canvas.setFillColor(label_color); canvas.setFont(BOLD_FONT, 9)
@@ -308,7 +434,7 @@ def draw_header(canvas, doc):
     canvas.roundRect(perf_left, rect_y_3, col_w, field_h, field_r, stroke=0, fill=1)
     canvas.setFillColor(PRIMARY_COLOR); canvas.setFont(BASE_FONT, 10)
     baseline_3 = _baseline_center(rect_y_3, field_h, BASE_FONT, 10, OPTICAL_FIELD)  # alteração realizada aqui
-    canvas.drawString(perf_left + 6, baseline_3, APORTE_TEXT or "Sem aporte")       # alteração realizada aqui
+    canvas.drawString(perf_left + 6, baseline_3, ctx.aporte_text or "Sem aporte")       # alteração realizada aqui
 
     # Linha inferior do cabeçalho
     base_boxes_y = row2_field_y - field_h + 2
@@ -324,17 +450,11 @@ def draw_footer(canvas, doc):
     left  = doc.leftMargin
     right = page_width - doc.rightMargin
 
-    base_dir  = os.path.dirname(__file__)
-    logo_path = os.path.join(base_dir, "c-com-fundo-branco.png")
-    logo_w_target = 44
     try:
-        img = ImageReader(logo_path)
-        iw, ih = img.getSize()
-        scale  = logo_w_target / float(iw)
-        logo_w = logo_w_target
-        logo_h = ih * scale
+        logo = imagem("logo_rodape")
+        logo_w, logo_h = logo.largura, logo.altura
         x_img, y_img = left, 12
-        canvas.drawImage(img, x_img, y_img, width=logo_w, height=logo_h, mask='auto')
+        canvas.drawImage(logo.leitor, x_img, y_img, width=logo_w, height=logo_h, mask='auto')
     except Exception:
         logo_w = 0; logo_h = 0
         x_img, y_img = left, 24
@@ -345,6 +465,227 @@ def draw_footer(canvas, doc):
     canvas.line(x_start, y_line, right, y_line)
     canvas.restoreState()
 
+# -------------------------
+# Templates estáticos (capa / contracapa / última página)
+# -------------------------
+_TEMPLATES_LOCK = threading.Lock()
+_XOBJECTS_TEMPLATES = {}  # dpi -> {hash do fluxo: referência}, para deduplicar entre templates
+ECONOMIA_TEMPLATES = {}   # (nome, dpi) -> bytes economizados por etapa
+
+@functools.lru_cache(maxsize=None)
+def _carregar_template(nome: str, otimizar: bool = True, dpi: int = None) -> tuple:
+    caminho = os.path.join(os.path.dirname(__file__), nome)
+    with open(caminho, "rb") as f:
+        reader = PdfReader(io.BytesIO(f.read()))
+    paginas = tuple(reader.pages)
+    if otimizar:
+        ECONOMIA_TEMPLATES[(nome, dpi)] = otimizar_paginas(
+            paginas, dpi, _XOBJECTS_TEMPLATES.setdefault(dpi, {}))
+    # Uma cópia descartável resolve todos os objetos do leitor; depois disso
+    # as cópias por relatório só leem objetos já em memória.
+    aquecimento = PdfWriter()
+    for p in paginas:
+        aquecimento.add_page(p)
+    return paginas
+
+def paginas_template(nome: str, otimizar: bool = True, dpi: int = None) -> tuple:
+    """
+    Páginas de um PDF estático de utils/, lido e resolvido uma vez por processo.
+    Com `otimizar`, os fluxos são recomprimidos e as imagens repetidas entre
+    templates viram um só XObject; `dpi` também reamostra as imagens grandes.
+    """
+    with _TEMPLATES_LOCK:
+        return _carregar_template(nome, otimizar, dpi)
+
+# -------------------------
+# Seções do relatório (dados preparados, em cache)
+# -------------------------
+# Cada seção recebe só as colunas que usa e devolve linhas já formatadas.
+# O cache guarda esses dados, nunca flowables: Table/Paragraph guardam estado
+# de layout e são recriados a cada geração a partir das linhas prontas.
+MANUAL_FALLBACK_COLORS = ["#CCCCCC", "#D4AF37", "#E7CA80", "#827008"]
+
+def _secao(nome: str, preparar, *entradas):
+    """Dados de uma seção do cache compartilhado, pelo hash das entradas que ela usa."""
+    return CACHE_SECOES.obter(chave_conteudo(nome, *entradas), lambda: preparar(*entradas))
+
+def _secao_comparativo(dist: pd.DataFrame, prop: pd.DataFrame) -> dict:
+    """Roscas Atual/Proposta e barras da tabela central (Classificação, Percentual)."""
+    atual = dist.sort_values(by="Percentual", ascending=False).reset_index(drop=True)
+    labels = atual["Classificação"].tolist()
+    colors_atual = [PALETTE[i % len(PALETTE)] for i in range(len(labels))]
+    color_map = dict(zip(labels, colors_atual))
+
+    proposta = prop.sort_values(by="Percentual", ascending=False).reset_index(drop=True)
+    labels_prop = proposta["Classificação"].tolist()
+    fallback = 0
+    for label in labels_prop:
+        if label not in color_map:
+            if fallback < len(MANUAL_FALLBACK_COLORS):
+                color_map[label] = MANUAL_FALLBACK_COLORS[fallback]; fallback += 1
+            else:
+                idx = len(color_map) % len(PALETTE); color_map[label] = PALETTE[idx]
+
+    temp_df = pd.DataFrame({
+        "Classificação": list(dict.fromkeys(list(dist["Classificação"]) + list(prop["Classificação"])))
+    })
+    temp_df["Atual"]    = temp_df["Classificação"].map(dist.groupby("Classificação", observed=True)["Percentual"].sum())
+    temp_df["Proposta"] = temp_df["Classificação"].map(prop.groupby("Classificação", observed=True)["Percentual"].sum())
+    temp_df = temp_df.fillna(0.0).sort_values(by="Atual", ascending=False).reset_index(drop=True)
+
+    return {
+        "rosca_atual": ([float(v) for v in atual["Percentual"]], colors_atual),
+        "rosca_proposta": ([float(v) for v in proposta["Percentual"]], [color_map[l] for l in labels_prop]),
+        "barras": [(str(r["Classificação"]), float(r["Atual"]), float(r["Proposta"]),
+                    color_map.get(r["Classificação"], "#000000")) for _, r in temp_df.iterrows()],
+    }
+
+def _secao_classes(dist: pd.DataFrame, prop: pd.DataFrame) -> tuple:
+    """Linhas das tabelas 'Carteira Atual' e 'Carteira Proposta' (Classificação, valor, Percentual)."""
+    def linhas(df):
+        fmt = df.sort_values(by="valor", ascending=False)
+        return [list(r) for r in zip(fmt["Classificação"], formatar_serie_br(fmt["valor"]),
+                                     formatar_serie_br(fmt["Percentual"], sufixo="%"))]
+    return linhas(dist), linhas(prop)
+
+def _secao_diferencas(dist: pd.DataFrame, prop: pd.DataFrame) -> list:
+    """Linhas Classificação / Atual / Proposta / Ajuste / Ação, do maior aumento à maior redução."""
+    # ordem de aparição (não de hash): empates no Ajuste saem sempre iguais
+    all_classes = dict.fromkeys([*dist["Classificação"], *prop["Classificação"]])
+    linhas = []
+    for cls in all_classes:
+        pa = float(dist.loc[dist["Classificação"] == cls, "Percentual"].sum())
+        ps = float(prop.loc[prop["Classificação"] == cls, "Percentual"].sum())
+        adj = round(ps - pa, 2)
+        linhas.append({
+            "Classificação": cls,
+            "Atual (%)": pa,
+            "Proposta (%)": ps,  # alteração realizada aqui
+            "AjusteNum": adj,
+            "Ajuste (%)": adj,
+            "Ação": "Aumentar" if adj > 0 else ("Reduzir" if adj < 0 else "Inalterado")
+        })
+
+    dif_df = pd.DataFrame(linhas).sort_values("AjusteNum", ascending=False).reset_index(drop=True)
+    for col in ["Atual (%)", "Proposta (%)", "Ajuste (%)"]:
+        dif_df[col] = formatar_serie_br(dif_df[col], sufixo="%")
+    return dif_df[["Classificação","Atual (%)","Proposta (%)","Ajuste (%)","Ação"]].values.tolist()
+
+def _precisam_quebra(nomes, largura: float, tamanho: float = 8) -> list:
+    """Índices dos nomes mais largos que `largura` (só esses viram Paragraph)."""
+    return [i for i, n in enumerate(nomes) if pdfmetrics.stringWidth(n, BASE_FONT, tamanho) > largura]
+
+def _secao_movimentacoes(mov: pd.DataFrame, largura_ativo: float) -> dict:
+    """
+    Linhas dos ativos alocados (Valor Realocado > 0) e resgatados (< 0), com
+    as colunas já formatadas, e os índices dos nomes que precisam quebrar linha.
+    """
+    valores = {c: ler_serie_br(mov[c]) for c in ["valor_atual", "Novo Valor", "Valor Realocado"]}
+
+    def linhas(mascara):
+        nomes = mov.loc[mascara, "estrategia"].astype(str).tolist()
+        cols = [mov.loc[mascara, "Classificação"].tolist(), nomes,
+                formatar_serie_br(valores["valor_atual"][mascara]).tolist(),
+                formatar_serie_br(valores["Valor Realocado"][mascara]).tolist(),
+                formatar_serie_br(valores["Novo Valor"][mascara]).tolist()]
+        return {"linhas": [list(r) for r in zip(*cols)], "quebrar": _precisam_quebra(nomes, largura_ativo)}
+
+    return {"alocados": linhas(valores["Valor Realocado"] > 0),
+            "resgatados": linhas(valores["Valor Realocado"] < 0)}
+
+def _secao_rentabilidade(ativos: pd.DataFrame):
+    """(colunas, linhas) da rentabilidade ponderada Atual x Proposta; None sem dados."""
+    rentab = comparar_rentabilidade(ativos)
+    if rentab.empty or rentab.isna().all().all():
+        return None
+    rentab_fmt = rentab.apply(lambda col: formatar_serie_br(col, nulo="-"))
+    return ["Carteira"] + rentab_fmt.columns.tolist(), rentab_fmt.reset_index().values.tolist()
+
+def _secao_projecao(dist: pd.DataFrame, prop: pd.DataFrame):
+    """(colunas, linhas) da projeção Monte Carlo (semente fixa); None se vazia."""
+    simulacao = simular_carteiras({
+        "Carteira Atual": dict(zip(dist["Classificação"], dist["valor"])),
+        "Carteira Proposta": dict(zip(prop["Classificação"], prop["valor"])),
+    })
+    proj = resumo_simulacao(simulacao)
+    if proj.empty:
+        return None
+    for col in proj.columns[1:]:
+        sufixo = "%" if "Drawdown" in col else ""
+        proj[col] = formatar_serie_br(proj[col], sufixo=sufixo)
+    return proj.columns.tolist(), proj.values.tolist()
+
+def _secao_sugestao(sug: pd.DataFrame, largura_ativo: float) -> tuple:
+    """
+    Linhas da 'Sugestão de Carteira' (classe seguida dos seus ativos, ambos
+    por valor decrescente), índices das linhas de classe e das linhas cujo
+    nome precisa quebrar. Um groupby e um sort para a tabela inteira.
+    """
+    novo = (pd.to_numeric(sug["Novo Valor"], errors="coerce").fillna(0.0)
+            if "Novo Valor" in sug.columns else pd.Series(0.0, index=sug.index))
+    nomes = (sug["estrategia"].astype(str).str.normalize("NFKC")
+             .str.replace("\uFFFD", "", regex=False).str.replace("\xa0", " ", regex=False).str.strip())
+    total_sug = float(novo.sum())
+
+    somas = novo.groupby(sug["Classificação"], observed=True).sum().sort_values(ascending=False)
+    ordem = pd.Series(np.arange(len(somas)), index=somas.index)
+    classes = pd.DataFrame({"ordem": ordem.to_numpy(), "tipo": 0,
+                            "texto": somas.index.astype(str).str.upper(), "valor": somas.to_numpy()})
+    ativos = pd.DataFrame({"ordem": sug["Classificação"].map(ordem).to_numpy(), "tipo": 1,
+                           "texto": nomes.to_numpy(), "valor": novo.to_numpy()})
+    tabela = (pd.concat([classes, ativos], ignore_index=True)
+                .sort_values(["ordem", "tipo", "valor"], ascending=[True, True, False], kind="stable"))
+
+    pct = (tabela["valor"] / total_sug * 100) if total_sug else pd.Series(0.0, index=tabela.index)
+    pct_fmt = formatar_serie_br(pct, sufixo="%")
+    textos = tabela["texto"].tolist()
+    data = [["Ativo","Capital Alocado","% PL"]] + [
+        list(r) for r in zip(textos, formatar_serie_br(tabela["valor"]).tolist(), pct_fmt.tolist())]
+
+    tipo = tabela["tipo"].to_numpy()
+    classification_rows = (np.flatnonzero(tipo == 0) + 1).tolist()
+    quebrar = [i + 1 for i in _precisam_quebra(textos, largura_ativo) if tipo[i] == 1]
+    return data, classification_rows, quebrar
+
+def _alturas_linhas(data, estilos, larguras) -> list:
+    """
+    rowHeights de uma tabela longa: linhas só com texto de uma linha recebem a
+    altura medida uma única vez numa tabela-amostra com os mesmos estilos; o
+    cabeçalho e as linhas com Paragraph ficam None e o reportlab as mede.
+    Sem isso cada quebra de página volta a medir todas as linhas restantes.
+    """
+    amostra = Table([data[0], ["x"] * len(larguras)], colWidths=larguras)
+    for e in estilos:
+        amostra.setStyle(e)
+    amostra.wrap(sum(larguras), 10**6)
+    h = amostra._rowHeights[1]
+    return [None if i == 0 or any(isinstance(c, Flowable) or "\n" in c for c in linha) else h
+            for i, linha in enumerate(data)]
+
+def _secao_escada(liq: pd.DataFrame, hoje: str) -> list:
+    """
+    Linhas da escada de liquidez nos MARCOS_ESCADA e do total: valor
+    acumulado disponível (R$ e % do total) da carteira atual e da proposta.
+    """
+    prazos = prazos_liquidez(liq["Liquidez"], liq.get("Vencimento"), date.fromisoformat(hoje))
+    atual = liq["valor_atual"] if "valor_atual" in liq.columns else liq["saldo_bruto"]
+    carteiras = pd.DataFrame({"Atual": ler_serie_br(atual),
+                              "Proposta": ler_serie_br(liq["Novo Valor"]) if "Novo Valor" in liq.columns
+                                          else ler_serie_br(atual)})
+    escada = escada_liquidez(prazos, carteiras, meses=MARCOS_ESCADA[-1]).loc[list(MARCOS_ESCADA)]
+    escada.loc["total"] = carteiras.sum()
+    pct = (escada / escada.loc["total"].where(escada.loc["total"] != 0) * 100).fillna(0.0)
+
+    rotulos = ["Imediato (D+0)" if m == 0 else f"Até {m} {'mês' if m == 1 else 'meses'}"
+               for m in MARCOS_ESCADA] + ["Total da carteira"]
+    return [list(r) for r in zip(rotulos,
+                                 formatar_serie_br(escada["Atual"]), formatar_serie_br(pct["Atual"], sufixo="%"),
+                                 formatar_serie_br(escada["Proposta"]), formatar_serie_br(pct["Proposta"], sufixo="%"))]
+
+def _colunas(df: pd.DataFrame, nomes) -> pd.DataFrame:
+    """Recorte de `df` com as colunas de `nomes` que existirem (entrada de uma seção)."""
+    return df[[c for c in nomes if c in df.columns]]
+
 # -------------------------
 # PDF
 # -------------------------
@@ -356,13 +697,61 @@ def generate_pdf(
     ativos_df: pd.DataFrame,
     cliente_nome: str = "",
     nome_assessor: str = "",
+    otimizar: bool = True,
+    dpi_imagens: int = None,
+    perfil=None,
+    agora: datetime = None,
 ) -> bytes:
+    """PDF completo em memória; ver escrever_pdf (prefira-a para gravar em arquivo)."""
+    buffer = io.BytesIO()
+    escrever_pdf(buffer, dist_df, modelo_df, resumo_df, sugestao, ativos_df, cliente_nome,
+                 nome_assessor, otimizar, dpi_imagens, perfil, agora)
+    return buffer.getvalue()
+
+def escrever_pdf(
+    destino,
+    dist_df: pd.DataFrame,
+    modelo_df: pd.DataFrame,
+    resumo_df: pd.DataFrame,  # compat.
+    sugestao: dict,
+    ativos_df: pd.DataFrame,
+    cliente_nome: str = "",
+    nome_assessor: str = "",
+    otimizar: bool = True,
+    dpi_imagens: int = None,
+    perfil=None,
+    agora: datetime = None,
+) -> int:
+    """
+    Escreve o PDF completo (capa, contracapa, corpo e última página) direto
+    em `destino` — caminho ou arquivo binário aberto — e devolve os bytes
+    escritos. Só o corpo passa por um buffer em memória.
 
+    O resultado depende só das entradas e da data `agora` (padrão: hoje):
+    o corpo sai em modo invariante do reportlab e os metadados são fixos,
+    então as mesmas entradas na mesma data geram os mesmos bytes.
+
+    `perfil` (utils.perfil_geracao.PerfilGeracao) é opcional e recebe o
+    tempo/memória de cada etapa: normalização, dados de cada seção,
+    gráficos, layout de cada tabela, concatenação e escrita.
+    """
+    perfil = perfil or SEM_PERFIL
+    agora = agora or datetime.today()
+    if isinstance(destino, (str, os.PathLike)):
+        with open(destino, "wb") as arquivo:
+            return escrever_pdf(arquivo, dist_df, modelo_df, resumo_df, sugestao, ativos_df,
+                                cliente_nome, nome_assessor, otimizar, dpi_imagens, perfil, agora)
+    with perfil.geracao():
+        return _montar_pdf(dist_df, modelo_df, sugestao, ativos_df, cliente_nome,
+                           nome_assessor, otimizar, dpi_imagens, perfil, agora, destino)
+
+def _normalizar_entradas(dist_df, modelo_df, sugestao, ativos_df) -> tuple:
+    """(df_dist, df_modelo, df_prop) com valores numéricos e Percentual."""
     # --- Normalizações
     df_dist = dist_df.copy()
     if "valor" not in df_dist.columns and "valor_atual" in df_dist.columns:
         df_dist = df_dist.rename(columns={"valor_atual": "valor"})
-    df_dist["valor"] = _to_float_br(df_dist["valor"])
+    df_dist["valor"] = ler_serie_br(df_dist["valor"])
     if "Percentual" not in df_dist.columns:
         total_val = df_dist["valor"].sum()
         df_dist["Percentual"] = (df_dist["valor"] / total_val * 100) if total_val else 0.0
@@ -374,35 +763,39 @@ def generate_pdf(
             df_modelo = df_modelo.rename(columns={poss[0]: "Percentual Ideal"})
         else:
             raise ValueError("modelo_df precisa conter a coluna 'Percentual Ideal'.")
-    df_modelo["Percentual Ideal"] = _to_float_br(df_modelo["Percentual Ideal"])
+    df_modelo["Percentual Ideal"] = ler_serie_br(df_modelo["Percentual Ideal"])
 
     # Proposta REAL (Etapas 4/5)
     df_prop = None
     if isinstance(ativos_df, pd.DataFrame) and ("Novo Valor" in ativos_df.columns or "valor_sugerido" in ativos_df.columns):
         col_nv = "Novo Valor" if "Novo Valor" in ativos_df.columns else "valor_sugerido"
         df_prop = (ativos_df.copy()
-                   .assign(valor=_to_float_br(ativos_df[col_nv]))
-                   .groupby("Classificação", as_index=False)["valor"].sum())
+                   .assign(valor=ler_serie_br(ativos_df[col_nv]))
+                   .groupby("Classificação", as_index=False, observed=True)["valor"].sum())
         total_prop = df_prop["valor"].sum()
         df_prop["Percentual"] = (df_prop["valor"]/total_prop*100) if total_prop else 0.0
     if df_prop is None:
         df_prop = df_modelo.rename(columns={"Percentual Ideal": "Percentual"}).copy()
-        try:
-            ap = float(_to_float_br(pd.Series([(sugestao or {}).get("aporte_valor", 0.0)]))[0])
-        except Exception:
-            ap = 0.0
+        ap = ler_br((sugestao or {}).get("aporte_valor", 0.0))
         base_total = float(df_dist["valor"].sum()) + max(ap, 0.0)
-        perc = _to_float_br(df_prop["Percentual"])
+        perc = ler_serie_br(df_prop["Percentual"])
         df_prop["valor"] = base_total * (perc / 100.0)
-
-    # Estado global (header)
-    global patrimonio_total, CLIENTE_NOME, NOME_ASSESSOR, DATA_HOJE_STR, PERFIL_RISCO, APORTE_TEXT
-    CLIENTE_NOME = cliente_nome or ""
-    NOME_ASSESSOR = nome_assessor or ""
-    patrimonio_total = df_dist["valor"].sum()
-    DATA_HOJE_STR = _data_hoje_br()
-    PERFIL_RISCO  = _inferir_perfil(sugestao)
-    APORTE_TEXT   = (sugestao or {}).get("aporte_text", "Sem aporte") or "Sem aporte"
+    return df_dist, df_modelo, df_prop
+
+def _montar_pdf(dist_df, modelo_df, sugestao, ativos_df, cliente_nome,
+                nome_assessor, otimizar, dpi_imagens, perfil, agora, destino) -> int:
+    with perfil.etapa("normalização"):
+        df_dist, df_modelo, df_prop = _normalizar_entradas(dist_df, modelo_df, sugestao, ativos_df)
+
+    # Contexto do cabeçalho (por geração — seguro para gerar em paralelo)
+    ctx = ContextoRelatorio(
+        cliente_nome=cliente_nome or "",
+        nome_assessor=nome_assessor or "",
+        data_str=_data_hoje_br(agora),
+        perfil_risco=_inferir_perfil(sugestao),
+        aporte_text=(sugestao or {}).get("aporte_text", "Sem aporte") or "Sem aporte",
+        patrimonio_total=float(df_dist["valor"].sum()),
+    )
 
     styles = getSampleStyleSheet()
     for s in styles.byName.values():
@@ -411,70 +804,22 @@ def generate_pdf(
 
     elems = []
 
-    # ---------- helper para preservar proporção ----------
-    def scaled_image(buf: io.BytesIO, max_w: float, max_h: float) -> Image:
-        ir = ImageReader(buf)
-        iw, ih = ir.getSize()
-        scale = min(max_w / float(iw), max_h / float(ih))
-        w = iw * scale
-        h = ih * scale
-        buf.seek(0)
-        return Image(buf, width=w, height=h)
-
-    # ===== Gráficos donut
-    def make_doughnut_atual(df, percent_col):
-        sorted_df = df.sort_values(by=percent_col, ascending=False).reset_index(drop=True)
-        labels = sorted_df["Classificação"].tolist()
-        sizes  = sorted_df[percent_col].tolist()
-        colors_list = [PALETTE[i % len(PALETTE)] for i in range(len(labels))]
-        color_map = dict(zip(labels, colors_list))
-
-        buf = io.BytesIO()
-        fig, ax = plt.subplots(figsize=(4, 4))
-        ax.pie(
-            sizes, labels=None, startangle=90, counterclock=False, colors=colors_list,
-            wedgeprops={'width': 0.30, 'edgecolor': 'white'}
-        )
-        ax.axis('equal'); plt.tight_layout()
-        fig.savefig(buf, format='PNG', dpi=150, bbox_inches='tight')
-        plt.close(fig); buf.seek(0)
-        return buf, color_map
-
-    def make_doughnut_modelo(df, percent_col, color_map):
-        sorted_df = df.sort_values(by=percent_col, ascending=False).reset_index(drop=True)
-        labels = sorted_df["Classificação"].tolist()
-        sizes  = sorted_df[percent_col].tolist()
-        MANUAL_FALLBACK_COLORS = ["#CCCCCC", "#D4AF37", "#E7CA80", "#827008"]
-        fallback = 0
-        for label in labels:
-            if label not in color_map:
-                if fallback < len(MANUAL_FALLBACK_COLORS):
-                    color_map[label] = MANUAL_FALLBACK_COLORS[fallback]; fallback += 1
-                else:
-                    idx = len(color_map) % len(PALETTE); color_map[label] = PALETTE[idx]
-        colors_list = [color_map[l] for l in labels]
-
-        buf = io.BytesIO()
-        fig, ax = plt.subplots(figsize=(4, 4))
-        ax.pie(
-            sizes, labels=None, startangle=90, counterclock=False, colors=colors_list,
-            wedgeprops={'width': 0.30, 'edgecolor': 'white'}
-        )
-        ax.axis('equal'); plt.tight_layout()
-        fig.savefig(buf, format='PNG', dpi=150, bbox_inches='tight')
-        plt.close(fig); buf.seek(0)
-        return buf
+    # Entradas de cada seção (só as colunas que ela usa)
+    dist_pct = df_dist[["Classificação", "Percentual"]]
+    prop_pct = df_prop[["Classificação", "Percentual"]]
+    dist_val = df_dist[["Classificação", "valor", "Percentual"]]
+    prop_val = df_prop[["Classificação", "valor", "Percentual"]]
 
     buffer_relatorio = io.BytesIO()
-    doc = BaseDocTemplate(
-        buffer_relatorio, pagesize=A4,
+    doc = DocMedido(
+        buffer_relatorio, pagesize=A4, pageCompression=1, perfil=perfil, invariant=1,
         leftMargin=36, rightMargin=36, topMargin=202, bottomMargin=70
     )
     frame = Frame(doc.leftMargin, doc.bottomMargin, doc.width, doc.height,
                   leftPadding=0, rightPadding=0, topPadding=0, bottomPadding=0, id='normal')
 
     def _on_page(canvas, doc_):
-        draw_header(canvas, doc_)
+        draw_header(canvas, doc_, ctx)
         draw_footer(canvas, doc_)
 
     doc.addPageTemplates(PageTemplate(id='OneCol', frames=[frame], onPage=_on_page))
@@ -482,20 +827,16 @@ def generate_pdf(
     elems.append(Spacer(1, 14))
 
     # atual vs proposta
-    buf1, color_map = make_doughnut_atual(df_dist, "Percentual")
-    buf2 = make_doughnut_modelo(df_prop, "Percentual", color_map)
+    with perfil.etapa("dados: comparativo"):
+        comparativo = _secao("comparativo", _secao_comparativo, dist_pct, prop_pct)
+    with perfil.etapa("gráficos: roscas"):
+        graf1 = DesenhoCompartilhado(_grafico_cacheado("rosca", _doughnut, *comparativo["rosca_atual"]))
+        graf2 = DesenhoCompartilhado(_grafico_cacheado("rosca", _doughnut, *comparativo["rosca_proposta"]))
 
     # ===== Tabela comparativa central (barras)
-    temp_df = pd.DataFrame({
-        "Classificação": list(dict.fromkeys(list(df_dist["Classificação"]) + list(df_prop["Classificação"])))
-    })
-    temp_df["Atual"]    = temp_df["Classificação"].map(lambda x: df_dist.loc[df_dist["Classificação"] == x, "Percentual"].sum())
-    temp_df["Proposta"] = temp_df["Classificação"].map(lambda x: df_prop.loc[df_prop["Classificação"] == x, "Percentual"].sum())
-    temp_df = temp_df.fillna(0.0).sort_values(by="Atual", ascending=False).reset_index(drop=True)
-
     def bar(color: str, align="left", value: float = 0.0):
         val = float(value) if pd.notna(value) else 0.0
-        percent = f"{val:.1f}".replace(".", ",") + "%"
+        percent = formatar_br(val, 1, "%")
         b = InnerTable([[" "]], colWidths=4, rowHeights=12)
         b.setStyle(TableStyle([
             ("BACKGROUND",(0,0),(-1,-1), colors.HexColor(color) if isinstance(color,str) else color),
@@ -515,9 +856,8 @@ def generate_pdf(
     rows = []
     small_center = ParagraphStyle("SmallCenter", parent=styles["Normal"], alignment=TA_CENTER,
                                   fontName=BASE_FONT, fontSize=7, wordWrap='CJK', keepAll=True, textColor=PRIMARY_COLOR)
-    for _, r in temp_df.iterrows():
-        color = color_map.get(r["Classificação"], "#000000")
-        rows.append([bar(color,"left",r["Atual"]), Paragraph(str(r["Classificação"]), small_center), bar(color,"right",r["Proposta"])])
+    for classe, atual, proposta, color in comparativo["barras"]:
+        rows.append([bar(color,"left",atual), Paragraph(classe, small_center), bar(color,"right",proposta)])
 
     comp_tbl = Table([["Atual (%)","Classificação","Proposta (%)"]] + rows, colWidths=[63,84,63], hAlign='CENTER')
     comp_tbl.setStyle(TableStyle([
@@ -544,35 +884,30 @@ def generate_pdf(
                      style=[("BOTTOMPADDING",(0,0),(-1,-1),0), ("TOPPADDING",(0,1),(-1,1),-12)])
 
     grafico_atual    = Table(
-        [[titulo_com_traco("CARTEIRA ATUAL")],[scaled_image(buf1, 130, 130)]],
+        [[titulo_com_traco("CARTEIRA ATUAL")],[graf1]],
         rowHeights=[19,None], hAlign='CENTER'
     )
     grafico_sugerido = Table(
-        [[titulo_com_traco("CARTEIRA PROPOSTA")],[scaled_image(buf2, 130, 130)]],
+        [[titulo_com_traco("CARTEIRA PROPOSTA")],[graf2]],
         rowHeights=[19,None], hAlign='CENTER'
     )
 
-    elems.append(Table([[grafico_atual, comp_tbl, grafico_sugerido]], colWidths=[155,230,155], hAlign='CENTER',
-                       style=[('VALIGN',(0,0),(-1,-1),'TOP'), ('ALIGN',(0,0),(-1,-1),'CENTER')]))
+    elems.append(_etapa(Table([[grafico_atual, comp_tbl, grafico_sugerido]], colWidths=[155,230,155], hAlign='CENTER',
+                              style=[('VALIGN',(0,0),(-1,-1),'TOP'), ('ALIGN',(0,0),(-1,-1),'CENTER')]),
+                        "layout: comparativo (roscas e barras)"))
     elems.append(Spacer(1, 18))
 
     # ===== Tabelas "Carteira Atual" x "Proposta"
-    dist_fmt = df_dist.copy().sort_values(by="valor", ascending=False)
-    dist_fmt["Valor"] = dist_fmt["valor"].apply(_format_number_br)
-    dist_fmt["% PL"]  = dist_fmt["Percentual"].apply(lambda x: _format_number_br(x) + "%")
-    dist_fmt = dist_fmt[["Classificação", "Valor", "% PL"]]
-
-    prop_fmt = df_prop.copy().sort_values(by="valor", ascending=False)
-    prop_fmt["Valor"] = prop_fmt["valor"].apply(_format_number_br)
-    prop_fmt["% PL"]  = prop_fmt["Percentual"].apply(lambda x: _format_number_br(x) + "%")
-    prop_fmt = prop_fmt[["Classificação", "Valor", "% PL"]]
+    with perfil.etapa("dados: classes"):
+        linhas_atual, linhas_prop = _secao("classes", _secao_classes, dist_val, prop_val)
+    cab_classes = ["Classificação", "Valor", "% PL"]
 
     GAP = 20
     half = (doc.width - GAP) / 2
     colspec = [half*0.55, half*0.25, half*0.20]
 
-    tbl1 = Table([dist_fmt.columns.tolist()] + dist_fmt.values.tolist(), colWidths=colspec, hAlign='LEFT')
-    tbl2 = Table([prop_fmt.columns.tolist()] + prop_fmt.values.tolist(), colWidths=colspec, hAlign='LEFT')
+    tbl1 = Table([cab_classes] + [list(r) for r in linhas_atual], colWidths=colspec, hAlign='LEFT')
+    tbl2 = Table([cab_classes] + [list(r) for r in linhas_prop], colWidths=colspec, hAlign='LEFT')
 
     styl_common = TableStyle([
         ('BACKGROUND',(0,0),(-1,0),HEADER_BG),
@@ -601,66 +936,16 @@ def generate_pdf(
                        colWidths=[half, GAP, half], hAlign='LEFT',
                        style=[('LEFTPADDING',(0,0),(-1,-1),0), ('RIGHTPADDING',(0,0),(-1,-1),0),
                               ('TOPPADDING',(0,0),(-1,-1),0), ('BOTTOMPADDING',(0,0),(-1,-1),0)]))
-    elems.append(Table([[tbl1, "", tbl2]], colWidths=[half, GAP, half], hAlign='LEFT',
-                       style=[('VALIGN',(0,0),(-1,-1),'TOP'),
-                              ('LEFTPADDING',(0,0),(-1,-1),0), ('RIGHTPADDING',(0,0),(-1,-1),0),
-                              ('TOPPADDING',(0,0),(-1,-1),0), ('BOTTOMPADDING',(0,0),(-1,-1),0)]))
+    elems.append(_etapa(Table([[tbl1, "", tbl2]], colWidths=[half, GAP, half], hAlign='LEFT',
+                              style=[('VALIGN',(0,0),(-1,-1),'TOP'),
+                                     ('LEFTPADDING',(0,0),(-1,-1),0), ('RIGHTPADDING',(0,0),(-1,-1),0),
+                                     ('TOPPADDING',(0,0),(-1,-1),0), ('BOTTOMPADDING',(0,0),(-1,-1),0)]),
+                        "layout: tabelas atual x proposta"))
 
     # ======================= Gráfico de Liquidez =======================
-    def _extract_days(liq):
-        m = re.search(r"D\+(\d+)", str(liq))
-        return int(m.group(1)) if m else None
-    
-    ativos_local = ativos_df.copy()
-    ativos_local["days"] = ativos_local["Liquidez"].apply(_extract_days)
-    
-    def _classify(row):
-        d = row["days"]; liq = str(row["Liquidez"]).lower()
-        if d is None: return "D+0"
-        if d > 180: return "Acima de D+180"
-        if d > 60:  return "Até D+180"
-        if d > 15:  return "Até D+60"
-        if d > 5:   return "Até D+15"
-        if d > 0:   return "Até D+5"
-        if d == 0 and "à mercado" in liq: return "D+0 (à mercado)"
-        return "D+0"
-    
-    ativos_local["Faixa"] = ativos_local.apply(_classify, axis=1)
-    
-    valor_col = "Novo Valor" if "Novo Valor" in ativos_local.columns else "valor_atual"
-    liq_faixas = (
-        ativos_local.assign(valor=_to_float_br(ativos_local[valor_col]))
-                   .groupby("Faixa")["valor"].sum()
-                   .reindex(["Acima de D+180","Até D+180","Até D+60","Até D+15","Até D+5","D+0","D+0 (à mercado)"], fill_value=0.0)
-                   .reset_index()
-    )
-    
-    cinza_txt = "#6B7280"
-    buf_liq = io.BytesIO()
-    fig, ax = plt.subplots(figsize=(7.5, 2.4))
-    y_labels = ["Acima de D+180","Até D+180","Até D+60","Até D+15","Até D+5","D+0","D+0 (à mercado)"]
-    y_pos = list(range(len(y_labels)))
-    valores = [liq_faixas.set_index("Faixa").loc[l, "valor"] for l in y_labels]
-    
-    bars = ax.barh(y_pos, valores, height=0.70)
-    ax.set_yticks(y_pos, labels=y_labels)
-    ax.invert_yaxis()
-    ax.tick_params(axis='y', labelsize=8, colors=cinza_txt, length=0)
-    ax.set_ylabel("Faixa", fontsize=9, color=cinza_txt)
-    ax.set_xlabel(""); ax.set_xticks([]); ax.tick_params(axis='x', length=0, colors=cinza_txt)
-    for side in ["bottom","top","right","left"]:
-        ax.spines[side].set_visible(False)
-    max_v = max(valores) if valores else 0.0
-    ax.set_xlim(0, max_v*1.15 if max_v > 0 else 1)
-    for rect, val in zip(bars, valores):
-        if val <= 0: continue
-        txt = _format_number_br(val)
-        ax.text(rect.get_width() + (max_v*0.012 if max_v else 0.02),
-                rect.get_y() + rect.get_height()/2, txt,
-                va='center', ha='left', fontsize=9, color=cinza_txt)
-    plt.tight_layout(pad=0.6)
-    fig.savefig(buf_liq, format='PNG', dpi=150, bbox_inches='tight')
-    plt.close(fig); buf_liq.seek(0)
+    valor_liq = "Novo Valor" if "Novo Valor" in ativos_df.columns else "valor_atual"
+    with perfil.etapa("dados: liquidez"):
+        valores = valor_por_faixa(ativos_df["Liquidez"], ativos_df[valor_liq]).tolist()
     
     elems.append(Spacer(1, 8))
     elems.append(Paragraph(
@@ -669,7 +954,9 @@ def generate_pdf(
     ))
     elems.append(Spacer(1, 2))
     
-    elems.append(StretchToBottomImage(buf_liq, min_height=90, vpad=0))
+    elems.append(_etapa(StretchToBottomDrawing(
+        lambda w, h: _grafico_cacheado("liquidez", _grafico_liquidez, FAIXAS_LIQUIDEZ, valores, round(w, 2), round(h, 2)),
+        min_height=90, vpad=0), "gráficos: liquidez"))
 
     # =================================================================
     # NOVA PÁGINA: Diferenças / Ativos Alocados / Ativos Resgatados
@@ -683,25 +970,8 @@ def generate_pdf(
                                fontSize=8, textColor=PRIMARY_COLOR, wordWrap="CJK")
 
     # Diferenças
-    all_classes = set(df_dist["Classificação"]).union(set(df_prop["Classificação"]))
-    linhas = []
-    for cls in all_classes:
-        pa = float(df_dist.loc[df_dist["Classificação"] == cls, "Percentual"].sum())
-        ps = float(df_prop.loc[df_prop["Classificação"] == cls, "Percentual"].sum())
-        adj = round(ps - pa, 2)
-        linhas.append({
-            "Classificação": cls,
-            "Atual (%)": pa,
-            "Proposta (%)": ps,  # alteração realizada aqui
-            "AjusteNum": adj,
-            "Ajuste (%)": adj,
-            "Ação": "Aumentar" if adj > 0 else ("Reduzir" if adj < 0 else "Inalterado")
-        })
-
-    dif_df = pd.DataFrame(linhas).sort_values("AjusteNum", ascending=False).reset_index(drop=True)
-    dif_df["Atual (%)"]     = dif_df["Atual (%)"].apply(lambda v: _format_number_br(v) + "%")
-    dif_df["Proposta (%)"]  = dif_df["Proposta (%)"].apply(lambda v: _format_number_br(v) + "%")  # alteração realizada aqui
-    dif_df["Ajuste (%)"]    = dif_df["Ajuste (%)"].apply(lambda v: _format_number_br(v) + "%")
+    with perfil.etapa("dados: diferenças"):
+        linhas_dif = _secao("diferencas", _secao_diferencas, dist_pct, prop_pct)
 
     def _cw_with_cushion(pcts):
         avail = doc.width - 12
@@ -711,7 +981,7 @@ def generate_pdf(
     dif_colwidths = _cw_with_cushion([34, 16, 16, 16, 18])
 
     dif_tbl = Table([["Classificação","Atual (%)","Proposta (%)","Ajuste (%)","Ação"]]  # alteração realizada aqui
-                    + dif_df[["Classificação","Atual (%)","Proposta (%)","Ajuste (%)","Ação"]].values.tolist(),  # alteração realizada aqui
+                    + [list(r) for r in linhas_dif],
                     colWidths=dif_colwidths, hAlign='LEFT')
     dif_tbl.setStyle(styl_common)
     dif_tbl.setStyle(TableStyle([
@@ -721,123 +991,128 @@ def generate_pdf(
 
     elems.append(Paragraph("Diferenças entre Atual e Proposta",  # alteração realizada aqui
                            ParagraphStyle(name="T", parent=styles["Heading2"], alignment=TA_CENTER, fontName=BOLD_FONT)))
-    elems.append(dif_tbl)
+    elems.append(_etapa(dif_tbl, "layout: diferenças"))
     elems.append(Spacer(1, 18))
 
     # Ativos Alocados / Resgatados
     if "Valor Realocado" in ativos_df.columns:
-        alocados = ativos_df.copy()
-        for c in ["valor_atual", "Novo Valor", "Valor Realocado"]:
-            if c in alocados.columns:
-                alocados[c] = _to_float_br(alocados[c])
-        alocados = alocados[alocados["Valor Realocado"] > 0].rename(columns={"estrategia": "Ativo"})
-
-        elems.append(Paragraph("Ativos Alocados", ParagraphStyle(name="T2", parent=styles["Heading2"], alignment=TA_CENTER, fontName=BOLD_FONT)))
-        if not alocados.empty:
-            alocados["Valor Atual (R$)"]     = alocados["valor_atual"].apply(_format_number_br)
-            alocados["Novo Valor (R$)"]      = alocados["Novo Valor"].apply(_format_number_br)
-            alocados["Valor Realocado (R$)"] = alocados["Valor Realocado"].apply(_format_number_br)
-
-            header_a = [Paragraph("Classificação", hdr9),
-                        Paragraph("Ativo", hdr9),
-                        Paragraph("Valor Atual", hdr9),
-                        Paragraph("Realocado", hdr9),
-                        Paragraph("Novo Valor", hdr9)]
-
-            cols_a = ["Classificação", "Ativo", "Valor Atual (R$)", "Valor Realocado (R$)", "Novo Valor (R$)"]
-            w_a = _cw_with_cushion([18, 46, 12, 12, 12])
-
-            data_a = [header_a]
-            for _, r in alocados[cols_a].iterrows():
-                data_a.append([
-                    r["Classificação"],
-                    Paragraph(str(r["Ativo"]), cell_wrap),
-                    r["Valor Atual (R$)"],
-                    r["Valor Realocado (R$)"],
-                    r["Novo Valor (R$)"],
-                ])
-
-            alocados_tbl = Table(data_a, colWidths=w_a, hAlign='LEFT')
-            alocados_tbl.setStyle(styl_common)
-            alocados_tbl.setStyle(TableStyle([
+        w_mov = _cw_with_cushion([18, 46, 12, 12, 12])
+        with perfil.etapa("dados: movimentações"):
+            movimentacoes = _secao("movimentacoes", _secao_movimentacoes, _colunas(ativos_df, [
+                "Classificação", "estrategia", "valor_atual", "Novo Valor", "Valor Realocado"]), w_mov[1] - 6)
+
+        def tabela_movimentacoes(mov):
+            header = [Paragraph("Classificação", hdr9),
+                      Paragraph("Ativo", hdr9),
+                      Paragraph("Valor Atual", hdr9),
+                      Paragraph("Realocado", hdr9),
+                      Paragraph("Novo Valor", hdr9)]
+            data = [header] + [list(r) for r in mov["linhas"]]
+            for i in mov["quebrar"]:
+                data[i + 1][1] = Paragraph(data[i + 1][1], cell_wrap)
+            estilos = [styl_common, TableStyle([
                 ('LEFTPADDING',(0,0),(-1,-1),3), ('RIGHTPADDING',(0,0),(-1,-1),3),
                 ('TOPPADDING',(0,0),(-1,0),4),   ('BOTTOMPADDING',(0,0),(-1,0),4),
-            ]))
-            elems.append(alocados_tbl)
+                ('ALIGN',(1,1),(1,-1),'LEFT'),
+            ])]
+            t = LongTable(data, colWidths=w_mov, rowHeights=_alturas_linhas(data, estilos, w_mov),
+                          hAlign='LEFT', repeatRows=1)
+            for e in estilos:
+                t.setStyle(e)
+            return _etapa(t, "layout: movimentações")
+
+        elems.append(Paragraph("Ativos Alocados", ParagraphStyle(name="T2", parent=styles["Heading2"], alignment=TA_CENTER, fontName=BOLD_FONT)))
+        if movimentacoes["alocados"]["linhas"]:
+            elems.append(tabela_movimentacoes(movimentacoes["alocados"]))
         else:
             elems.append(Paragraph("_Nenhum ativo alocado._", styles["Italic"]))
         elems.append(Spacer(1, 18))
 
-        resgatados = ativos_df.copy()
-        for c in ["valor_atual", "Novo Valor", "Valor Realocado"]:
-            if c in resgatados.columns:
-                resgatados[c] = _to_float_br(resgatados[c])
-        resgatados = resgatados[resgatados["Valor Realocado"] < 0].rename(columns={"estrategia": "Ativo"})
-
         elems.append(Paragraph("Ativos Resgatados", ParagraphStyle(name="T3", parent=styles["Heading2"], alignment=TA_CENTER, fontName=BOLD_FONT)))
-        if not resgatados.empty:
-            resgatados["Valor Atual (R$)"]     = resgatados["valor_atual"].apply(_format_number_br)
-            resgatados["Novo Valor (R$)"]      = resgatados["Novo Valor"].apply(_format_number_br)
-            resgatados["Valor Realocado (R$)"] = resgatados["Valor Realocado"].apply(_format_number_br)
-
-            header_r = [Paragraph("Classificação", hdr9),
-                        Paragraph("Ativo", hdr9),
-                        Paragraph("Valor Atual", hdr9),
-                        Paragraph("Realocado", hdr9),
-                        Paragraph("Novo Valor", hdr9)]
-
-            cols_r = ["Classificação", "Ativo", "Valor Atual (R$)", "Valor Realocado (R$)", "Novo Valor (R$)"]
-            w_r = _cw_with_cushion([18, 46, 12, 12, 12])
-
-            data_r = [header_r]
-            for _, r in resgatados[cols_r].iterrows():
-                data_r.append([
-                    r["Classificação"],
-                    Paragraph(str(r["Ativo"]), cell_wrap),
-                    r["Valor Atual (R$)"],
-                    r["Valor Realocado (R$)"],
-                    r["Novo Valor (R$)"],
-                ])
-
-            resgatados_tbl = Table(data_r, colWidths=w_r, hAlign='LEFT')
-            resgatados_tbl.setStyle(styl_common)
-            resgatados_tbl.setStyle(TableStyle([
-                ('LEFTPADDING',(0,0),(-1,-1),3), ('RIGHTPADDING',(0,0),(-1,-1),3),
-                ('TOPPADDING',(0,0),(-1,0),4),   ('BOTTOMPADDING',(0,0),(-1,0),4),
-            ]))
-            elems.append(resgatados_tbl)
+        if movimentacoes["resgatados"]["linhas"]:
+            elems.append(tabela_movimentacoes(movimentacoes["resgatados"]))
         else:
             elems.append(Paragraph("_Nenhum ativo resgatado._", styles["Italic"]))
         elems.append(Spacer(1, 6))
 
+    # Rentabilidade histórica ponderada (atual x proposta)
+    with perfil.etapa("dados: rentabilidade"):
+        rentab = _secao("rentabilidade", _secao_rentabilidade, _colunas(ativos_df, [
+            "Classificação", "saldo_bruto", "Novo Valor", *CAMPOS_RENTABILIDADE]))
+    if rentab is not None:
+        cab_rent, linhas_rent = rentab
+        header_rent = [Paragraph(c, hdr9) for c in cab_rent]
+        rentab_tbl = Table([header_rent] + [list(r) for r in linhas_rent],
+                           colWidths=_cw_with_cushion([22] + [13] * (len(cab_rent) - 1)), hAlign='LEFT')
+        rentab_tbl.setStyle(styl_common)
+        rentab_tbl.setStyle(TableStyle([
+            ('LEFTPADDING',(0,0),(-1,-1),3), ('RIGHTPADDING',(0,0),(-1,-1),3),
+            ('TOPPADDING',(0,0),(-1,0),4),   ('BOTTOMPADDING',(0,0),(-1,0),4),
+        ]))
+        elems.append(Spacer(1, 12))
+        elems.append(Paragraph("Rentabilidade Histórica Ponderada",
+                               ParagraphStyle(name="T4", parent=styles["Heading2"], alignment=TA_CENTER, fontName=BOLD_FONT)))
+        elems.append(_etapa(rentab_tbl, "layout: rentabilidade"))
+
+    # Projeção (simulação Monte Carlo, semente fixa)
+    with perfil.etapa("dados: projeção"):
+        proj = _secao("projecao", _secao_projecao, df_dist[["Classificação", "valor"]], df_prop[["Classificação", "valor"]])
+    if proj is not None:
+        cab_proj, linhas_proj = proj
+        hdr9_palavras = ParagraphStyle("Hdr9Palavras", parent=hdr9, wordWrap=None)
+        proj_tbl = Table([[Paragraph(c, hdr9_palavras) for c in cab_proj]] + [list(r) for r in linhas_proj],
+                         colWidths=_cw_with_cushion([16] + [12] * (len(cab_proj) - 1)), hAlign='LEFT')
+        proj_tbl.setStyle(styl_common)
+        proj_tbl.setStyle(TableStyle([
+            ('LEFTPADDING',(0,0),(-1,-1),3), ('RIGHTPADDING',(0,0),(-1,-1),3),
+            ('TOPPADDING',(0,0),(-1,0),4),   ('BOTTOMPADDING',(0,0),(-1,0),4),
+        ]))
+        elems.append(Spacer(1, 12))
+        elems.append(Paragraph("Projeção da Carteira (simulação, 10 anos)",
+                               ParagraphStyle(name="T5", parent=styles["Heading2"], alignment=TA_CENTER, fontName=BOLD_FONT)))
+        elems.append(_etapa(proj_tbl, "layout: projeção"))
+        elems.append(Paragraph(
+            "Cenários simulados a partir de premissas de retorno, volatilidade e correlação por classe. "
+            "Não constituem garantia de rentabilidade futura.",
+            ParagraphStyle(name="Nota", parent=styles["Normal"], fontName=BASE_FONT, fontSize=7,
+                           alignment=TA_CENTER, textColor=colors.HexColor("#6B7280"), spaceBefore=4)))
+
+    # Escada de liquidez (acumulado disponível por prazo)
+    with perfil.etapa("dados: escada de liquidez"):
+        linhas_escada = _secao("escada", _secao_escada, _colunas(ativos_df, [
+            "Liquidez", "Vencimento", "valor_atual", "saldo_bruto", "Novo Valor"]), agora.date().isoformat())
+    escada_tbl = Table([[Paragraph(c, hdr9) for c in
+                         ["Disponível", "Atual (R$)", "Atual (%)", "Proposta (R$)", "Proposta (%)"]]]
+                       + linhas_escada,
+                       colWidths=_cw_with_cushion([24, 19, 19, 19, 19]), hAlign='LEFT')
+    escada_tbl.setStyle(styl_common)
+    escada_tbl.setStyle(TableStyle([
+        ('LEFTPADDING',(0,0),(-1,-1),3), ('RIGHTPADDING',(0,0),(-1,-1),3),
+        ('TOPPADDING',(0,0),(-1,0),4),   ('BOTTOMPADDING',(0,0),(-1,0),4),
+    ]))
+    elems.append(Spacer(1, 12))
+    elems.append(Paragraph("Escada de Liquidez (valor disponível acumulado)",
+                           ParagraphStyle(name="T6", parent=styles["Heading2"], alignment=TA_CENTER, fontName=BOLD_FONT)))
+    elems.append(_etapa(escada_tbl, "layout: escada de liquidez"))
+    elems.append(Paragraph(
+        "Valor resgatável até cada prazo, pelo D+N do ativo ou, se 'No Vencimento', pela data de "
+        "vencimento. Ativos sem prazo definido entram só no total.",
+        ParagraphStyle(name="NotaEscada", parent=styles["Normal"], fontName=BASE_FONT, fontSize=7,
+                       alignment=TA_CENTER, textColor=colors.HexColor("#6B7280"), spaceBefore=4)))
+
     # --- Página seguinte — Sugestão de Carteira (detalhada)
     elems.append(PageBreak())
     elems.append(Paragraph("Sugestão de Carteira",
                            ParagraphStyle(name="H2", parent=styles["Heading2"], fontName=BOLD_FONT)))
     elems.append(Spacer(1, 12))
 
-    data = [["Ativo","Capital Alocado","% PL"]]
-    classification_rows = []; row_idx = 1
-    total_sug = pd.to_numeric(ativos_df.get("Novo Valor", 0.0), errors="coerce").fillna(0.0).sum()
-
-    class_sums = (ativos_df.assign(_novo=pd.to_numeric(ativos_df.get("Novo Valor", 0.0), errors="coerce").fillna(0.0))
-                           .groupby("Classificação")["_novo"].sum().sort_values(ascending=False))
-    for categoria, soma_val in class_sums.items():
-        soma_pct = (soma_val/total_sug*100) if total_sug else 0.0
-        data.append([str(categoria).upper(), _format_number_br(soma_val), f"{soma_pct:.2f}".replace(".", ",") + "%"])
-        classification_rows.append(row_idx); row_idx += 1
-
-        grp = (ativos_df[ativos_df["Classificação"] == categoria]
-               .assign(_novo=pd.to_numeric(ativos_df.loc[ativos_df["Classificação"] == categoria, "Novo Valor"], errors="coerce").fillna(0.0))
-               .sort_values("_novo", ascending=False))
-        for _, r in grp.iterrows():
-            nome_ativo = unicodedata.normalize("NFKC", str(r.get("estrategia",""))).replace("\uFFFD","").replace("\xa0"," ").strip()
-            nv = float(r.get("Novo Valor", 0.0)) if pd.notna(r.get("Novo Valor", 0.0)) else 0.0
-            data.append([nome_ativo, _format_number_br(nv),
-                        (f"{(nv/total_sug*100):.2f}".replace(".", ",") + "%") if total_sug else "0,00%"])
-            row_idx += 1
-
-    tbl = Table(data, colWidths=[doc.width*0.6, doc.width*0.2, doc.width*0.2], hAlign="LEFT", repeatRows=1)
+    with perfil.etapa("dados: sugestão"):
+        data, classification_rows, quebrar = _secao("sugestao", _secao_sugestao, _colunas(ativos_df, [
+            "Classificação", "estrategia", "Novo Valor"]), doc.width*0.6 - 12)
+    data = [list(r) for r in data]
+    for i in quebrar:
+        data[i][0] = Paragraph(data[i][0], cell_wrap)
+
     style = TableStyle([
         ("BACKGROUND",(0,0),(-1,0),colors.gray),
         ("TEXTCOLOR",(0,0),(-1,0),colors.whitesmoke),
@@ -858,25 +1133,27 @@ def generate_pdf(
     for i in classification_rows:
         style.add("BACKGROUND",(0,i),(-1,i),colors.lightgrey)
         style.add("FONTNAME",(0,i),(-1,i),BOLD_FONT)
+    # LongTable + alturas conhecidas: ao quebrar página só mede o que cabe no frame
+    w_sug = [doc.width*0.6, doc.width*0.2, doc.width*0.2]
+    with perfil.etapa("dados: sugestão"):
+        alturas_sug = _alturas_linhas(data, [style], w_sug)
+    tbl = LongTable(data, colWidths=w_sug, rowHeights=alturas_sug, hAlign="LEFT", repeatRows=1)
     tbl.setStyle(style)
-    elems.append(tbl)
+    elems.append(_etapa(tbl, "layout: sugestão"))
 
-    # Build
+    # Build (cada flowable conta o layout na etapa marcada nele)
     doc.build(elems)
 
-    # Concatenação final
-    base_dir  = os.path.dirname(__file__)
-    writer = PdfWriter()
-    for p in PdfReader(os.path.join(base_dir, "capa.pdf")).pages: writer.add_page(p)
-    for p in PdfReader(os.path.join(base_dir, "contra_capa.pdf")).pages: writer.add_page(p)
-    for p in PdfReader(buffer_relatorio).pages: writer.add_page(p)
-    for p in PdfReader(os.path.join(base_dir, "ultima_pagina.pdf")).pages: writer.add_page(p)
-
-    out = io.BytesIO(); writer.write(out); out.seek(0)
-    return out.read()
-
-
-
-
-
-
+    # Concatenação final (templates já carregados no processo)
+    with perfil.etapa("concatenação"):
+        writer = PdfWriter()
+        for p in paginas_template("capa.pdf", otimizar, dpi_imagens): writer.add_page(p)
+        for p in paginas_template("contra_capa.pdf", otimizar, dpi_imagens): writer.add_page(p)
+        for p in PdfReader(buffer_relatorio).pages: writer.add_page(p)
+        for p in paginas_template("ultima_pagina.pdf", otimizar, dpi_imagens): writer.add_page(p)
+        writer.add_metadata(_metadados(cliente_nome, nome_assessor, agora))
+
+    with perfil.etapa("escrita"):
+        inicio = destino.tell()
+        writer.write(destino)
+        return destino.tell() - inicio
@@ -0,0 +1,106 @@
+# utils/liquidez.py
+"""
+Faixas de liquidez (D+0, Até D+5, ..., Acima de D+180) a partir da coluna
+Liquidez, para a Etapa 5 e para o PDF: as duas telas usam este mesmo
+cálculo (vetorizado, com str.extract e pd.cut) e o mesmo resultado em cache.
+
+Escada de liquidez: valor acumulado que fica disponível mês a mês, pelo
+D+N da Liquidez ou, nos ativos 'No Vencimento', pela data de Vencimento.
+"""
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from utils.cache_relatorio import CACHE_SECOES, chave_conteudo
+from utils.numeros_br import ler_serie_br
+
+# limites superiores (em dias) das faixas; acima do último: "Acima de D+<último>"
+LIMITES_LIQUIDEZ = (0, 5, 15, 60, 180)
+A_MERCADO = "D+0 (à mercado)"
+# 'No Vencimento' e textos sem D+N não têm prazo conhecido: contam como D+0
+FAIXA_SEM_PRAZO = "D+0"
+
+_RE_DIAS = r"D\+(\d+)"
+
+def rotulos_faixas(limites=LIMITES_LIQUIDEZ) -> list:
+    """Faixas do prazo mais curto ao mais longo (sem a de 'à mercado')."""
+    return (["D+0" if lim == 0 else f"Até D+{lim}" for lim in limites]
+            + [f"Acima de D+{limites[-1]}"])
+
+def faixas_liquidez(limites=LIMITES_LIQUIDEZ) -> list:
+    """Todas as faixas, da mais longa para 'D+0 (à mercado)' (ordem do gráfico do PDF)."""
+    return rotulos_faixas(limites)[::-1] + [A_MERCADO]
+
+FAIXAS_LIQUIDEZ = faixas_liquidez()
+
+def dias_liquidez(liquidez: pd.Series) -> pd.Series:
+    """'D+30' -> 30.0; 'No Vencimento', vazio e textos sem D+N -> NaN."""
+    return pd.to_numeric(liquidez.astype(str).str.extract(_RE_DIAS, expand=False), errors="coerce")
+
+def classificar_liquidez(liquidez: pd.Series, limites=LIMITES_LIQUIDEZ) -> pd.Series:
+    """Faixa de cada ativo (categórica, categorias em faixas_liquidez(limites))."""
+    dias = dias_liquidez(liquidez)
+    faixa = pd.cut(dias, bins=[-np.inf, *limites, np.inf], labels=rotulos_faixas(limites))
+    faixa = faixa.cat.set_categories(faixas_liquidez(limites))
+    a_mercado = (dias == 0) & liquidez.astype(str).str.lower().str.contains("à mercado", regex=False)
+    faixa[a_mercado] = A_MERCADO
+    return faixa.fillna(FAIXA_SEM_PRAZO)
+
+def _somar_por_faixa(liquidez: pd.Series, valores: pd.Series, limites) -> pd.Series:
+    faixa = classificar_liquidez(liquidez, limites)
+    return (ler_serie_br(valores).groupby(faixa, observed=False).sum()
+                                 .reindex(faixas_liquidez(limites), fill_value=0.0))
+
+def valor_por_faixa(liquidez: pd.Series, valores: pd.Series, limites=LIMITES_LIQUIDEZ) -> pd.Series:
+    """
+    Soma de `valores` (números ou texto BR) por faixa, indexada por
+    faixas_liquidez(limites), com zero nas faixas vazias. Guardada no cache
+    de seções pelo conteúdo das entradas.
+    """
+    limites = tuple(limites)
+    chave = chave_conteudo("liquidez", liquidez.rename("Liquidez"), valores.rename("valor"), limites)
+    return CACHE_SECOES.obter(chave, lambda: _somar_por_faixa(liquidez, valores, limites)).copy()
+
+# -------------------------
+# Escada de liquidez
+# -------------------------
+DIAS_MES = 30
+# meses mostrados na tabela do PDF (0 = imediato, D+0)
+MARCOS_ESCADA = (0, 1, 3, 6, 12, 24, 36, 60)
+
+def prazos_liquidez(liquidez: pd.Series, vencimento: pd.Series = None, hoje: date = None) -> pd.Series:
+    """
+    Dias até o valor ficar disponível: o D+N da Liquidez; sem D+N ('No
+    Vencimento'), os dias até o Vencimento. NaN quando não há nenhum dos dois.
+    """
+    dias = dias_liquidez(liquidez)
+    if vencimento is not None:
+        venc = pd.to_datetime(vencimento.astype(str), format="ISO8601", errors="coerce")
+        ate_vencimento = (venc - pd.Timestamp(hoje or date.today())).dt.days.clip(lower=0)
+        dias = dias.fillna(ate_vencimento.astype(float))
+    return dias
+
+def escada_liquidez(prazos: pd.Series, valores: pd.DataFrame, meses: int = None) -> pd.DataFrame:
+    """
+    Valor (R$) disponível até o fim de cada mês (linha 0 = imediato), uma
+    coluna por carteira de `valores` (números ou texto BR). Os prazos são
+    ordenados uma vez e cada carteira é um cumsum sobre essa ordem; prazos
+    desconhecidos (NaN) ficam de fora. Sem `meses`, vai até o último prazo
+    (no mínimo 12 meses).
+    """
+    dias = prazos.to_numpy(dtype=float, na_value=np.nan)
+    conhecidos = ~np.isnan(dias)
+    ordem = np.argsort(dias[conhecidos], kind="stable")
+    dias_ordenados = dias[conhecidos][ordem]
+    numeros = np.column_stack([ler_serie_br(valores[c]).to_numpy() for c in valores.columns])
+    acumulado = np.zeros((len(ordem) + 1, len(valores.columns)))
+    np.cumsum(numeros[conhecidos][ordem], axis=0, out=acumulado[1:])
+
+    if meses is None:
+        ultimo = int(np.ceil(dias_ordenados[-1] / DIAS_MES)) if len(dias_ordenados) else 0
+        meses = max(ultimo, 12)
+    fim_do_mes = np.arange(meses + 1) * DIAS_MES
+    posicao = np.searchsorted(dias_ordenados, fim_do_mes, side="right")
+    return pd.DataFrame(acumulado[posicao], columns=valores.columns,
+                        index=pd.RangeIndex(meses + 1, name="Mês"))
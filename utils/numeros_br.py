@@ -0,0 +1,145 @@
+# utils/numeros_br.py
+"""
+Números no padrão brasileiro (1.234.567,89): formatação e leitura de um
+valor ou de uma coluna inteira. As versões de coluna dão o mesmo resultado
+que aplicar as de um valor elemento a elemento (tests/test_numeros_br.py).
+"""
+import functools
+
+import numpy as np
+import pandas as pd
+
+_TROCA_SEPARADORES = str.maketrans({",": ".", ".": ","})
+# formatar_serie_br: grupos de milhar e casas decimais (até _MAX_CASAS) por tabela
+_MAX_CASAS = 3
+_MIL = np.array([f"{i:03d}" for i in range(1000)])
+_FRACOES = {c: np.array([f"{i:0{c}d}" for i in range(10 ** c)]) for c in range(1, _MAX_CASAS + 1)}
+# textos que o float() lê como NaN (depois do upper): válidos, não viram `padrao`
+_TEXTOS_NAN = ["NAN", "+NAN", "-NAN"]
+
+# -------------------------
+# Formatação
+# -------------------------
+def formatar_br(valor, casas: int = 2, sufixo: str = "") -> str:
+    """1234567.891 -> '1.234.567,89'. Valor não numérico volta como texto."""
+    try:
+        v = float(valor)
+    except (TypeError, ValueError):
+        return str(valor)
+    return f"{v:,.{casas}f}".translate(_TROCA_SEPARADORES) + sufixo
+
+def formatar_serie_br(valores, casas: int = 2, sufixo: str = "", nulo: str = None) -> pd.Series:
+    """
+    formatar_br para uma coluna inteira, com o mesmo resultado. Colunas
+    numéricas (até 3 casas) são arredondadas e montadas em numpy: grupos de
+    milhar por tabela, unidos com as operações de texto do np.char. Nulos
+    viram `nulo`, se informado; senão, o mesmo texto de formatar_br ('nan').
+    """
+    serie = valores if isinstance(valores, pd.Series) else pd.Series(valores)
+    if not (isinstance(serie.dtype, np.dtype) and serie.dtype.kind in "fiu") or casas > _MAX_CASAS:
+        texto = serie.map(functools.partial(formatar_br, casas=casas, sufixo=sufixo)).astype("str")
+        return texto.mask(serie.isna(), nulo) if nulo is not None else texto
+
+    v = serie.to_numpy(dtype=float)
+    x = np.abs(v) * 10.0 ** casas
+    # só um x exatamente em k + 0,5 pode arredondar diferente do format (que
+    # olha o valor binário exato, não o produto em float); esses, os enormes
+    # e os não finitos (nan, inf) são formatados pelo Python
+    with np.errstate(invalid="ignore"):
+        incerto = ~(x < 2.0 ** 52) | (x - np.floor(x) == 0.5)
+    unidades = np.rint(np.where(incerto, 0.0, x)).astype(np.int64)
+    inteiros, fracao = np.divmod(unidades, 10 ** casas)
+
+    grupos = len(str(inteiros.max(initial=0))) // 3 + 1
+    texto = _MIL[inteiros // 1000 ** (grupos - 1) % 1000]
+    for k in range(grupos - 2, -1, -1):
+        texto = np.char.add(np.char.add(texto, "."), _MIL[inteiros // 1000 ** k % 1000])
+    texto = np.char.lstrip(texto, "0.")           # '000.012.345' -> '12.345'
+    texto = np.where(texto == "", "0", texto)
+    if casas:
+        texto = np.char.add(np.char.add(texto, ","), _FRACOES[casas][fracao])
+    texto = np.where(np.signbit(v), np.char.add("-", texto), texto)
+    if sufixo:
+        texto = np.char.add(texto, sufixo)
+
+    resultado = pd.Series(texto, index=serie.index, dtype="str")
+    if incerto.any():
+        resultado.iloc[incerto] = [formatar_br(a, casas, sufixo) for a in v[incerto]]
+    return resultado.mask(serie.isna(), nulo) if nulo is not None else resultado
+
+# -------------------------
+# Leitura
+# -------------------------
+def _eh_numero(x) -> bool:
+    return isinstance(x, (int, float, np.number)) and not isinstance(x, bool)
+
+def _float(texto: str, padrao):
+    try:
+        return float(texto)
+    except ValueError:
+        return padrao
+
+def ler_br(x, padrao=0.0, ponto_milhar: bool = False):
+    """
+    'R$ 1.234,56' / '1234,56' / '12,5%' / 1234.56 -> float; vazio ou
+    inválido -> `padrao`. Sem vírgula o ponto é decimal ('1.5' -> 1.5).
+    Com `ponto_milhar` (valor digitado, número do extrato) o ponto é sempre
+    milhar ('1.500' -> 1500.0) e '%' não é aceito.
+    """
+    if x is None:
+        return padrao
+    if _eh_numero(x):
+        return padrao if pd.isna(x) else float(x)
+    s = str(x).strip().upper().replace("R$", "").replace(" ", "")
+    if not ponto_milhar:
+        s = s.replace("%", "")
+    if not s:
+        return padrao
+    if ponto_milhar or "," in s:
+        s = s.replace(".", "").replace(",", ".")
+    return _float(s, padrao)
+
+def ler_serie_br(valores, padrao=0.0, ponto_milhar: bool = False) -> pd.Series:
+    """
+    ler_br para uma coluna inteira: números passam direto; textos são limpos
+    com as operações de texto do pandas e convertidos pelo pd.to_numeric. Só
+    o que ele recusa ('1_000', inválidos) passa pelo float() um a um.
+    Com `padrao=None` os inválidos ficam NaN.
+    """
+    serie = valores if isinstance(valores, pd.Series) else pd.Series(valores)
+    if isinstance(serie.dtype, np.dtype) and serie.dtype.kind in "fiu":
+        numeros = serie.astype(float)
+        return numeros.fillna(padrao) if padrao is not None else numeros
+
+    resultado = pd.Series(np.nan, index=serie.index)
+    valido = pd.Series(False, index=serie.index)
+    if serie.dtype == object:
+        # coluna mista: números já prontos, o resto (inclusive bool) é lido como texto
+        eh_numero = serie.map(_eh_numero).astype(bool)
+        resultado[eh_numero] = serie[eh_numero].astype(float)
+        valido[eh_numero] = resultado[eh_numero].notna()
+        eh_texto = ~eh_numero & serie.notna()
+    else:
+        eh_texto = serie.notna()
+
+    texto = (serie[eh_texto].astype(str).str.strip().str.upper()
+                            .str.replace("R$", "", regex=False)
+                            .str.replace(" ", "", regex=False))
+    if ponto_milhar:
+        texto = texto.str.replace(".", "", regex=False).str.replace(",", ".", regex=False)
+    else:
+        texto = texto.str.replace("%", "", regex=False)
+        com_virgula = texto.str.contains(",", regex=False)
+        texto = texto.where(~com_virgula, texto.str.replace(".", "", regex=False)
+                                                .str.replace(",", ".", regex=False))
+    numeros = pd.to_numeric(texto, errors="coerce").astype(float)
+    eh_nan = texto.isin(_TEXTOS_NAN)
+    recusados = numeros.isna() & ~eh_nan & (texto != "")
+    if recusados.any():
+        numeros[recusados] = texto[recusados].map(lambda s: _float(s, np.nan)).astype(float)
+    resultado[eh_texto] = numeros
+    valido[eh_texto] = numeros.notna() | eh_nan
+
+    if padrao is not None:
+        resultado[~valido] = padrao
+    return resultado
@@ -0,0 +1,107 @@
+# utils/otimizacao_pdf.py
+"""
+Redução do tamanho das páginas estáticas do relatório: recompressão dos
+fluxos, um único XObject por imagem repetida e reamostragem opcional das
+imagens. Roda uma vez por processo, ao carregar os templates.
+"""
+import hashlib
+import io
+import zlib
+
+from PIL import Image
+from PyPDF2.generic import NameObject, NumberObject
+
+NIVEL_ZLIB = 9
+QUALIDADE_JPEG = 85
+
+def _chave_fluxo(obj) -> str:
+    """Hash do dicionário (sem /Length) e dos dados codificados de um fluxo."""
+    h = hashlib.sha256()
+    h.update(repr(sorted((str(k), str(v)) for k, v in obj.items() if k != "/Length")).encode())
+    h.update(obj._data)
+    return h.hexdigest()
+
+def _trocar_dados(obj, dados: bytes) -> None:
+    obj._data = dados
+    if getattr(obj, "decoded_self", None) is not None:
+        obj.decoded_self = None
+
+def recomprimir(obj) -> int:
+    """Refaz o Flate de um fluxo no nível máximo; devolve os bytes economizados."""
+    if obj.get("/Filter") != "/FlateDecode" or "/DecodeParms" in obj:
+        return 0
+    novo = zlib.compress(obj.get_data(), NIVEL_ZLIB)
+    economia = len(obj._data) - len(novo)
+    if economia > 0:
+        _trocar_dados(obj, novo)
+        return economia
+    return 0
+
+def reamostrar(obj, largura_max: int, altura_max: int) -> int:
+    """Reduz uma imagem JPEG (RGB/cinza) para caber em largura_max x altura_max px."""
+    if (obj.get("/Filter") != "/DCTDecode" or "/SMask" in obj or "/Decode" in obj
+            or obj.get("/ColorSpace") not in ("/DeviceRGB", "/DeviceGray")):
+        return 0
+    w, h = int(obj["/Width"]), int(obj["/Height"])
+    escala = min(largura_max / w, altura_max / h)
+    if escala >= 1:
+        return 0
+    with Image.open(io.BytesIO(obj._data)) as im:
+        im = im.resize((max(1, round(w * escala)), max(1, round(h * escala))), Image.LANCZOS)
+        buf = io.BytesIO()
+        im.save(buf, "JPEG", quality=QUALIDADE_JPEG, optimize=True)
+    economia = len(obj._data) - buf.tell()
+    if economia <= 0:
+        return 0
+    _trocar_dados(obj, buf.getvalue())
+    obj[NameObject("/Width")] = NumberObject(im.width)
+    obj[NameObject("/Height")] = NumberObject(im.height)
+    return economia
+
+def otimizar_paginas(paginas, dpi: int = None, vistos: dict = None) -> dict:
+    """
+    Otimiza, no lugar, os fluxos de `paginas` (conteúdo e XObjects).
+
+    XObjects idênticos passam a apontar para o primeiro visto; `vistos`
+    (hash -> referência) pode ser compartilhado entre arquivos. Com `dpi`,
+    imagens maiores que a página nessa resolução são reamostradas.
+    Devolve os bytes economizados por etapa.
+    """
+    vistos = {} if vistos is None else vistos
+    economia = {"recompressao": 0, "imagens": 0, "duplicados": 0}
+    tratados, repetidos = set(), set()
+    for pagina in paginas:
+        conteudo = pagina.get("/Contents")
+        if conteudo is not None:
+            conteudo = conteudo.get_object()
+            for ref in (conteudo if isinstance(conteudo, list) else [pagina["/Contents"]]):
+                obj = ref.get_object()
+                if id(obj) not in tratados:
+                    tratados.add(id(obj))
+                    economia["recompressao"] += recomprimir(obj)
+
+        recursos = pagina.get("/Resources")
+        xobjects = recursos.get_object().get("/XObject") if recursos is not None else None
+        if xobjects is None:
+            continue
+        xobjects = xobjects.get_object()
+        largura_max = altura_max = None
+        if dpi:
+            largura_max = round(float(pagina.mediabox.width) / 72 * dpi)
+            altura_max = round(float(pagina.mediabox.height) / 72 * dpi)
+        for nome, ref in list(xobjects.items()):
+            obj = ref.get_object()
+            if id(obj) not in tratados:
+                tratados.add(id(obj))
+                if dpi and obj.get("/Subtype") == "/Image":
+                    economia["imagens"] += reamostrar(obj, largura_max, altura_max)
+                economia["recompressao"] += recomprimir(obj)
+            chave = _chave_fluxo(obj)
+            if chave not in vistos:
+                vistos[chave] = ref
+            elif vistos[chave].get_object() is not obj:
+                xobjects[NameObject(nome)] = vistos[chave]
+                if id(obj) not in repetidos:
+                    repetidos.add(id(obj))
+                    economia["duplicados"] += len(obj._data)
+    return economia
@@ -0,0 +1,87 @@
+# utils/perfil_geracao.py
+"""Medição opcional das etapas de uma geração de relatório (tempo e memória alocada)."""
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+_TRACEMALLOC_LOCK = threading.Lock()
+_TRACEMALLOC_USOS = 0
+
+def _ligar_tracemalloc() -> None:
+    global _TRACEMALLOC_USOS
+    with _TRACEMALLOC_LOCK:
+        if _TRACEMALLOC_USOS == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _TRACEMALLOC_USOS += 1
+
+def _desligar_tracemalloc() -> None:
+    global _TRACEMALLOC_USOS
+    with _TRACEMALLOC_LOCK:
+        _TRACEMALLOC_USOS -= 1
+        if _TRACEMALLOC_USOS == 0:
+            tracemalloc.stop()
+
+class PerfilGeracao:
+    """
+    Tempo e memória de cada etapa de uma geração: passe em
+    generate_pdf(perfil=...) e leia `registro()` no fim.
+
+    Com `memoria=True` o tracemalloc fica ligado durante a geração (deixa
+    tudo bem mais lento). Ele é global ao processo: gerações simultâneas
+    somam as alocações umas das outras.
+    """
+    def __init__(self, memoria: bool = False):
+        self.memoria = memoria
+        self.etapas = {}  # nome -> [segundos, chamadas, bytes alocados]
+        self.total = 0.0
+        self.pico = None
+
+    @contextmanager
+    def geracao(self):
+        if self.memoria:
+            _ligar_tracemalloc()
+            tracemalloc.reset_peak()
+        t0 = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.total += time.perf_counter() - t0
+            if self.memoria:
+                self.pico = tracemalloc.get_traced_memory()[1]
+                _desligar_tracemalloc()
+
+    @contextmanager
+    def etapa(self, nome: str):
+        """Soma o tempo (e a memória alocada) do bloco na etapa `nome`."""
+        m0 = tracemalloc.get_traced_memory()[0] if self.memoria else 0
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            dt = time.perf_counter() - t0
+            alocado = tracemalloc.get_traced_memory()[0] - m0 if self.memoria else 0
+            acc = self.etapas.setdefault(nome, [0.0, 0, 0])
+            acc[0] += dt; acc[1] += 1; acc[2] += alocado
+
+    def registro(self) -> dict:
+        """Registro estruturado: total, pico de memória e uma linha por etapa, na ordem de execução."""
+        return {
+            "total_s": round(self.total, 4),
+            "pico_kb": round(self.pico / 1024, 1) if self.pico is not None else None,
+            "etapas": [
+                {"etapa": nome, "segundos": round(s, 4), "chamadas": n,
+                 "alocado_kb": round(b / 1024, 1) if self.memoria else None}
+                for nome, (s, n, b) in self.etapas.items()
+            ],
+        }
+
+class _SemPerfil:
+    """Perfil nulo usado quando a geração não é medida."""
+    def geracao(self):
+        return nullcontext(self)
+
+    def etapa(self, nome: str):
+        return nullcontext()
+
+SEM_PERFIL = _SemPerfil()
@@ -0,0 +1,208 @@
+# utils/pipeline_carteira.py
+"""
+Etapas do consolidador sem interface: leitura dos extratos, classificação e
+liquidez (Etapa 2), rebalanceamento pelo modelo (Etapa 4) e entradas do
+relatório (Etapa 5). Usado pelas telas e pela geração em lote (gerar_lote.py).
+"""
+import re
+from datetime import date
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.extrair_pdf_xp import extrair_texto_ativos, parse_ativos
+
+ARQUIVO_LIQUIDEZ = Path(__file__).resolve().parent.parent / "interfaces" / "liquidez_ativos.xlsx"
+
+MESES = {
+    "JAN": 1, "FEV": 2, "MAR": 3, "ABR": 4, "MAI": 5, "JUN": 6,
+    "JUL": 7, "AGO": 8, "SET": 9, "OUT": 10, "NOV": 11, "DEZ": 12
+}
+
+# -------------------------
+# Etapa 1 — extratos
+# -------------------------
+def ler_extratos(arquivos) -> pd.DataFrame:
+    """Ativos de um ou mais extratos XPerformance (caminhos ou arquivos abertos)."""
+    frames = []
+    for arquivo in arquivos:
+        df = parse_ativos(extrair_texto_ativos(arquivo))
+        df["Banco"] = "XP"  # Marca como XP
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+# -------------------------
+# Etapa 2 — classificação e liquidez
+# -------------------------
+@lru_cache(maxsize=4)
+def _ler_base_liquidez(caminho: Path) -> pd.DataFrame:
+    try:
+        return pd.read_excel(
+            caminho,
+            dtype={"ativo": str, "liquidez": str, "vencimento": str}
+        )
+    except Exception as e:
+        print(f"carregar_base_liquidez – não encontrou o arquivo em {caminho}: {e}")
+        return pd.DataFrame(columns=["ativo", "liquidez", "vencimento"])
+
+def carregar_base_liquidez(caminho: Path = ARQUIVO_LIQUIDEZ) -> pd.DataFrame:
+    """Base de liquidez (colunas ativo, liquidez, vencimento), lida uma vez por processo."""
+    return _ler_base_liquidez(caminho).copy()
+
+def _liquidez_fallback(estrategia: str, hoje: date) -> str:
+    """Liquidez pelo nome quando o ativo não está na base."""
+    # MMM/YYYY -> D+X (dia 15 do mês)
+    m = re.search(r"([A-Za-z]{3})/(\d{4})", estrategia)
+    if m and MESES.get(m.group(1).upper()):
+        alvo = date(int(m.group(2)), MESES[m.group(1).upper()], 15)
+        return f"D+{(alvo - hoje).days}"
+    if re.search(r"(?:3|4|11|34|39)$", estrategia):
+        return "D+2"
+    if "tesouro" in estrategia.lower():
+        return "D+0 (à mercado)"
+    return ""
+
+def classificar_ativos(ativos_df: pd.DataFrame, base_liquidez: pd.DataFrame = None,
+                       classificacoes: dict = None, hoje: date = None) -> pd.DataFrame:
+    """
+    Classificação (do extrato, ou de `classificacoes` {ativo: classe}),
+    Liquidez (da base, senão pelas regras de fallback) e Vencimento
+    (AAAA-MM-DD, da base; vazio se não houver) de cada ativo.
+    """
+    df = ativos_df.copy()
+    if "Classificação" not in df.columns:
+        df["Classificação"] = df.get("classificacao", "")
+    if classificacoes:
+        df["Classificação"] = df["estrategia"].map(classificacoes).fillna(df["Classificação"])
+
+    if base_liquidez is None:
+        base_liquidez = carregar_base_liquidez()
+    liq_map = dict(zip(base_liquidez["ativo"], base_liquidez["liquidez"]))
+    df["Liquidez"] = df["estrategia"].map(liq_map).fillna("")
+    hoje = hoje or date.today()
+    sem_liq = df["Liquidez"] == ""
+    df.loc[sem_liq, "Liquidez"] = [_liquidez_fallback(str(e), hoje) for e in df.loc[sem_liq, "estrategia"]]
+
+    if "vencimento" in base_liquidez.columns:
+        venc = pd.to_datetime(base_liquidez["vencimento"], format="ISO8601", errors="coerce")
+        venc_map = dict(zip(base_liquidez["ativo"], venc.dt.strftime("%Y-%m-%d")))
+        df["Vencimento"] = df["estrategia"].map(venc_map).fillna("")
+    return df
+
+# -------------------------
+# Etapa 4 — rebalanceamento
+# -------------------------
+def ajustes_por_classe(dist: pd.DataFrame, modelo: dict, aporte: float = 0.0) -> dict:
+    """
+    Ajuste (R$, + ou -) de cada classe para chegar ao modelo sobre
+    total atual + aporte. `dist` tem Classificação e Valor.
+    """
+    base_total = float(dist["Valor"].sum()) + aporte
+    ajustes = {}
+    # ordem fixa (atual, depois modelo): o desempate do max abaixo e a ordem
+    # das novas posições não podem depender do hash das strings
+    for cls in dict.fromkeys([*dist["Classificação"], *modelo]):
+        valor_atual_classe = float(dist.loc[dist["Classificação"] == cls, "Valor"].sum())
+        pct_modelo = float(modelo.get(cls, 0.0))
+        alvo_classe = (pct_modelo / 100.0) * base_total
+        ajustes[cls] = alvo_classe - valor_atual_classe  # + ou -
+
+    # alocações e resgates devem fechar no aporte
+    total_alocar  = sum(v for v in ajustes.values() if v > 0)
+    total_reduzir = sum(abs(v) for v in ajustes.values() if v < 0)
+    delta_diff = (total_alocar - total_reduzir) - aporte
+    if abs(delta_diff) > 1e-6:
+        pos_items = [(c, v) for c, v in ajustes.items() if v > 0]
+        if pos_items:
+            cmax, vmax = max(pos_items, key=lambda x: x[1])
+            ajustes[cmax] = max(vmax - delta_diff, 0.0)
+    return ajustes
+
+def rebalancear(ativos_df: pd.DataFrame, modelo: dict, aporte: float = 0.0,
+                realocacoes: dict = None) -> pd.DataFrame:
+    """
+    Proposta por ativo, com as colunas da Etapa 4 (Valor Realocado, Novo Valor).
+
+    Realocações informadas ({ativo: valor}) valem como dadas; o restante do
+    ajuste de cada classe é dividido entre os demais ativos da classe na
+    proporção do saldo atual (ValueError se algum saldo ficar negativo). Classe do modelo sem nenhum ativo ganha uma
+    posição "Nova posição – <classe>".
+    """
+    df = ativos_df.copy()
+    df["saldo_bruto"] = pd.to_numeric(df["saldo_bruto"], errors="coerce").fillna(0.0)
+    dist = (df.groupby("Classificação", as_index=False, observed=True)["saldo_bruto"].sum()
+              .rename(columns={"saldo_bruto": "Valor"}))
+    ajustes = ajustes_por_classe(dist, modelo, aporte)
+
+    presentes = set(df["Classificação"])
+    novas = [cls for cls, v in ajustes.items() if cls not in presentes and v > 0]
+    if novas:
+        df = pd.concat([df, pd.DataFrame({
+            "estrategia": [f"Nova posição – {cls}" for cls in novas],
+            "saldo_bruto": 0.0,
+            "Classificação": novas,
+            "Liquidez": "",
+        })], ignore_index=True)
+
+    classe = df["Classificação"]
+    fixo = df["estrategia"].map(realocacoes or {}).astype(float)
+    informado = fixo.notna().to_numpy()
+    restante = (classe.map(ajustes).fillna(0.0)
+                - fixo.fillna(0.0).groupby(classe, observed=True).transform("sum")).to_numpy()
+
+    base = df["saldo_bruto"].where(~informado, 0.0)
+    soma_base = base.groupby(classe, observed=True).transform("sum").to_numpy()
+    livres = pd.Series(~informado, index=df.index).groupby(classe, observed=True).transform("sum").to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        peso = np.where(soma_base > 0, base.to_numpy() / soma_base,
+                        np.where(informado, 0.0, 1.0 / np.maximum(livres, 1)))
+    df["Valor Realocado"] = np.where(informado, fixo.to_numpy(), restante * peso)
+    df["Novo Valor"] = df["saldo_bruto"] + df["Valor Realocado"]
+
+    negativos = df.loc[df["Novo Valor"] < -0.01, "estrategia"].tolist()
+    if negativos:
+        raise ValueError(f"realocações deixam saldo negativo em: {', '.join(map(str, negativos))}")
+    return df
+
+# -------------------------
+# Etapa 5 — entradas do relatório
+# -------------------------
+def modelo_para_df(modelo) -> pd.DataFrame:
+    """Modelo no formato do PDF (Classificação, Percentual Ideal)."""
+    if isinstance(modelo, dict):
+        return pd.DataFrame({
+            "Classificação": list(modelo.keys()),
+            "Percentual Ideal": list(modelo.values()),
+        })
+    modelo_df = modelo.copy()
+    # normaliza nome de coluna de percentual, se vier diferente
+    percent_cols = [c for c in modelo_df.columns if "percentual" in c.lower()]
+    if percent_cols and "Percentual Ideal" not in modelo_df.columns:
+        modelo_df = modelo_df.rename(columns={percent_cols[0]: "Percentual Ideal"})
+    return modelo_df
+
+def distribuicao(ativos_df: pd.DataFrame, valor_col: str) -> pd.DataFrame:
+    """Valor e Percentual por Classificação a partir de `valor_col`."""
+    dist = ativos_df.groupby("Classificação", observed=True)[valor_col].sum().reset_index()
+    total = float(dist[valor_col].sum())
+    dist["Percentual"] = dist[valor_col] / total * 100 if total else 0.0
+    return dist
+
+def entradas_relatorio(ativos_df: pd.DataFrame, modelo, sugestao: dict,
+                       cliente_nome: str = "", nome_assessor: str = "",
+                       resumo_df: pd.DataFrame = None) -> dict:
+    """Argumentos de generate_pdf a partir da carteira rebalanceada."""
+    ativos_df = ativos_df.copy()
+    ativos_df["valor_atual"] = pd.to_numeric(ativos_df["saldo_bruto"], errors="coerce").fillna(0.0)
+    ativos_df["Novo Valor"] = pd.to_numeric(ativos_df["Novo Valor"], errors="coerce").fillna(0.0)
+    return dict(
+        dist_df=distribuicao(ativos_df, "valor_atual").rename(columns={"valor_atual": "valor"}),
+        modelo_df=modelo_para_df(modelo),
+        resumo_df=resumo_df if resumo_df is not None else pd.DataFrame(),
+        sugestao=sugestao,
+        ativos_df=ativos_df,
+        cliente_nome=cliente_nome,
+        nome_assessor=nome_assessor,
+    )
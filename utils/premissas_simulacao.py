@@ -0,0 +1,44 @@
+# Premissas por classe para a projeção da carteira (valores anuais, nominais em R$)
+#   retorno: retorno esperado ao ano (0.105 = 10,5% a.a.)
+#   vol:     volatilidade anualizada
+PREMISSAS_CLASSES = {
+    "Pós Fixado":            {"retorno": 0.105, "vol": 0.010},
+    "Inflação":              {"retorno": 0.110, "vol": 0.060},
+    "Pré Fixado":            {"retorno": 0.115, "vol": 0.080},
+    "Multimercado":          {"retorno": 0.110, "vol": 0.060},
+    "Renda Variável Brasil": {"retorno": 0.135, "vol": 0.220},
+    "Alternativo":           {"retorno": 0.120, "vol": 0.120},
+    "Renda Variável Global": {"retorno": 0.120, "vol": 0.180},
+    "Renda Fixa Global":     {"retorno": 0.080, "vol": 0.090},
+    "Fundos Listados":       {"retorno": 0.120, "vol": 0.140},
+    "Caixa":                 {"retorno": 0.100, "vol": 0.005},
+}
+
+# Usada para classes sem premissa própria
+PREMISSA_PADRAO = {"retorno": 0.105, "vol": 0.010}
+
+# Nomes alternativos usados nas carteiras modelo
+ALIASES_CLASSES = {
+    "Alternativos": "Alternativo",
+}
+
+# Correlações entre as classes, na ordem de PREMISSAS_CLASSES
+CORRELACOES = [
+    # PósF  Infl  PréF  Mult  RVBr  Alt   RVGl  RFGl  FIIs  Caixa
+    [1.00, 0.20, 0.20, 0.10, 0.00, 0.00, 0.00, 0.00, 0.00, 0.90],
+    [0.20, 1.00, 0.70, 0.30, 0.40, 0.20, 0.10, 0.10, 0.40, 0.20],
+    [0.20, 0.70, 1.00, 0.30, 0.40, 0.20, 0.10, 0.10, 0.40, 0.20],
+    [0.10, 0.30, 0.30, 1.00, 0.50, 0.30, 0.30, 0.20, 0.40, 0.10],
+    [0.00, 0.40, 0.40, 0.50, 1.00, 0.40, 0.50, 0.10, 0.60, 0.00],
+    [0.00, 0.20, 0.20, 0.30, 0.40, 1.00, 0.30, 0.10, 0.30, 0.00],
+    [0.00, 0.10, 0.10, 0.30, 0.50, 0.30, 1.00, 0.40, 0.30, 0.00],
+    [0.00, 0.10, 0.10, 0.20, 0.10, 0.10, 0.40, 1.00, 0.10, 0.00],
+    [0.00, 0.40, 0.40, 0.40, 0.60, 0.30, 0.30, 0.10, 1.00, 0.00],
+    [0.90, 0.20, 0.20, 0.10, 0.00, 0.00, 0.00, 0.00, 0.00, 1.00],
+]
+
+# Parâmetros padrão da simulação
+MESES_PROJECAO = 120
+N_CAMINHOS     = 10_000
+SEMENTE        = 42
+PERCENTIS      = (5, 25, 50, 75, 95)
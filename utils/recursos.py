@@ -0,0 +1,46 @@
+# utils/recursos.py
+"""Imagens estáticas do relatório, lidas e reduzidas ao tamanho de uso uma vez por processo."""
+import functools
+import os
+import threading
+from dataclasses import dataclass
+
+from PIL import Image
+from reportlab.lib.utils import ImageReader
+
+PASTA_RECURSOS = os.path.dirname(__file__)
+
+# Resolução das imagens no PDF (pixels por polegada no tamanho desenhado)
+DPI_IMAGENS = 300
+
+# nome -> (arquivo em utils/, largura desenhada em pt)
+IMAGENS = {
+    "logo_rodape": ("c-com-fundo-branco.png", 44),
+    "logo_criteria": ("Logo_Criteria_Financial_Group_Cor_V2_RGB-01.png", 160),
+}
+
+@dataclass(frozen=True)
+class Imagem:
+    leitor: ImageReader
+    largura: float  # pt
+    altura: float   # pt
+
+_RECURSOS_LOCK = threading.Lock()
+
+@functools.lru_cache(maxsize=None)
+def _carregar_imagem(nome: str) -> Imagem:
+    arquivo, largura = IMAGENS[nome]
+    with Image.open(os.path.join(PASTA_RECURSOS, arquivo)) as im:
+        im.load()
+    px = round(largura / 72 * DPI_IMAGENS)
+    if im.width > px:
+        im = im.resize((px, round(im.height * px / im.width)), Image.LANCZOS)
+    leitor = ImageReader(im)
+    # decodifica agora: as páginas só reutilizam os dados (e o mesmo XObject)
+    leitor.getRGBData()
+    return Imagem(leitor, largura, largura * im.height / im.width)
+
+def imagem(nome: str) -> Imagem:
+    """Imagem registrada em IMAGENS, já no tamanho de uso."""
+    with _RECURSOS_LOCK:
+        return _carregar_imagem(nome)
@@ -0,0 +1,69 @@
+# utils/rentabilidade.py
+import numpy as np
+import pandas as pd
+
+# Campos de desempenho extraídos por parse_ativos -> rótulo exibido
+CAMPOS_RENTABILIDADE = {
+    "rentabilidade_mes_atual":   "Rent. Mês (%)",
+    "porcentagem_cdi_mes_atual": "%CDI Mês",
+    "rentabilidade_ano":         "Rent. Ano (%)",
+    "porcentagem_cdi_ano":       "%CDI Ano",
+    "rentabilidade_24m":         "Rent. 24m (%)",
+    "porcentagem_cdi_24m":       "%CDI 24m",
+}
+
+ROTULO_TOTAL = "Total Carteira"
+
+def rentabilidade_ponderada(ativos_df: pd.DataFrame, valor_col: str = "saldo_bruto") -> pd.DataFrame:
+    """
+    Rentabilidade e %CDI ponderados pelo valor, por classe e para a carteira.
+
+    Cada campo é ponderado só pelos ativos que têm o dado (ativos sem
+    histórico — ex.: incluídos na Etapa 4 — não puxam a média para zero).
+    Retorna um DataFrame com uma linha por Classificação + ROTULO_TOTAL e as
+    colunas rotuladas de CAMPOS_RENTABILIDADE; NaN quando não há dado.
+    """
+    campos = [c for c in CAMPOS_RENTABILIDADE if c in ativos_df.columns]
+    if ativos_df.empty or not campos or valor_col not in ativos_df.columns:
+        return pd.DataFrame(columns=list(CAMPOS_RENTABILIDADE.values()))
+
+    codigos, classes = pd.factorize(ativos_df["Classificação"], sort=True)
+    pesos = pd.to_numeric(ativos_df[valor_col], errors="coerce").fillna(0.0).to_numpy(dtype=float)
+    pesos = np.clip(pesos, 0.0, None)
+    valores = ativos_df[campos].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+
+    tem_dado = ~np.isnan(valores)
+    pesos_validos = pesos[:, None] * tem_dado                      # (ativos x campos)
+    produto = pesos_validos * np.nan_to_num(valores)
+
+    validos = codigos >= 0
+    num = np.zeros((len(classes), len(campos)))
+    den = np.zeros((len(classes), len(campos)))
+    np.add.at(num, codigos[validos], produto[validos])
+    np.add.at(den, codigos[validos], pesos_validos[validos])
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        por_classe = np.where(den > 0, num / den, np.nan)
+        total = np.where(den.sum(axis=0) > 0, num.sum(axis=0) / den.sum(axis=0), np.nan)
+
+    res = pd.DataFrame(
+        np.vstack([por_classe, total]),
+        index=list(classes) + [ROTULO_TOTAL],
+        columns=[CAMPOS_RENTABILIDADE[c] for c in campos],
+    )
+    res.index.name = "Classificação"
+    return res
+
+def comparar_rentabilidade(ativos_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Linhas 'Carteira Atual' (saldo_bruto) e 'Carteira Proposta' (Novo Valor)
+    com os totais ponderados; a proposta só aparece se houver 'Novo Valor'.
+    """
+    linhas = {"Carteira Atual": rentabilidade_ponderada(ativos_df, "saldo_bruto")}
+    if "Novo Valor" in ativos_df.columns:
+        linhas["Carteira Proposta"] = rentabilidade_ponderada(ativos_df, "Novo Valor")
+    res = pd.DataFrame({
+        nome: tab.loc[ROTULO_TOTAL] for nome, tab in linhas.items() if ROTULO_TOTAL in tab.index
+    }).T
+    res.index.name = "Carteira"
+    return res
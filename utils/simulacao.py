@@ -0,0 +1,107 @@
+# utils/simulacao.py
+import numpy as np
+import pandas as pd
+
+from utils.premissas_simulacao import (
+    PREMISSAS_CLASSES, PREMISSA_PADRAO, ALIASES_CLASSES, CORRELACOES,
+    MESES_PROJECAO, N_CAMINHOS, SEMENTE, PERCENTIS,
+)
+
+def _parametros_mensais(classes):
+    """Vetor de retornos e matriz de covariância mensais para `classes`."""
+    ordem = list(PREMISSAS_CLASSES.keys())
+    corr_base = np.asarray(CORRELACOES, dtype=float)
+
+    nomes = [ALIASES_CLASSES.get(c, c) for c in classes]
+    prem = [PREMISSAS_CLASSES.get(n, PREMISSA_PADRAO) for n in nomes]
+    ret_anual = np.array([p["retorno"] for p in prem])
+    vol_anual = np.array([p["vol"] for p in prem])
+
+    # classes fora da tabela de correlação ficam descorrelacionadas
+    idx = np.array([ordem.index(n) if n in ordem else -1 for n in nomes])
+    corr = np.eye(len(classes))
+    conhecidas = idx >= 0
+    corr[np.ix_(conhecidas, conhecidas)] = corr_base[np.ix_(idx[conhecidas], idx[conhecidas])]
+
+    mu = (1.0 + ret_anual) ** (1.0 / 12.0) - 1.0
+    sigma = vol_anual / np.sqrt(12.0)
+    return mu, corr * np.outer(sigma, sigma)
+
+def simular_carteiras(carteiras: dict, meses: int = MESES_PROJECAO, n_caminhos: int = N_CAMINHOS,
+                      semente: int = SEMENTE, percentis=PERCENTIS) -> dict:
+    """
+    Projeção Monte Carlo de uma ou mais carteiras com os mesmos cenários.
+
+    `carteiras` é um dict nome -> {Classificação: valor em R$}. Cada carteira
+    é rebalanceada mensalmente, logo seu retorno mensal é a combinação linear
+    dos retornos das classes: basta simular a normal multivariada das
+    carteiras (covariância W Σ Wᵀ), sem gerar caminhos por classe.
+
+    Retorna, por carteira:
+      - "faixas":    DataFrame mês x percentil com o patrimônio projetado;
+      - "drawdown":  dict com mediana e P95 do drawdown máximo e a
+                     probabilidade de terminar abaixo do valor inicial.
+    Mesma semente => mesmos números (saída do PDF reproduzível).
+    """
+    nomes = list(carteiras.keys())
+    if not nomes:
+        return {}
+
+    classes = list(dict.fromkeys(c for cart in carteiras.values() for c in cart.keys()))
+    valores = pd.DataFrame.from_records(
+        [{c: float(v) for c, v in carteiras[n].items()} for n in nomes], columns=classes
+    ).fillna(0.0).to_numpy(dtype=float)
+    iniciais = valores.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pesos = np.where(iniciais[:, None] > 0, valores / iniciais[:, None], 0.0)
+
+    mu, cov = _parametros_mensais(classes)
+    media = pesos @ mu                                   # (carteiras,)
+    cov_cart = pesos @ cov @ pesos.T                     # (carteiras x carteiras)
+    chol = np.linalg.cholesky(cov_cart + np.eye(len(nomes)) * 1e-14)
+
+    rng = np.random.default_rng(semente)
+    z = rng.standard_normal((n_caminhos, meses, len(nomes)))
+    retornos = np.clip(media + z @ chol.T, -0.99, None)  # (caminhos x meses x carteiras)
+
+    patrimonio = np.empty((n_caminhos, meses + 1, len(nomes)))
+    patrimonio[:, 0, :] = 1.0
+    np.cumprod(1.0 + retornos, axis=1, out=patrimonio[:, 1:, :])
+
+    pico = np.maximum.accumulate(patrimonio, axis=1)
+    dd_max = (1.0 - patrimonio / pico).max(axis=1)       # (caminhos x carteiras)
+    bandas = np.percentile(patrimonio, percentis, axis=0)  # (percentis x meses+1 x carteiras)
+
+    resultado = {}
+    for k, nome in enumerate(nomes):
+        faixas = pd.DataFrame(bandas[:, :, k].T * iniciais[k],
+                              columns=[f"P{p}" for p in percentis])
+        faixas.index.name = "Mês"
+        resultado[nome] = {
+            "faixas": faixas,
+            "drawdown": {
+                "mediana": float(np.median(dd_max[:, k])),
+                "p95": float(np.percentile(dd_max[:, k], 95)),
+                "prob_perda": float((patrimonio[:, -1, k] < 1.0).mean()),
+            },
+        }
+    return resultado
+
+def resumo_simulacao(resultado: dict, horizontes=(12, 60, 120)) -> pd.DataFrame:
+    """Tabela-resumo (uma linha por carteira) usada na Etapa 5 e no PDF."""
+    linhas = []
+    for nome, res in resultado.items():
+        faixas = res["faixas"]
+        ultimo = faixas.index.max()
+        linha = {"Carteira": nome}
+        for h in horizontes:
+            if h <= ultimo:
+                linha[f"Mediana {h // 12} ano{'s' if h > 12 else ''}"] = faixas.loc[h, "P50"]
+        if "P5" in faixas.columns:
+            linha["Pessimista (P5)"] = faixas.loc[ultimo, "P5"]
+        if "P95" in faixas.columns:
+            linha["Otimista (P95)"] = faixas.loc[ultimo, "P95"]
+        linha["Drawdown Máx. (mediana)"] = res["drawdown"]["mediana"] * 100.0
+        linha["Drawdown Máx. (P95)"] = res["drawdown"]["p95"] * 100.0
+        linhas.append(linha)
+    return pd.DataFrame(linhas)